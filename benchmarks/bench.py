@@ -0,0 +1,420 @@
+"""
+Throughput and latency benchmarks for every socket pattern in the README.
+
+Every run echoes timestamped messages through a server running as a
+`BaseThread` or `BaseProcess` worker (`workers/base.py`). One-way patterns
+(`PUB/SUB`, `PUSH/PULL`) echo back over a `PUSH` return path, so their latency
+includes that extra hop.
+
+Usage:
+    python bench.py --patterns req-rep,push-pull --sizes 64,65536 --output results.json
+"""
+
+from itertools import count, product
+from pathlib import Path
+from typing import Any
+import argparse
+import asyncio
+import json
+import os
+import platform
+import struct
+import sys
+import tempfile
+import time
+
+# ZMQ
+import zmq
+import zmq.asyncio
+
+# Workers
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "workers"))
+from base import BaseProcess, BaseThread  # noqa: E402
+
+# (client, server) socket types
+PATTERNS = {
+    "req-rep": (zmq.REQ, zmq.REP),
+    "req-router": (zmq.REQ, zmq.ROUTER),
+    "dealer-rep": (zmq.DEALER, zmq.REP),
+    "dealer-router": (zmq.DEALER, zmq.ROUTER),
+    "dealer-dealer": (zmq.DEALER, zmq.DEALER),
+    "router-router": (zmq.ROUTER, zmq.ROUTER),
+    "pub-sub": (zmq.PUB, zmq.SUB),
+    "push-pull": (zmq.PUSH, zmq.PULL),
+    "pair": (zmq.PAIR, zmq.PAIR),
+}
+ONE_WAY = {"pub-sub", "push-pull"}
+
+# Sequence number and send time (ns) at the start of every payload
+HEADER = struct.Struct(">QQ")
+SERVER_ID = b"server"
+PORTS = count(5700)
+
+
+def endpoint(transport: str, name: str) -> str:
+    """
+    Build a fresh endpoint for a transport.
+    """
+    match transport:
+        case "inproc":
+            return f"inproc://bench-{name}"
+        case "ipc":
+            return f"ipc://{tempfile.gettempdir()}/zmq-bench-{name}"
+        case _:
+            return f"tcp://127.0.0.1:{next(PORTS)}"
+
+
+def remove_ipc(*endpoints: Any) -> None:
+    """
+    Delete the socket files of `ipc://` endpoints (libzmq leaves them behind
+    when a bound socket is not closed cleanly, e.g. a terminated worker).
+    """
+    for address in endpoints:
+        if address and address.startswith("ipc://"):
+            try:
+                os.unlink(address[len("ipc://") :])
+            except FileNotFoundError:
+                pass
+
+
+def make_payload(seq: int, size: int) -> bytes:
+    """
+    Timestamped payload of `size` bytes (at least the header).
+    """
+    header = HEADER.pack(seq, time.monotonic_ns())
+    return header + bytes(max(0, size - HEADER.size))
+
+
+def latency_ns(payload: Any) -> int:
+    """
+    Nanoseconds since the payload was built.
+    """
+    return time.monotonic_ns() - HEADER.unpack_from(payload)[1]
+
+
+# Server
+class Echo:
+    """
+    Echo server for one pattern, driven by `AbstractWorker.run()`.
+    """
+
+    socket: Any = None
+    reply: Any = None
+    poller: Any = None
+
+    def on_event(self, event_type: str):
+        """Run Event"""
+        pass
+
+    def run(self):
+        """Run Worker (and close the sockets from the worker itself)"""
+        try:
+            super().run()
+        finally:
+            for socket in {self.socket, self.reply} - {None}:
+                socket.close(linger=0)
+
+    def setup(self):
+        opts = self.options
+        context = zmq.Context.instance()
+        kind = PATTERNS[opts.pattern][1]
+        self.socket = context.socket(kind)
+        if kind == zmq.ROUTER and opts.pattern == "router-router":
+            self.socket.setsockopt(zmq.ROUTING_ID, SERVER_ID)
+        if kind == zmq.SUB:
+            self.socket.setsockopt(zmq.SUBSCRIBE, b"")
+        self.socket.bind(opts.endpoint)
+        self.reply = self.socket
+        if opts.pattern in ONE_WAY:
+            self.reply = context.socket(zmq.PUSH)
+            self.reply.connect(opts.reply_endpoint)
+        self.poller = zmq.Poller()
+        self.poller.register(self.socket, zmq.POLLIN)
+
+    def server(self):
+        if self.socket is None:
+            self.setup()
+        # Short poll so the stop event is checked regularly
+        if not self.poller.poll(100):
+            return
+        while True:
+            try:
+                frames = self.socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                return
+            self.reply.send_multipart(frames)
+
+
+class EchoThread(Echo, BaseThread):
+    pass
+
+
+class EchoProcess(Echo, BaseProcess):
+    pass
+
+
+WORKERS = {"thread": EchoThread, "process": EchoProcess}
+
+
+# Client
+class Lane:
+    """
+    One client socket plus how to frame a payload for the pattern.
+    """
+
+    def __init__(self, context: Any, pattern: str, send_endpoint: str, reply: Any):
+        kind = PATTERNS[pattern][0]
+        self.pattern = pattern
+        self.socket = context.socket(kind)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        if pattern == "router-router":
+            self.socket.setsockopt(zmq.ROUTER_MANDATORY, 1)
+        self.socket.connect(send_endpoint)
+        self.recv_socket = reply if reply is not None else self.socket
+
+    def frames(self, payload: bytes) -> list[bytes]:
+        match self.pattern:
+            case "dealer-rep":
+                return [b"", payload]
+            case "router-router":
+                return [SERVER_ID, payload]
+            case _:
+                return [payload]
+
+    def close(self):
+        self.socket.close()
+
+
+def open_lanes(context: Any, pattern: str, transport: str, concurrency: int):
+    """
+    Create the client lanes; `REQ` needs one socket per in-flight message.
+    """
+    name = f"{pattern}-{os.getpid()}-{next(PORTS)}"
+    send_endpoint = endpoint(transport, name)
+    reply_endpoint = reply = None
+    if pattern in ONE_WAY:
+        reply_endpoint = endpoint(transport, f"{name}-reply")
+        reply = context.socket(zmq.PULL)
+        reply.setsockopt(zmq.LINGER, 0)
+        reply.bind(reply_endpoint)
+    sockets = concurrency if pattern.startswith("req") else 1
+    lanes = [Lane(context, pattern, send_endpoint, reply) for _ in range(sockets)]
+    return lanes, send_endpoint, reply_endpoint, reply
+
+
+def warmup(lanes: list[Lane], size: int):
+    """
+    Send probes until the server echoes, then drop any extra replies.
+    """
+    lane = lanes[0]
+    poller = zmq.Poller()
+    poller.register(lane.recv_socket, zmq.POLLIN)
+    while True:
+        try:
+            lane.socket.send_multipart(lane.frames(make_payload(0, size)))
+        except zmq.ZMQError:
+            # `ROUTER_MANDATORY` before the server is connected
+            time.sleep(0.05)
+            continue
+        # `REQ` must wait for its reply; others just probe again
+        if lane.pattern.startswith("req") or poller.poll(50):
+            lane.recv_socket.recv_multipart()
+            break
+    time.sleep(0.05)
+    while poller.poll(0):
+        lane.recv_socket.recv_multipart()
+
+
+def run_sync(lanes: list[Lane], size: int, messages: int, concurrency: int):
+    """
+    Keep `concurrency` messages in flight until `messages` replies arrive.
+    """
+    latencies: list[int] = []
+    sent = 0
+    poller = zmq.Poller()
+    owners: dict[Any, Lane] = {}
+    for lane in lanes:
+        owners[lane.recv_socket] = lane
+        poller.register(lane.recv_socket, zmq.POLLIN)
+    for index in range(min(concurrency, messages)):
+        lane = lanes[index % len(lanes)]
+        lane.socket.send_multipart(lane.frames(make_payload(sent, size)))
+        sent += 1
+
+    while len(latencies) < messages:
+        for socket, _ in poller.poll():
+            lane = owners[socket]
+            while True:
+                try:
+                    frames = socket.recv_multipart(zmq.NOBLOCK)
+                except zmq.Again:
+                    break
+                latencies.append(latency_ns(frames[-1]))
+                if sent < messages:
+                    lane.socket.send_multipart(lane.frames(make_payload(sent, size)))
+                    sent += 1
+                if lane.pattern.startswith("req"):
+                    break
+    return latencies
+
+
+async def run_async(lanes: list[Lane], size: int, messages: int, concurrency: int):
+    """
+    Run `concurrency` tasks, each doing send → recv until `messages` replies.
+    """
+    latencies: list[int] = []
+    seq = count()
+
+    async def task(lane: Lane):
+        while next(seq) < messages:
+            await lane.socket.send_multipart(lane.frames(make_payload(0, size)))
+            frames = await lane.recv_socket.recv_multipart()
+            latencies.append(latency_ns(frames[-1]))
+
+    await asyncio.gather(*(task(lanes[i % len(lanes)]) for i in range(concurrency)))
+    return latencies
+
+
+def percentile(values: list[int], q: float) -> float:
+    """
+    Nearest-rank percentile in microseconds (`values` must be sorted).
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))] / 1000
+
+
+def bench(
+    pattern: str,
+    size: int,
+    concurrency: int,
+    transport: str,
+    context_type: str,
+    worker_model: str,
+    messages: int,
+) -> dict[str, Any]:
+    """
+    Run one combination and return its result row.
+    """
+    sync_context = zmq.Context.instance()
+    lanes, send_endpoint, reply_endpoint, reply = open_lanes(
+        sync_context, pattern, transport, concurrency
+    )
+    worker = WORKERS[worker_model](
+        pattern=pattern, endpoint=send_endpoint, reply_endpoint=reply_endpoint
+    )
+    worker.start()
+    try:
+        warmup(lanes, size)
+        started = time.perf_counter()
+        if context_type == "sync":
+            latencies = run_sync(lanes, size, messages, concurrency)
+        else:
+            # Shadow the sync sockets so `inproc://` keeps working
+            async_reply = reply and zmq.asyncio.Socket.from_socket(reply)
+            for lane in lanes:
+                lane.socket = zmq.asyncio.Socket.from_socket(lane.socket)
+                lane.recv_socket = async_reply or lane.socket
+            latencies = asyncio.run(run_async(lanes, size, messages, concurrency))
+        elapsed = time.perf_counter() - started
+    finally:
+        worker.stop()
+        worker.join(5)
+        if hasattr(worker, "terminate") and worker.is_alive():
+            worker.terminate()
+        for lane in lanes:
+            lane.close()
+        if reply is not None:
+            reply.close()
+        remove_ipc(send_endpoint, reply_endpoint)
+
+    latencies.sort()
+    return {
+        "pattern": pattern,
+        "size": size,
+        "concurrency": concurrency,
+        "transport": transport,
+        "context": context_type,
+        "worker": worker_model,
+        "messages": len(latencies),
+        "seconds": round(elapsed, 6),
+        "msgs_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_us": percentile(latencies, 0.50),
+        "p99_us": percentile(latencies, 0.99),
+        "p999_us": percentile(latencies, 0.999),
+    }
+
+
+def supported(transport: str, worker_model: str) -> bool:
+    """
+    `inproc://` needs a shared context (threads only); `ipc://` is POSIX only.
+    """
+    if transport == "inproc":
+        return worker_model == "thread"
+    if transport == "ipc":
+        return os.name != "nt"
+    return True
+
+
+def csv(kind: Any):
+    return lambda text: [kind(item) for item in text.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patterns", type=csv(str), default=list(PATTERNS))
+    parser.add_argument("--sizes", type=csv(int), default=[64, 4096, 65536])
+    parser.add_argument("--concurrency", type=csv(int), default=[1, 16])
+    parser.add_argument("--transports", type=csv(str), default=["inproc", "ipc", "tcp"])
+    parser.add_argument("--contexts", type=csv(str), default=["sync", "async"])
+    parser.add_argument("--workers", type=csv(str), default=["thread", "process"])
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--output", default="results.json")
+    args = parser.parse_args()
+
+    # Loop Policy
+    if os.name == "nt":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    results = []
+    sweep = product(
+        args.patterns,
+        args.sizes,
+        args.concurrency,
+        args.transports,
+        args.contexts,
+        args.workers,
+    )
+    for pattern, size, concurrency, transport, context_type, worker_model in sweep:
+        if not supported(transport, worker_model):
+            continue
+        row = bench(
+            pattern,
+            size,
+            concurrency,
+            transport,
+            context_type,
+            worker_model,
+            args.messages,
+        )
+        results.append(row)
+        print(
+            f"{pattern:<14} {size:>7}B x{concurrency:<3} {transport:<6} "
+            f"{context_type:<5} {worker_model:<7} {row['msgs_per_sec']:>10.0f} msg/s  "
+            f"p50 {row['p50_us']:.0f}us  p99 {row['p99_us']:.0f}us  "
+            f"p999 {row['p999_us']:.0f}us"
+        )
+
+    report = {
+        "pyzmq": zmq.__version__,
+        "libzmq": zmq.zmq_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,17 @@
+from functools import partial
 from pathlib import Path
 from types import SimpleNamespace
-import asyncio
 import logging
 import multiprocessing
-import os
 import sys
-import time
 
 # ZMQ
-import zmq.asyncio
 import zmq.auth
 
+# Package
+from devices.launcher import serve
+from devices.ports import multi_server
+
 
 def get_certs():
     # Base directory (directory of the current script)
@@ -43,60 +44,37 @@ def get_certs():
     )
 
 
-async def server(port):
-    certs = get_certs()
-
-    # Server
-    context = zmq.asyncio.Context()
-    socket = context.socket(zmq.REP)
-
+def secure(socket, certs):
     # Certificate
     server_public, server_secret = certs.load_certificate("server.secret")
     socket.curve_publickey = "2x.Y>2(J]I:$7i+CS<BVZMJyXEX)H8?31k5o)?mQ".encode("utf-8")
     socket.curve_secretkey = "B.)wGr$@cYiy(<$ES*$pZ3UmIPEIy+lt1qNY!!Kn".encode("utf-8")
     socket.curve_server = True  # must come before bind
 
-    # Bind
-    socket.bind(f"tcp://*:{port}")
 
-    print(f"Server running on port {port}")
-
-    while True:
-        message = await socket.recv()
+def port_handler(port):
+    async def handler(message):
         print(f"Received request on port {port}: {message.decode('utf-8')}")
-        reply = b"World"
-        await socket.send(reply)
+        return b"World"
+
+    return handler
 
 
-def start_server(port):
-    # Loop Policy
-    if os.name == "nt":
-        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+async def server(ports):
+    certs = get_certs()
 
-    # Run Server
-    asyncio.run(server(port))
+    # One process serves `ports`, one task per port (CURVE set up before bind)
+    handlers = {port: port_handler(port) for port in ports}
+    await multi_server(ports, handlers=handlers, setup=partial(secure, certs=certs))
 
 
-def main(shutdown_event):
+def main(shutdown_event, shards: int = 0):
     ports = [5555]  # , 5556, 5557
-    processes = []
-
-    # Starting Servers. . .
-    for port in ports:
-        process = multiprocessing.Process(target=start_server, args=(port,))
-        process.start()
-        processes.append(process)
-
-    try:
-        while not shutdown_event.is_set():
-            time.sleep(1)
-    except KeyboardInterrupt:
-        shutdown_event.set()
-
-    # Stopping Servers. . .
-    for process in processes:
-        process.terminate()
-        process.join()
+
+    # Servers (one supervised process per port unless `shards` is given)
+    shards = min(shards or len(ports), len(ports))
+    shard_ports = [(ports[shard::shards],) for shard in range(shards)]
+    serve(server, shard_ports, shutdown_event)
 
     sys.exit(0)
 
@@ -1,56 +1,35 @@
-import asyncio
 import multiprocessing
-import time
 import sys
-import os
 
-# ZMQ
-import zmq.asyncio
+# Package
+from devices.launcher import serve
+from devices.ports import multi_server
 
 
-async def server(port):
-    context = zmq.asyncio.Context()
-    socket = context.socket(zmq.REP)
-    socket.bind(f"tcp://*:{port}")
-
-    print(f"Server running on port {port}")
-
-    while True:
-        message = await socket.recv()
+def port_handler(port, cache=None):
+    async def handler(message):
         print(f"Received request on port {port}: {message.decode('utf-8')}")
-        reply = b"World"
-        await socket.send(reply)
+        return b"World"
 
+    # Optional `devices.cache.ResponseCache` (repeated requests skip the handler)
+    if cache is not None:
+        handler = cache.wrap(handler)
+    return handler
 
-def start_server(port):
-    # Loop Policy
-    if os.name == "nt":
-        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-    # Run Server
-    asyncio.run(server(port))
+async def server(ports, cache=None):
+    # One process serves `ports`, one task per port (`cache` is shared by them)
+    handlers = {port: port_handler(port, cache) for port in ports}
+    await multi_server(ports, handlers=handlers)
 
 
-def main(shutdown_event):
+def main(shutdown_event, shards: int = 0, cache=None):
     ports = [5555, 5556, 5557]
-    processes = []
-
-    # Starting Servers. . .
-    for port in ports:
-        process = multiprocessing.Process(target=start_server, args=(port,))
-        process.start()
-        processes.append(process)
-
-    try:
-        while not shutdown_event.is_set():
-            time.sleep(1)
-    except KeyboardInterrupt:
-        shutdown_event.set()
-
-    # Stopping Servers. . .
-    for process in processes:
-        process.terminate()
-        process.join()
+
+    # Servers (one supervised process per port unless `shards` is given)
+    shards = min(shards or len(ports), len(ports))
+    shard_ports = [(ports[shard::shards], cache) for shard in range(shards)]
+    serve(server, shard_ports, shutdown_event)
 
     sys.exit(0)
 
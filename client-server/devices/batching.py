@@ -0,0 +1,265 @@
+# Python
+from collections import deque
+from typing import Any, Literal, Optional
+import struct
+import threading
+import time
+
+# ZMQ
+import zmq
+
+# Package
+from zerocopy import nbytes
+
+# Batch layouts
+MULTIPART = b"m"  # [topic, MULTIPART, *messages]
+PACKED = b"p"  # [topic, PACKED, (length + message)...]
+
+LENGTH = struct.Struct(">I")
+
+
+class BatchSender:
+    """
+    Coalesce messages into one multipart send per batch (`PUB` / `PUSH`).
+
+    A batch is sent once it reaches `max_count` messages or `max_bytes`, or
+    once it is older than `max_delay` seconds. Messages are batched per topic
+    so `SUB` prefix filtering keeps working.
+
+    With `timer` a daemon thread sends batches as they come due, so a quiet
+    topic does not hold a partial batch; without it, call `tick()` (e.g.
+    every `timeout()` seconds from a poll loop). The socket is only used
+    under a lock, so the timer thread and the caller never send at once;
+    don't use the socket directly while the sender is open.
+
+    When the socket is at its `SNDHWM` the `policy` decides what happens:
+        - `block`   wait until the batch can be sent (honours `SNDTIMEO`); on
+                    `zmq.Again` the batch is kept and retried first
+        - `drop`    discard the batch and count it in `dropped`
+        - `spill`   keep up to `max_spill` batches in memory and retry them first
+
+    Note that `PUB` sockets never report `SNDHWM`; they drop silently.
+    For use with the sync context. Call `close()` before closing the socket.
+    """
+
+    def __init__(
+        self,
+        socket: Any,
+        max_count: int = 1000,
+        max_bytes: int = 1 << 20,
+        max_delay: float = 0.005,
+        packed: bool = False,
+        policy: Literal["block", "drop", "spill"] = "block",
+        max_spill: int = 1000,
+        timer: bool = True,
+    ):
+        """
+        Initialize a BatchSender.
+
+        Args:
+            socket (Any): A sync `PUB` or `PUSH` socket.
+            max_count (int): Messages per batch.
+            max_bytes (int): Bytes per batch.
+            max_delay (float): Seconds a batch may wait for more messages.
+            packed (bool): Send one length-prefixed frame instead of one frame
+                per message.
+            policy (str): What to do at the high-water mark.
+            max_spill (int): Batches kept by the `spill` policy (and by
+                `block` after a send timeout).
+            timer (bool): Send due batches from a background thread.
+        """
+        self.socket = socket
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.packed = packed
+        self.policy = policy
+        self.spill: deque[tuple[list[Any], int]] = deque(maxlen=max_spill)
+        self.sent = 0
+        self.dropped = 0
+        self.__batches: dict[bytes, list[Any]] = {}
+        self.__sizes: dict[bytes, int] = {}
+        self.__started: dict[bytes, float] = {}
+        self.__retried = time.monotonic()
+        self.__lock = threading.RLock()
+        self.__wakeup = threading.Condition(self.__lock)
+        self.__closed = False
+        self.__timer = None
+        if timer:
+            self.__timer = threading.Thread(target=self.__run, daemon=True)
+            self.__timer.start()
+
+    def add(self, message: Any, topic: bytes = b"") -> None:
+        """
+        Queue a message, sending its batch when a limit is reached.
+        """
+        with self.__lock:
+            batch = self.__batches.get(topic)
+            if batch is None:
+                batch = self.__batches[topic] = []
+                self.__sizes[topic] = 0
+                self.__started[topic] = time.monotonic()
+                self.__wakeup.notify()
+            batch.append(message)
+            self.__sizes[topic] += nbytes(message)
+
+            if (
+                len(batch) >= self.max_count
+                or self.__sizes[topic] >= self.max_bytes
+                or time.monotonic() - self.__started[topic] >= self.max_delay
+            ):
+                self.flush(topic)
+
+    def tick(self) -> None:
+        """
+        Send batches older than `max_delay` and retry spilled batches.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__retried = now
+            for topic, started in list(self.__started.items()):
+                if now - started >= self.max_delay:
+                    self.flush(topic)
+            self.__drain()
+
+    def timeout(self) -> Optional[float]:
+        """
+        Seconds until `tick()` has work (`None` while nothing is pending).
+        """
+        with self.__lock:
+            deadlines = [
+                started + self.max_delay for started in self.__started.values()
+            ]
+            if self.spill:
+                deadlines.append(self.__retried + self.max_delay)
+            if not deadlines:
+                return None
+            return max(0.0, min(deadlines) - time.monotonic())
+
+    def flush(self, topic: Optional[bytes] = None) -> None:
+        """
+        Send one topic's batch (or every batch) now.
+        """
+        with self.__lock:
+            topics = list(self.__batches) if topic is None else [topic]
+            for name in topics:
+                batch = self.__batches.pop(name, None)
+                self.__sizes.pop(name, None)
+                self.__started.pop(name, None)
+                if batch:
+                    self.__send(self.__frames(name, batch), len(batch))
+
+    def close(self) -> None:
+        """
+        Stop the timer and flush everything, blocking on spilled batches.
+
+        Raises:
+            zmq.Again: When `SNDTIMEO` expires (the batches stay queued).
+        """
+        with self.__wakeup:
+            self.__closed = True
+            self.__wakeup.notify()
+        if self.__timer is not None:
+            self.__timer.join()
+        with self.__lock:
+            self.flush()
+            self.__drain(block=True)
+
+    def __run(self) -> None:
+        """
+        Timer thread: `tick()` whenever a batch (or a spilled one) is due.
+        """
+        with self.__wakeup:
+            while not self.__closed:
+                timeout = self.timeout()
+                if timeout is None or timeout > 0:
+                    self.__wakeup.wait(timeout)
+                    continue
+                try:
+                    self.tick()
+                except zmq.Again:
+                    # `block` timed out: the batch is kept and retried later
+                    pass
+
+    def __frames(self, topic: bytes, batch: list[Any]) -> list[Any]:
+        """
+        Build the wire frames for a batch.
+        """
+        if not self.packed:
+            return [topic, MULTIPART, *batch]
+        parts = []
+        for message in batch:
+            parts.append(LENGTH.pack(nbytes(message)))
+            parts.append(message)
+        return [topic, PACKED, b"".join(parts)]
+
+    def __send(self, frames: list[Any], count: int) -> None:
+        """
+        Send a batch, applying the high-water-mark policy.
+        """
+        if self.policy == "block":
+            # Queued first so a send timeout (`zmq.Again`) keeps the batch
+            self.__spill(frames, count)
+            self.__drain(block=True)
+            return
+        if self.policy == "spill" and not self.__drain():
+            self.__spill(frames, count)
+            return
+        try:
+            self.socket.send_multipart(frames, flags=zmq.NOBLOCK)
+        except zmq.Again:
+            match self.policy:
+                case "drop":
+                    self.dropped += count
+                case "spill":
+                    self.__spill(frames, count)
+            return
+        self.sent += count
+
+    def __spill(self, frames: list[Any], count: int) -> None:
+        """
+        Keep a batch for later, dropping the oldest when the spill is full.
+        """
+        if len(self.spill) == self.spill.maxlen:
+            self.dropped += self.spill[0][1]
+        self.spill.append((frames, count))
+
+    def __drain(self, block: bool = False) -> bool:
+        """
+        Retry spilled batches in order. Returns `True` once the spill is empty.
+
+        Raises:
+            zmq.Again: With `block`, when `SNDTIMEO` expires.
+        """
+        flags = 0 if block else zmq.NOBLOCK
+        while self.spill:
+            frames, count = self.spill[0]
+            try:
+                self.socket.send_multipart(frames, flags=flags)
+            except zmq.Again:
+                if block:
+                    raise
+                return False
+            self.spill.popleft()
+            self.sent += count
+        return True
+
+
+def unbatch(frames: list[Any]) -> tuple[bytes, list[Any]]:
+    """
+    Split a batch sent by `BatchSender` into `(topic, messages)`.
+
+    Packed messages are returned as `memoryview` slices of the received frame.
+    """
+    topic, layout, *rest = frames
+    if bytes(layout) != PACKED:
+        return bytes(topic), rest
+    data = memoryview(rest[0])
+    messages = []
+    offset = 0
+    while offset < len(data):
+        (size,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        messages.append(data[offset : offset + size])
+        offset += size
+    return bytes(topic), messages
@@ -0,0 +1,490 @@
+# Python
+from collections import deque
+from typing import Any, Awaitable, Callable
+import asyncio
+import logging
+import threading
+import time
+
+# ZMQ
+import zmq
+
+# Package
+from reliable import Deduplicator, error_reply, request_key
+from serializers import SAFE_CODECS, dumps, peek
+from zerocopy import send_options, split_envelope, view
+
+# Worker -> Broker commands
+READY = b"\x01"
+REPLY = b"\x02"
+# Either direction
+HEARTBEAT = b"\x03"
+# Worker -> Broker: unregister; Broker -> Worker: nothing pending anymore
+DISCONNECT = b"\x04"
+
+
+class LoadBalancer:
+    """
+    Load-balancing broker (least-recently-used worker queue).
+
+    Workers announce themselves with `[READY, credit]` and get at most `credit`
+    requests at a time. Each `[REPLY, *envelope, payload]` gives one credit back.
+    Requests wait in the broker (up to `max_queue`, then in the frontend
+    socket) until a worker has credit, instead of queueing behind a slow
+    worker. `queue_depth` and `in_flight` count the waiting and the
+    unanswered requests; with `stats` (`metrics.DeviceStats`) they are
+    published on the metrics endpoint, where an `Autoscaler` reads them.
+
+    Every `heartbeat_interval` seconds the broker sends `[HEARTBEAT]` to each
+    worker, and workers answer each one, so only the broker sets the pace.
+    A worker that has sent nothing for `liveness` intervals is evicted and its
+    unanswered requests are rerouted to the other workers. A late reply from
+    an evicted worker is only forwarded while its request still waits to be
+    rerouted (which is then dropped); otherwise the client already has, or is
+    about to get, the answer of another worker, and the stale reply is
+    dropped. An evicted worker stops receiving heartbeats and re-registers
+    with `READY`. Liveness is checked when heartbeats go out, not on every
+    message.
+
+    Each poll reads a ready socket until it is empty (`zmq.Again`), so a
+    burst is handled in one pass instead of one message per poll.
+
+    A worker leaving on purpose sends `[DISCONNECT]`: it gets no new requests,
+    and once it has answered everything it was sent the broker replies
+    `[DISCONNECT]` and forgets it.
+
+    Mirrors the `ThreadDevice` API (`bind_in`, `bind_out`, `start`).
+    """
+
+    def __init__(
+        self,
+        poll_interval: int = 100,
+        heartbeat_interval: float = 1.0,
+        liveness: int = 3,
+        max_queue: int = 1000,
+    ):
+        """
+        Initialize a LoadBalancer.
+
+        Args:
+            poll_interval (int): Milliseconds between checks of the stop flag.
+            heartbeat_interval (float): Seconds between heartbeats (0 disables).
+            liveness (int): Missed intervals before a worker is evicted.
+            max_queue (int): Requests read from clients while no worker is free.
+        """
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.liveness = liveness
+        self.max_queue = max_queue
+        self.stats: Any = None  # `metrics.DeviceStats`
+        self.credits: dict[bytes, int] = {}
+        self.in_flight = 0  # Requests sent to workers and not yet replied
+        self.evicted = 0
+        self.__available: deque[bytes] = deque()
+        self.__last_seen: dict[bytes, float] = {}
+        self.__pending: dict[bytes, dict[tuple, list[bytes]]] = {}
+        self.__waiting: deque[list[bytes]] = deque()
+        self.__requeue: deque[list[bytes]] = deque()
+        self.__leaving: set[bytes] = set()
+        self.__next_heartbeat = 0.0
+        self.__binds_in: list[str] = []
+        self.__binds_out: list[str] = []
+        self.__stop_event = threading.Event()
+        self.__thread = threading.Thread(target=self.run, daemon=True)
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for a worker (rerouted ones included)."""
+        return len(self.__waiting) + len(self.__requeue)
+
+    def bind_in(self, addr: str) -> None:
+        """Bind the frontend (clients) `ROUTER`."""
+        self.__binds_in.append(addr)
+
+    def bind_out(self, addr: str) -> None:
+        """Bind the backend (workers) `ROUTER`."""
+        self.__binds_out.append(addr)
+
+    def start(self) -> None:
+        """Start the broker thread."""
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stop the broker thread."""
+        self.__stop_event.set()
+        self.__thread.join()
+
+    def join(self, timeout: float | None = None) -> None:
+        self.__thread.join(timeout)
+
+    def run(self) -> None:
+        """
+        Route client requests to the least-recently-used worker with credit.
+        """
+        context = zmq.Context.instance()
+        frontend = context.socket(zmq.ROUTER)
+        backend = context.socket(zmq.ROUTER)
+        for addr in self.__binds_in:
+            frontend.bind(addr)
+        for addr in self.__binds_out:
+            backend.bind(addr)
+
+        poller = zmq.Poller()
+        poller.register(backend, zmq.POLLIN)
+        try:
+            while not self.__stop_event.is_set():
+                # Read clients until `max_queue` requests wait for a worker
+                reading = len(self.__waiting) < self.max_queue
+                poller.register(frontend, zmq.POLLIN if reading else 0)
+                events = dict(poller.poll(self.poll_interval))
+
+                while backend in events:
+                    try:
+                        frames = backend.recv_multipart(zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    self.__on_worker(frames, frontend, backend)
+
+                while frontend in events and len(self.__waiting) < self.max_queue:
+                    try:
+                        request = frontend.recv_multipart(zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    self.__waiting.append(request)
+                    if self.stats:
+                        self.stats.forwarded_in += 1
+
+                # Rerouted requests go first
+                while self.__available and (self.__requeue or self.__waiting):
+                    queue = self.__requeue or self.__waiting
+                    self.__dispatch(backend, queue.popleft())
+
+                if self.heartbeat_interval:
+                    self.__heartbeat(backend)
+
+                if self.stats:
+                    self.stats.queue_depth = self.queue_depth
+                    self.stats.in_flight = self.in_flight
+        finally:
+            frontend.close(linger=0)
+            backend.close(linger=0)
+
+    def __dispatch(self, backend: Any, request: list[bytes]) -> None:
+        """
+        Send a client request to the next worker and remember it until replied.
+        """
+        worker = self.__checkout()
+        backend.send_multipart([worker, *request])
+        envelope, _ = split_envelope(request)
+        self.__pending.setdefault(worker, {})[tuple(envelope)] = request
+        self.in_flight += 1
+
+    def __on_worker(self, frames: list[bytes], frontend: Any, backend: Any) -> None:
+        """
+        Handle `READY`, `REPLY`, `HEARTBEAT` and `DISCONNECT` from a worker.
+        """
+        worker, command, *rest = frames
+        known = worker in self.credits
+        if known:
+            self.__last_seen[worker] = time.monotonic()
+
+        if command == READY:
+            credit = int(rest[0]) if rest else 1
+            self.__leaving.discard(worker)
+            self.__last_seen[worker] = time.monotonic()
+            self.__grant(worker, credit - self.credits.get(worker, 0))
+        elif command == REPLY:
+            envelope, _ = split_envelope(rest)
+            if self.__pending.get(worker, {}).pop(tuple(envelope), None):
+                self.in_flight -= 1
+            elif not self.__unqueue(tuple(envelope)):
+                logging.debug(f"Dropped a stale reply from worker {worker!r}")
+                return
+            frontend.send_multipart(rest)
+            if self.stats:
+                self.stats.forwarded_out += 1
+            if worker in self.__leaving:
+                self.__release(backend, worker)
+            elif known:
+                # Evicted workers get no credit until they send `READY` again
+                self.__grant(worker, 1)
+        elif command == DISCONNECT:
+            if known:
+                self.__leaving.add(worker)
+                self.__grant(worker, -self.credits[worker])
+            self.__release(backend, worker)
+        elif command != HEARTBEAT:
+            logging.warning(f"Unknown worker command: {command!r}")
+
+    def __heartbeat(self, backend: Any) -> None:
+        """
+        When due, evict the workers that went silent and heartbeat the others.
+        """
+        now = time.monotonic()
+        if now < self.__next_heartbeat:
+            return
+        self.__next_heartbeat = now + self.heartbeat_interval
+
+        expiry = self.heartbeat_interval * self.liveness
+        for worker, seen in list(self.__last_seen.items()):
+            if now - seen > expiry:
+                self.__evict(worker)
+        for worker in self.__last_seen:
+            backend.send_multipart([worker, HEARTBEAT])
+
+    def __unqueue(self, envelope: tuple) -> bool:
+        """
+        Drop a request waiting to be rerouted. Returns `False` if there is none.
+        """
+        for request in self.__requeue:
+            if tuple(split_envelope(request)[0]) == envelope:
+                self.__requeue.remove(request)
+                return True
+        return False
+
+    def __release(self, backend: Any, worker: bytes) -> None:
+        """
+        Let a leaving worker go once nothing is pending for it.
+        """
+        if self.__pending.get(worker):
+            return
+        self.__pending.pop(worker, None)
+        self.__last_seen.pop(worker, None)
+        self.credits.pop(worker, None)
+        self.__leaving.discard(worker)
+        backend.send_multipart([worker, DISCONNECT])
+
+    def __evict(self, worker: bytes) -> None:
+        """
+        Forget a dead worker and reroute its unanswered requests.
+        """
+        pending = self.__pending.pop(worker, {})
+        del self.__last_seen[worker]
+        del self.credits[worker]
+        if worker in self.__available:
+            self.__available.remove(worker)
+        self.__leaving.discard(worker)
+        self.__requeue.extend(pending.values())
+        self.in_flight -= len(pending)
+        self.evicted += 1
+        logging.warning(
+            f"Worker {worker!r} missed {self.liveness} heartbeats, "
+            f"rerouting {len(pending)} requests"
+        )
+
+    def __grant(self, worker: bytes, credit: int) -> None:
+        """
+        Add credit to a worker, queueing it if it was out of credit.
+        """
+        before = self.credits.get(worker, 0)
+        self.credits[worker] = before + credit
+        if before <= 0 < self.credits[worker]:
+            self.__available.append(worker)
+        elif self.credits[worker] <= 0 < before:
+            self.__available.remove(worker)
+
+    def __checkout(self) -> bytes:
+        """
+        Take one credit from the least-recently-used worker.
+        """
+        worker = self.__available.popleft()
+        self.credits[worker] -= 1
+        if self.credits[worker] > 0:
+            self.__available.append(worker)
+        return worker
+
+
+class BrokerWorker:
+    """
+    Async `DEALER` worker for the `LoadBalancer`.
+
+    The worker answers every broker `HEARTBEAT` and takes the broker's
+    interval from them, so the two never disagree: with heartbeats disabled on
+    the broker, the worker never reconnects for silence.
+
+    When the handler raises, the client gets `[ERROR, message]` instead of a
+    reply (`reliable.check_reply()` turns it into a `RuntimeError`).
+
+    Shut down with `drain()` rather than `close()`, so the broker stops
+    routing to the worker before its socket goes away.
+    """
+
+    def __init__(
+        self,
+        context: Any,
+        endpoint: str,
+        credit: int = 1,
+        zero_copy: bool = False,
+        copy_threshold: int = zmq.COPY_THRESHOLD,
+        objects: bool = False,
+        liveness: int = 3,
+        dedup: int = 0,
+        codecs: tuple[str, ...] = SAFE_CODECS,
+    ):
+        """
+        Initialize a BrokerWorker.
+
+        Args:
+            context (Any): A `zmq.asyncio` context.
+            endpoint (str): The broker backend address.
+            credit (int): Requests this worker accepts at a time (prefetch).
+            zero_copy (bool): Pass `memoryview`s to the handler and send large
+                replies without copying.
+            copy_threshold (int): Replies below this size are still copied.
+            objects (bool): Decode requests and encode replies (`serializers`).
+                Requests are only decoded with `codecs`; never allow `pickle`
+                for untrusted clients, unpickling runs their code.
+            liveness (int): Missed broker heartbeats before reconnecting.
+            dedup (int): Replies remembered for duplicate requests (0 disables).
+            codecs (tuple): Codec names accepted with `objects`.
+        """
+        self.context = context
+        self.endpoint = endpoint
+        self.credit = credit
+        self.zero_copy = zero_copy
+        self.copy_threshold = copy_threshold
+        self.objects = objects
+        self.codecs = codecs
+        self.heartbeat_interval: float | None = None  # Learnt from the broker
+        self.liveness = liveness
+        self.dedup = Deduplicator(dedup) if dedup else None
+        self.socket: Any = None
+        self.reconnects = 0
+        self.__tasks: set[asyncio.Task] = set()
+        self.__last_heartbeat: float | None = None
+        self.__handler: Callable | None = None
+        self.__draining = False
+
+    async def start(self) -> None:
+        """
+        Connect and tell the broker how many requests to send.
+        """
+        self.socket = self.context.socket(zmq.DEALER)
+        self.socket.copy_threshold = self.copy_threshold
+        self.socket.connect(self.endpoint)
+        self.heartbeat_interval = self.__last_heartbeat = None
+        await self.socket.send_multipart([READY, str(self.credit).encode("utf-8")])
+
+    async def serve(self, handler: Callable[[bytes], Awaitable[bytes]]) -> None:
+        """
+        Run `handler` for every request, up to `credit` at a time.
+
+        Reconnects when the broker has been silent for `liveness` of its
+        heartbeat intervals.
+        """
+        self.__handler = handler
+        while not self.__draining:
+            timeout = None
+            if self.heartbeat_interval:
+                timeout = self.heartbeat_interval * self.liveness * 1000
+            if not await self.socket.poll(timeout):
+                logging.warning("Broker is silent, reconnecting")
+                await self.__reconnect()
+                continue
+            await self.__receive(
+                await self.socket.recv_multipart(copy=not self.zero_copy)
+            )
+
+    async def drain(self, timeout: float = 5.0) -> bool:
+        """
+        Unregister from the broker, finish what it sent, then close.
+
+        Sends `DISCONNECT`, keeps handling the requests the broker routed here
+        before it got it, and waits for the broker's `DISCONNECT` (nothing is
+        pending for this worker anymore). Call it once `serve()` has returned or
+        was cancelled (e.g. in a `finally`).
+
+        Returns `False` if the broker did not confirm within `timeout` seconds.
+        """
+        if self.socket is None:
+            return True
+        self.__draining = True
+        await self.socket.send(DISCONNECT)
+        released = False
+        deadline = time.monotonic() + timeout
+        while not released and (left := deadline - time.monotonic()) > 0:
+            if not await self.socket.poll(left * 1000):
+                break
+            frames = await self.socket.recv_multipart(copy=not self.zero_copy)
+            released = len(frames) == 1 and bytes(frames[0]) == DISCONNECT
+            if not released:
+                await self.__receive(frames)
+        if not released:
+            logging.warning("Broker did not confirm the disconnect")
+        await self.close()
+        return released
+
+    async def close(self) -> None:
+        """
+        Wait for in-flight requests, then close the socket.
+        """
+        if self.__tasks:
+            await asyncio.gather(*self.__tasks, return_exceptions=True)
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    async def __receive(self, frames: list[Any]) -> None:
+        """
+        Start handling a request, or answer a heartbeat.
+        """
+        if len(frames) == 1:
+            await self.__heartbeat()
+            return
+        task = asyncio.create_task(self.__handle(self.__handler, frames))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    async def __handle(self, handler: Callable, frames: list[Any]) -> None:
+        """
+        Reply through the broker, which also returns the credit.
+        """
+        envelope, body = split_envelope(frames)
+        body = [view(frame) for frame in body]
+        try:
+            key = self.dedup and request_key(envelope)
+            if key:
+                reply = await self.dedup.reply(key, lambda: self.__reply(handler, body))
+            else:
+                reply = await self.__reply(handler, body)
+        except Exception as e:
+            logging.exception(e)
+            reply = error_reply(e)
+        await self.socket.send_multipart(
+            [REPLY, *envelope, *reply],
+            **send_options(reply, self.zero_copy, self.copy_threshold),
+        )
+
+    async def __reply(self, handler: Callable, body: list[Any]) -> list[Any]:
+        """
+        Run the handler on a request body and return the reply frames.
+        """
+        if self.objects:
+            codec = peek(body, self.codecs)
+            return dumps(await handler(codec.decode(body[1:])), codec)
+        return [await handler(body[0] if len(body) == 1 else body)]
+
+    async def __heartbeat(self) -> None:
+        """
+        Answer a broker heartbeat and learn the broker's interval from it.
+        """
+        now = time.monotonic()
+        if self.__last_heartbeat is not None:
+            # The longest gap seen, so heartbeats arriving bunched up after a
+            # busy stretch do not shorten the timeout
+            gap = now - self.__last_heartbeat
+            self.heartbeat_interval = max(self.heartbeat_interval or 0.0, gap)
+        self.__last_heartbeat = now
+        await self.socket.send(HEARTBEAT)
+
+    async def __reconnect(self) -> None:
+        """
+        Drop the socket (and anything queued on it) and register again.
+
+        Replies still being computed go out on the new socket; the broker
+        only forwards those whose requests it has not rerouted yet, and only
+        grants credit from the new `READY`.
+        """
+        self.socket.close(linger=0)
+        self.reconnects += 1
+        await self.start()
@@ -0,0 +1,152 @@
+# Python
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+import asyncio
+import time
+
+
+def default_key(request: Any) -> Hashable:
+    """
+    Cache key of a request: its bytes (all frames for a multipart request).
+    """
+    if isinstance(request, (list, tuple)):
+        return tuple(bytes(frame) for frame in request)
+    return bytes(request)
+
+
+def size_of(reply: Any) -> int:
+    """
+    Approximate memory held by a reply.
+    """
+    if isinstance(reply, (list, tuple)):
+        return sum(size_of(frame) for frame in reply)
+    try:
+        return memoryview(reply).nbytes
+    except TypeError:
+        return 64
+
+
+class ResponseCache:
+    """
+    LRU response cache with per-entry TTL for request / reply servers.
+
+    Replies are cached by `key(request)` (the request bytes by default) for
+    `ttl` seconds, within `max_entries` and `max_bytes`. Identical requests
+    arriving while the handler is still running wait for that one call
+    instead of running it again. Failed calls are not cached.
+
+    Only cache handlers whose reply depends on the request alone (reads).
+    Stats are kept in an optional `metrics.CacheStats`.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = 1.0,
+        max_entries: int = 1024,
+        max_bytes: int = 64 << 20,
+        key: Callable[[Any], Hashable] = default_key,
+        stats: Any = None,
+    ):
+        """
+        Initialize a ResponseCache.
+
+        Args:
+            ttl (float): Seconds a reply stays valid (`None` never expires).
+            max_entries (int): Replies kept at most.
+            max_bytes (int): Reply bytes kept at most.
+            key (Callable): Turns a request into a hashable cache key.
+            stats (CacheStats): Hit / miss counters (`None` disables them).
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.key = key
+        self.stats = stats
+        self.nbytes = 0
+        self.__entries: OrderedDict[Hashable, tuple[float, Any, int]] = OrderedDict()
+        self.__running: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    async def get(self, request: Any, compute: Callable[[Any], Awaitable[Any]]) -> Any:
+        """
+        Return the cached reply for `request`, or `await compute(request)`.
+        """
+        key = self.key(request)
+        entry = self.__entries.get(key)
+        if entry is not None:
+            expires, reply, _ = entry
+            if expires > time.monotonic():
+                self.__entries.move_to_end(key)
+                if self.stats:
+                    self.stats.hits += 1
+                return reply
+            self.__discard(key)
+            if self.stats:
+                self.stats.expired += 1
+
+        running = self.__running.get(key)
+        if running is not None:
+            if self.stats:
+                self.stats.coalesced += 1
+            return await asyncio.shield(running)
+
+        if self.stats:
+            self.stats.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.__running[key] = future
+        try:
+            reply = await compute(request)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved, even without waiters
+            raise
+        else:
+            future.set_result(reply)
+            self.put(key, reply)
+            return reply
+        finally:
+            del self.__running[key]
+
+    def wrap(self, handler: Callable[[Any], Awaitable[Any]]) -> Callable:
+        """
+        Cache an async `handler(request) -> reply` (e.g. for `AsyncRouterServer`).
+        """
+
+        async def cached(request: Any) -> Any:
+            return await self.get(request, handler)
+
+        return cached
+
+    def put(self, key: Hashable, reply: Any) -> None:
+        """
+        Store a reply, evicting the least recently used entries to fit.
+        """
+        size = size_of(reply)
+        if size > self.max_bytes:
+            return
+        self.__discard(key)
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        self.__entries[key] = (expires, reply, size)
+        self.nbytes += size
+        while len(self.__entries) > self.max_entries or self.nbytes > self.max_bytes:
+            oldest = next(iter(self.__entries))
+            self.__discard(oldest)
+            if self.stats:
+                self.stats.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Drop one cached reply (by cache key) or all of them.
+        """
+        if key is None:
+            self.__entries.clear()
+            self.nbytes = 0
+        else:
+            self.__discard(key)
+
+    def __discard(self, key: Hashable) -> None:
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[2]
@@ -4,6 +4,7 @@ import asyncio
 
 # Package
 from manager import ZeroMQ
+from rpc import AsyncRPCClient
 
 
 async def client(port: int):
@@ -26,6 +27,28 @@ async def client(port: int):
         print(f"Received reply from port {port}: {reply.decode('utf-8')}")
 
 
+async def pipelined_client(port: int, total: int = 100):
+    # Client Node
+    node = ZeroMQ(mode="frontend", frontend=ZeroMQ.tcp(port))
+
+    async with AsyncRPCClient(node) as rpc:
+        # Requests (all in flight on one socket)
+        replies = await asyncio.gather(
+            *(rpc.request(f"Hello {i}".encode("utf-8")) for i in range(total))
+        )
+        print(f"Received {len(replies)} replies from port {port}")
+
+
+def reliable_client(port: int, hedge: int | None = None):
+    # Client Node (sync context)
+    node = ZeroMQ(mode="frontend", frontend=ZeroMQ.tcp(port), is_sync=True)
+
+    with node.reliable(hedge=hedge and ZeroMQ.tcp(hedge)) as rpc:
+        # Request (retried on timeout, hedged to a second server)
+        reply = rpc.request(b"Hello")
+        print(f"Received reply from port {port}: {bytes(reply).decode('utf-8')}")
+
+
 async def start_clients():
     ports = [5555]
     tasks = [asyncio.create_task(client(port)) for port in ports]
@@ -5,6 +5,10 @@ import threading
 
 # Package
 from manager import ZeroMQ
+from metrics import Metrics, MetricsServer
+
+# Metrics endpoint of the `balancer` device (read by `server.broker_load`)
+METRICS = "tcp://127.0.0.1:9555"
 
 
 async def device():
@@ -15,6 +19,20 @@ async def device():
     node.device()
 
 
+def balancer(shutdown_event):
+    # Device (publishes its queue depth and in-flight requests)
+    metrics = Metrics()
+    node = ZeroMQ(network_type="balancer", metrics=metrics)
+    broker = node.device()
+    endpoint = MetricsServer(metrics, METRICS)
+    endpoint.start()
+
+    # Run until shutdown
+    shutdown_event.wait()
+    endpoint.stop()
+    broker.stop()
+
+
 def run_device():
     # Loop Policy
     if os.name == "nt":
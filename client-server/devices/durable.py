@@ -0,0 +1,381 @@
+# Python
+from typing import Any, Optional
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+import zlib
+
+# Package
+from flow import CreditStreamer, CreditWorker
+from zerocopy import to_bytes
+
+# Parent of the default log directories (one per frontend address)
+LOG_ROOT = os.path.join(tempfile.gettempdir(), "zmq-streamer")
+
+# Log records: kind, payload length, crc32 of the payload, sequence number
+RECORD = struct.Struct(">BIIQ")
+TASK, DONE = 1, 2  # Kind 0 marks the end of a segment's data
+FRAME = struct.Struct(">I")
+
+
+def pack_frames(frames: list[Any]) -> bytes:
+    """Length-prefix and join the frames of a task."""
+    parts = []
+    for frame in frames:
+        data = to_bytes(frame)
+        parts.append(FRAME.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def unpack_frames(data: Any) -> list[bytes]:
+    """Split a `pack_frames` payload."""
+    data = memoryview(data)
+    frames = []
+    offset = 0
+    while offset < len(data):
+        (size,) = FRAME.unpack_from(data, offset)
+        offset += FRAME.size
+        frames.append(bytes(data[offset : offset + size]))
+        offset += size
+    return frames
+
+
+def log_directory(address: str) -> str:
+    """
+    Default log directory of the streamer bound to `address`.
+
+    e.g. `tcp://127.0.0.1:5555` -> `<tmp>/zmq-streamer/tcp-127.0.0.1-5555`
+    """
+    return os.path.join(LOG_ROOT, re.sub(r"[^\w.]+", "-", address).strip("-"))
+
+
+class Segment:
+    """
+    One pre-allocated, memory-mapped log file.
+    """
+
+    def __init__(self, path: str, number: int, size: int):
+        self.path = path
+        self.number = number
+        exists = os.path.exists(path)
+        self.file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self.file.truncate(size)
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), self.size)
+        self.position = 0
+        self.live = 0  # Tasks not acknowledged yet
+
+    def fits(self, size: int) -> bool:
+        return self.position + size <= self.size
+
+    def write(self, kind: int, seq: int, payload: bytes) -> int:
+        """Append a record and return its offset."""
+        offset = self.position
+        header = RECORD.pack(kind, len(payload), zlib.crc32(payload), seq)
+        self.map[offset : offset + RECORD.size] = header
+        self.map[offset + RECORD.size : offset + RECORD.size + len(payload)] = payload
+        self.position = offset + RECORD.size + len(payload)
+        return offset
+
+    def records(self):
+        """
+        Yield `(kind, seq, offset, length)` for every intact record.
+
+        Stops at the end of the data or at a torn (partially synced) record.
+        """
+        offset = 0
+        while offset + RECORD.size <= self.size:
+            kind, length, crc, seq = RECORD.unpack_from(self.map, offset)
+            start = offset + RECORD.size
+            if not kind or start + length > self.size:
+                break
+            if zlib.crc32(self.map[start : start + length]) != crc:
+                logging.warning(f"Torn record in {self.path} at {offset}")
+                break
+            yield kind, seq, offset, length
+            offset = start + length
+        self.position = offset
+
+    def sync(self) -> None:
+        self.map.flush()
+
+    def close(self) -> None:
+        self.map.close()
+        self.file.close()
+
+
+class SegmentLog:
+    """
+    Append-only task log split into memory-mapped segment files.
+
+    Tasks and acknowledgements are appended as records. `sync()` flushes
+    everything written since the last call in one `msync` (group commit).
+    A segment file is deleted once every task in it is acknowledged. On open,
+    the segments are replayed and the unacknowledged tasks are live again.
+    """
+
+    def __init__(self, directory: str, segment_size: int = 64 << 20):
+        """
+        Initialize a SegmentLog.
+
+        Args:
+            directory (str): Where the segment files live.
+            segment_size (int): Bytes per segment file.
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self.seq = 0
+        self.dirty = 0  # Bytes written since the last sync
+        self.segments: dict[int, Segment] = {}
+        self.tasks: dict[int, tuple[Segment, int, int]] = {}
+        self.__dirty_segments: set[Segment] = set()
+        os.makedirs(directory, exist_ok=True)
+        self.__recover()
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def append(self, frames: list[Any]) -> int:
+        """
+        Write a task and return its sequence number.
+        """
+        payload = pack_frames(frames)
+        self.seq += 1
+        segment = self.__writable(RECORD.size + len(payload))
+        offset = segment.write(TASK, self.seq, payload)
+        segment.live += 1
+        self.tasks[self.seq] = (segment, offset + RECORD.size, len(payload))
+        self.dirty += RECORD.size + len(payload)
+        return self.seq
+
+    def read(self, seq: int) -> list[bytes]:
+        """
+        The frames of a live task.
+        """
+        segment, start, length = self.tasks[seq]
+        return unpack_frames(segment.map[start : start + length])
+
+    def ack(self, seq: int) -> bool:
+        """
+        Mark a task done. Returns `False` if it was not live.
+        """
+        task = self.tasks.pop(seq, None)
+        if task is None:
+            return False
+        self.__writable(RECORD.size).write(DONE, seq, b"")
+        self.dirty += RECORD.size
+        task[0].live -= 1
+        self.__compact()
+        return True
+
+    def sync(self) -> None:
+        """
+        Flush every segment written since the last sync (group commit).
+        """
+        for segment in self.__dirty_segments:
+            segment.sync()
+        self.__dirty_segments.clear()
+        self.dirty = 0
+
+    def close(self) -> None:
+        self.sync()
+        for segment in self.segments.values():
+            segment.close()
+        self.segments.clear()
+
+    @property
+    def __active(self) -> Segment:
+        return self.segments[max(self.segments)]
+
+    def __writable(self, size: int) -> Segment:
+        """
+        The segment to append `size` bytes to, rolling over when full.
+        """
+        segment = self.__active
+        if not segment.fits(size):
+            self.__dirty_segments.add(segment)
+            segment = self.__open(segment.number + 1, size)
+            self.__compact()
+        self.__dirty_segments.add(segment)
+        return segment
+
+    def __open(self, number: int, size: int = 0) -> Segment:
+        path = os.path.join(self.directory, f"{number:012d}.log")
+        segment = Segment(path, number, max(self.segment_size, size))
+        self.segments[number] = segment
+        return segment
+
+    def __compact(self) -> None:
+        """
+        Delete the oldest segments once every task in them is acknowledged.
+
+        Segments go in order, so the `DONE` records of a live segment's tasks
+        are never deleted before it.
+        """
+        while len(self.segments) > 1:
+            segment = self.segments[min(self.segments)]
+            if segment.live:
+                break
+            del self.segments[segment.number]
+            self.__dirty_segments.discard(segment)
+            segment.close()
+            os.remove(segment.path)
+
+    def __recover(self) -> None:
+        """
+        Replay the segments: tasks without a `DONE` record are live.
+        """
+        numbers = sorted(
+            int(name.split(".")[0])
+            for name in os.listdir(self.directory)
+            if name.endswith(".log")
+        )
+        for number in numbers:
+            segment = self.__open(number)
+            for kind, seq, offset, length in segment.records():
+                self.seq = max(self.seq, seq)
+                if kind == TASK:
+                    segment.live += 1
+                    self.tasks[seq] = (segment, offset + RECORD.size, length)
+                elif kind == DONE and seq in self.tasks:
+                    self.tasks.pop(seq)[0].live -= 1
+        if not self.segments:
+            self.__open(0)
+        self.__compact()
+        self.__dirty_segments = {self.__active}
+        if self.tasks:
+            logging.info(f"Recovered {len(self.tasks)} unacknowledged tasks")
+
+
+class DurableStreamer(CreditStreamer):
+    """
+    Persistent `CreditStreamer`: tasks are logged before workers see them.
+
+    Every task is appended to a `SegmentLog`, and tasks become deliverable in
+    batches once `sync()` has flushed them (group commit every
+    `sync_interval` seconds or `sync_bytes`). Workers (`DurableWorker`) use
+    the `CreditStreamer` protocol, and acknowledged tasks are marked done in
+    the log. After a restart, unacknowledged tasks are delivered again.
+
+    Without a `directory`, the log lives under `LOG_ROOT` in a folder named
+    after the first frontend address, so streamers of different services
+    never share a log. Parked tasks (see `max_deliveries`) are moved to the
+    `parked` sub-folder, a `SegmentLog` of their own.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        segment_size: int = 64 << 20,
+        sync_interval: float = 0.005,
+        sync_bytes: int = 1 << 20,
+        **options: Any,
+    ):
+        """
+        Initialize a DurableStreamer.
+
+        Args:
+            directory (str): Log directory (`log_directory()` of the first
+                frontend address by default).
+            segment_size (int): Bytes per segment file.
+            sync_interval (float): Seconds between group commits.
+            sync_bytes (int): Bytes that trigger a commit before the interval.
+            options (Any): `CreditStreamer` arguments.
+        """
+        super().__init__(**options)
+        self.directory = directory
+        self.segment_size = segment_size
+        self.sync_interval = sync_interval
+        self.sync_bytes = sync_bytes
+        self.log: Optional[SegmentLog] = None
+        self.parked_log: Optional[SegmentLog] = None
+        self.__uncommitted: list[int] = []
+        self.__last_sync = 0.0
+
+    @property
+    def backlog(self) -> int:
+        """Tasks logged and not acknowledged yet."""
+        return len(self.log) if self.log else 0
+
+    def bind_in(self, addr: str) -> None:
+        super().bind_in(addr)
+        if self.directory is None:
+            self.directory = log_directory(addr)
+
+    def open(self) -> list[int]:
+        """
+        Open the task and parked logs; return the unacknowledged tasks.
+
+        Raises:
+            ValueError: Without a `directory` or a frontend address.
+        """
+        if self.directory is None:
+            raise ValueError("DurableStreamer needs a directory or bind_in() first")
+        self.log = SegmentLog(self.directory, self.segment_size)
+        self.parked_log = SegmentLog(
+            os.path.join(self.directory, "parked"), self.segment_size
+        )
+        return sorted(self.log.tasks)
+
+    def store(self, frames: list[Any]) -> int:
+        seq = self.log.append(frames)
+        self.__uncommitted.append(seq)
+        return seq
+
+    def commit(self) -> list[int]:
+        """
+        Group commit: one flush makes every task logged since the last one
+        durable and deliverable.
+        """
+        if not (self.__uncommitted or self.log.dirty):
+            return []
+        now = time.monotonic()
+        if (
+            now - self.__last_sync < self.sync_interval
+            and self.log.dirty < self.sync_bytes
+        ):
+            return []
+        self.log.sync()
+        self.__last_sync = now
+        committed = self.__uncommitted
+        self.__uncommitted = []
+        return committed
+
+    def load(self, seq: int) -> list[Any]:
+        return self.log.read(seq)
+
+    def is_live(self, seq: int) -> bool:
+        return seq in self.log.tasks
+
+    def remove(self, seq: int) -> bool:
+        return self.log.ack(seq)
+
+    def park(self, seq: int) -> None:
+        # Durable in the parked log before it leaves the task log
+        self.parked_log.append(self.log.read(seq))
+        self.parked_log.sync()
+        self.log.ack(seq)
+
+    def close(self) -> None:
+        self.log.close()
+        self.parked_log.close()
+
+    def timeout(self) -> float:
+        if self.__uncommitted or self.log.dirty:
+            return self.sync_interval * 1000
+        return self.poll_interval
+
+    def full(self) -> bool:
+        if len(self.__uncommitted) + self.queued >= self.max_queue:
+            return True
+        return self.log.dirty >= self.sync_bytes
+
+
+# Same protocol as the in-memory streamer
+DurableWorker = CreditWorker
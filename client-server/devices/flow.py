@@ -0,0 +1,510 @@
+# Python
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import logging
+import math
+import struct
+import threading
+import time
+
+# ZMQ
+import zmq
+
+# Package
+from broker import READY
+from zerocopy import to_bytes, view
+
+# Worker -> Streamer commands (`READY` as for the `LoadBalancer`)
+ACK = b"\x04"
+NACK = b"\x05"
+SEQ = struct.Struct(">Q")
+
+# Window adaptation: EWMA weight, tasks allowed to queue in a worker and how
+# fast the no-load latency estimate forgets old samples (per completion)
+SMOOTHING = 0.2
+HEADROOM = 2.0
+DRIFT = 0.001
+
+
+class CreditWindow:
+    """
+    Adaptive number of tasks one worker may hold.
+
+    A worker grants up to `limit` credits. The window starts small and follows
+    the worker's measured latency (dispatch to acknowledgement): while it
+    stays near the fastest latency seen, the window grows by `HEADROOM`; when
+    tasks start to queue inside the worker it shrinks by `min / latency`. A
+    task that times out halves the window. A slow worker keeps a small window
+    and the remaining tasks go to faster ones. With `limit=1` there is nothing
+    to adapt: the worker holds one task at a time.
+    """
+
+    def __init__(self, limit: int, initial: int = 1):
+        """
+        Initialize a CreditWindow.
+
+        Args:
+            limit (int): Credits granted by the worker.
+            initial (int): Starting window.
+        """
+        self.limit = limit
+        self.window = float(max(1, min(initial, limit)))
+        self.latency: Optional[float] = None  # EWMA (seconds)
+        self.min_latency = math.inf
+        self.__sent: dict[int, float] = {}
+
+    @property
+    def outstanding(self) -> int:
+        """Tasks sent and not finished."""
+        return len(self.__sent)
+
+    @property
+    def spare(self) -> int:
+        """Tasks that may be sent now."""
+        return int(self.window) - len(self.__sent)
+
+    def send(self, seq: int) -> None:
+        self.__sent[seq] = time.monotonic()
+
+    def done(self, seq: int, measure: bool = True) -> bool:
+        """
+        Finish a task and adapt the window to its latency.
+
+        Returns `False` if the task was not sent to this worker.
+        """
+        sent = self.__sent.pop(seq, None)
+        if sent is None:
+            return False
+        if measure:
+            self.__adapt(time.monotonic() - sent)
+        return True
+
+    def expire(self, seq: int) -> None:
+        """
+        Forget a timed out task and halve the window.
+        """
+        if self.__sent.pop(seq, None) is not None:
+            self.window = max(1.0, self.window / 2)
+
+    def __adapt(self, sample: float) -> None:
+        if self.latency is None:
+            self.latency = sample
+        else:
+            self.latency += SMOOTHING * (sample - self.latency)
+        self.min_latency = min(self.min_latency * (1 + DRIFT), sample)
+        gradient = max(0.5, min(1.0, self.min_latency / max(self.latency, 1e-9)))
+        target = self.window * gradient + HEADROOM
+        self.window += SMOOTHING * (target - self.window)
+        self.window = max(1.0, min(float(self.limit), self.window))
+
+
+class CreditStreamer:
+    """
+    `streamer` that only sends tasks to workers with credit.
+
+    Producers `PUSH` tasks to the frontend `PULL`. Workers (`CreditWorker`)
+    connect a `DEALER` to the backend `ROUTER`, announce `[READY, credit]`,
+    receive `[seq, *frames]` and answer `[ACK, seq]` or `[NACK, seq]`. Each
+    worker holds at most its `CreditWindow`, so tasks wait in the streamer
+    instead of in a slow worker's queue, and a task not acknowledged within
+    `visibility_timeout` seconds is sent again.
+
+    A task delivered `max_deliveries` times without an `ACK` (handed back,
+    timed out or lost with its worker) is parked instead of sent again, so a
+    poison message cannot cycle forever. `park` keeps it in `parked`.
+
+    Workers repeat `READY` while idle. A worker that has sent nothing for
+    `visibility_timeout` seconds, or that has disconnected (the backend is
+    `ROUTER_MANDATORY`), is evicted and its tasks are sent to the others;
+    it is registered again by its next `READY`.
+
+    At most `max_queue` tasks wait in the streamer. Beyond that the frontend
+    is no longer read and producers block at their high-water mark.
+
+    Subclasses change where tasks are kept with `open`, `store`, `commit`,
+    `load`, `is_live`, `remove`, `park` and `close`. Mirrors the `ThreadDevice`
+    API (`bind_in`, `bind_out`, `start`).
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 10_000,
+        initial_window: int = 1,
+        visibility_timeout: float = 30.0,
+        poll_interval: int = 100,
+        max_deliveries: Optional[int] = 5,
+    ):
+        """
+        Initialize a CreditStreamer.
+
+        Args:
+            max_queue (int): Tasks waiting in the streamer at most.
+            initial_window (int): Starting window of a new worker.
+            visibility_timeout (float): Seconds before an unacked task is resent.
+            poll_interval (int): Milliseconds between checks of the stop flag.
+            max_deliveries (int): Deliveries of a task before it is parked
+                (`None` to retry forever).
+        """
+        self.max_queue = max_queue
+        self.initial_window = initial_window
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.max_deliveries = max_deliveries
+        self.stats: Any = None  # `metrics.DeviceStats`
+        self.windows: dict[bytes, CreditWindow] = {}
+        self.redelivered = 0
+        self.evicted = 0
+        self.tasks: dict[int, list[Any]] = {}
+        self.parked: dict[int, list[Any]] = {}
+        self.__seq = 0
+        self.__stored: list[int] = []
+        self.__workers: deque[bytes] = deque()
+        self.__pending: deque[int] = deque()  # Deliverable, not yet sent
+        self.__in_flight: dict[int, tuple[bytes, float]] = {}
+        self.__deliveries: dict[int, int] = {}
+        self.__deadlines: deque[tuple[float, int]] = deque()
+        self.__last_seen: dict[bytes, float] = {}
+        self.__next_check = 0.0
+        self.__binds_in: list[str] = []
+        self.__binds_out: list[str] = []
+        self.__stop_event = threading.Event()
+        self.__thread = threading.Thread(target=self.run, daemon=True)
+
+    def bind_in(self, addr: str) -> None:
+        """Bind the frontend (producers) `PULL`."""
+        self.__binds_in.append(addr)
+
+    def bind_out(self, addr: str) -> None:
+        """Bind the backend (workers) `ROUTER`."""
+        self.__binds_out.append(addr)
+
+    def start(self) -> None:
+        """Start the streamer thread."""
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stop the streamer thread."""
+        self.__stop_event.set()
+        self.__thread.join()
+
+    def join(self, timeout: float | None = None) -> None:
+        self.__thread.join(timeout)
+
+    @property
+    def queued(self) -> int:
+        """Tasks waiting for a worker."""
+        return len(self.__pending)
+
+    @property
+    def in_flight(self) -> int:
+        """Tasks sent to workers and not acknowledged yet."""
+        return len(self.__in_flight)
+
+    def run(self) -> None:
+        """
+        Take tasks while there is room and hand them to workers with credit.
+        """
+        self.__pending.extend(self.open())
+
+        context = zmq.Context.instance()
+        frontend = context.socket(zmq.PULL)
+        backend = context.socket(zmq.ROUTER)
+        # Sending to a worker that went away raises instead of dropping the task
+        backend.setsockopt(zmq.ROUTER_MANDATORY, 1)
+        for addr in self.__binds_in:
+            frontend.bind(addr)
+        for addr in self.__binds_out:
+            backend.bind(addr)
+
+        poller = zmq.Poller()
+        poller.register(backend, zmq.POLLIN)
+        try:
+            while not self.__stop_event.is_set():
+                # Backpressure: leave tasks in the producers' queues when full
+                poller.register(frontend, 0 if self.full() else zmq.POLLIN)
+                events = dict(poller.poll(self.timeout()))
+
+                if frontend in events:
+                    self.__on_task(frontend)
+                if backend in events:
+                    self.__on_worker(backend.recv_multipart())
+
+                self.__pending.extend(self.commit())
+                self.__expire()
+                self.__evict_silent()
+                self.__dispatch(backend)
+        finally:
+            frontend.close(linger=0)
+            backend.close(linger=0)
+            self.close()
+
+    def open(self) -> list[int]:
+        """
+        Prepare the storage and return the tasks left from a previous run.
+        """
+        return []
+
+    def store(self, frames: list[Any]) -> int:
+        """
+        Keep a task and return its sequence number.
+        """
+        self.__seq += 1
+        self.tasks[self.__seq] = frames
+        self.__stored.append(self.__seq)
+        return self.__seq
+
+    def commit(self) -> list[int]:
+        """
+        Tasks stored since the last call that may be sent now.
+        """
+        stored = self.__stored
+        self.__stored = []
+        return stored
+
+    def load(self, seq: int) -> list[Any]:
+        return self.tasks[seq]
+
+    def is_live(self, seq: int) -> bool:
+        """Whether a task still needs a worker."""
+        return seq in self.tasks
+
+    def remove(self, seq: int) -> bool:
+        """
+        Drop an acknowledged task. Returns `False` if it was not live.
+        """
+        return self.tasks.pop(seq, None) is not None
+
+    def park(self, seq: int) -> None:
+        """
+        Set aside a task that failed `max_deliveries` times (dead letter).
+        """
+        self.parked[seq] = self.tasks.pop(seq)
+
+    def close(self) -> None:
+        """Release the storage."""
+
+    def timeout(self) -> float:
+        """Milliseconds to wait for a message."""
+        return self.poll_interval
+
+    def full(self) -> bool:
+        """Whether the streamer stops reading the frontend."""
+        return len(self.__pending) + len(self.__stored) >= self.max_queue
+
+    def __on_task(self, frontend: Any) -> None:
+        """
+        Store the tasks waiting on the frontend, while there is room.
+        """
+        while not self.full():
+            try:
+                frames = frontend.recv_multipart(zmq.NOBLOCK, copy=False)
+            except zmq.Again:
+                return
+            self.store(frames)
+            if self.stats:
+                self.stats.forwarded_in += 1
+
+    def __on_worker(self, frames: list[bytes]) -> None:
+        """
+        Handle `READY`, `ACK` and `NACK` messages from a worker.
+        """
+        worker, command, *rest = frames
+        if worker in self.windows or command == READY:
+            self.__last_seen[worker] = time.monotonic()
+        if command == READY:
+            limit = int(rest[0]) if rest else 1
+            if worker in self.windows:
+                self.windows[worker].limit = limit
+            else:
+                self.windows[worker] = CreditWindow(limit, self.initial_window)
+                self.__workers.append(worker)
+            return
+        if command not in (ACK, NACK) or not rest:
+            logging.warning(f"Unknown worker command: {command!r}")
+            return
+        (seq,) = SEQ.unpack(rest[0])
+        window = self.windows.get(worker)
+        if window is None or not window.done(seq, measure=command == ACK):
+            return  # Timed out and sent elsewhere already
+        self.__in_flight.pop(seq, None)
+        if command == ACK:
+            self.__deliveries.pop(seq, None)
+            if self.remove(seq) and self.stats:
+                self.stats.forwarded_out += 1
+        elif self.is_live(seq):
+            self.__requeue(seq)
+
+    def __expire(self) -> None:
+        """
+        Requeue tasks whose visibility timeout has passed.
+        """
+        now = time.monotonic()
+        while self.__deadlines and self.__deadlines[0][0] <= now:
+            deadline, seq = self.__deadlines.popleft()
+            sent = self.__in_flight.get(seq)
+            if sent is not None and sent[1] == deadline:
+                del self.__in_flight[seq]
+                self.windows[sent[0]].expire(seq)
+                self.__requeue(seq)
+                self.redelivered += 1
+
+    def __evict_silent(self) -> None:
+        """
+        Evict the workers silent for `visibility_timeout` (checked every second).
+        """
+        now = time.monotonic()
+        if now < self.__next_check:
+            return
+        self.__next_check = now + 1.0
+        for worker, seen in list(self.__last_seen.items()):
+            if now - seen >= self.visibility_timeout:
+                self.__evict(worker, "went silent")
+
+    def __evict(self, worker: bytes, reason: str) -> None:
+        """
+        Forget a worker and send its tasks to the others.
+        """
+        del self.windows[worker]
+        del self.__last_seen[worker]
+        self.__workers.remove(worker)
+        tasks = [seq for seq, sent in self.__in_flight.items() if sent[0] == worker]
+        for seq in tasks:
+            del self.__in_flight[seq]
+            self.__requeue(seq)
+        self.redelivered += len(tasks)
+        self.evicted += 1
+        logging.warning(f"Worker {worker!r} {reason}, resending {len(tasks)} tasks")
+
+    def __requeue(self, seq: int) -> None:
+        """
+        Send a task again, or park it after `max_deliveries`.
+        """
+        deliveries = self.__deliveries.get(seq, 0)
+        if self.max_deliveries is None or deliveries < self.max_deliveries:
+            self.__pending.appendleft(seq)
+            return
+        del self.__deliveries[seq]
+        self.park(seq)
+        logging.warning(f"Task {seq} parked after {deliveries} deliveries")
+
+    def __dispatch(self, backend: Any) -> None:
+        """
+        Send waiting tasks to workers with spare credit, in turn.
+        """
+        while self.__pending:
+            worker = self.__checkout()
+            if worker is None:
+                return
+            seq = self.__pending.popleft()
+            if not self.is_live(seq) or seq in self.__in_flight:
+                continue  # Acknowledged or already resent
+            try:
+                backend.send_multipart([worker, SEQ.pack(seq), *self.load(seq)])
+            except zmq.ZMQError as e:
+                if e.errno != zmq.EHOSTUNREACH:
+                    raise
+                self.__pending.appendleft(seq)
+                self.__evict(worker, "disconnected")
+                continue
+            self.windows[worker].send(seq)
+            self.__deliveries[seq] = self.__deliveries.get(seq, 0) + 1
+            deadline = time.monotonic() + self.visibility_timeout
+            self.__in_flight[seq] = (worker, deadline)
+            self.__deadlines.append((deadline, seq))
+
+    def __checkout(self) -> Optional[bytes]:
+        """
+        The next worker (round robin) with spare credit.
+        """
+        for _ in range(len(self.__workers)):
+            worker = self.__workers[0]
+            self.__workers.rotate(-1)
+            if self.windows[worker].spare > 0:
+                return worker
+        return None
+
+
+class CreditWorker:
+    """
+    Async `DEALER` worker for a `CreditStreamer`.
+
+    Runs up to `credit` tasks at a time. A task is acknowledged once `handler`
+    returns; if the handler raises, the task is handed back (`NACK`) for
+    another attempt. `READY` is repeated after `heartbeat_interval` seconds
+    without a message, so the streamer keeps (or takes back) the worker; keep
+    it well below the streamer's `visibility_timeout`.
+    """
+
+    def __init__(
+        self,
+        context: Any,
+        endpoint: str,
+        credit: int = 16,
+        zero_copy: bool = False,
+        heartbeat_interval: float = 5.0,
+    ):
+        """
+        Initialize a CreditWorker.
+
+        Args:
+            context (Any): A `zmq.asyncio` context.
+            endpoint (str): The streamer backend address.
+            credit (int): Tasks this worker accepts at a time (the streamer
+                adapts the window up to it).
+            zero_copy (bool): Pass `memoryview`s to the handler.
+            heartbeat_interval (float): Idle seconds before `READY` is repeated.
+        """
+        self.context = context
+        self.endpoint = endpoint
+        self.credit = credit
+        self.zero_copy = zero_copy
+        self.heartbeat_interval = heartbeat_interval
+        self.socket: Any = None
+        self.__tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """
+        Connect and tell the streamer how many tasks to send at most.
+        """
+        self.socket = self.context.socket(zmq.DEALER)
+        self.socket.connect(self.endpoint)
+        await self.__ready()
+
+    async def serve(self, handler: Callable[[Any], Awaitable[Any]]) -> None:
+        """
+        Run `handler` for every task, concurrently.
+        """
+        while True:
+            if not await self.socket.poll(self.heartbeat_interval * 1000):
+                await self.__ready()
+                continue
+            frames = await self.socket.recv_multipart(copy=not self.zero_copy)
+            task = asyncio.create_task(self.__handle(handler, frames))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    async def close(self) -> None:
+        """
+        Wait for running tasks, then close the socket.
+        """
+        if self.__tasks:
+            await asyncio.gather(*self.__tasks, return_exceptions=True)
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    async def __ready(self) -> None:
+        await self.socket.send_multipart([READY, str(self.credit).encode("utf-8")])
+
+    async def __handle(self, handler: Callable, frames: list[Any]) -> None:
+        seq, *body = frames
+        body = [view(frame) for frame in body]
+        try:
+            await handler(body[0] if len(body) == 1 else body)
+        except Exception as e:
+            logging.exception(e)
+            command = NACK
+        else:
+            command = ACK
+        await self.socket.send_multipart([command, to_bytes(seq)])
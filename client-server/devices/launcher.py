@@ -0,0 +1,107 @@
+# Python
+from itertools import count
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+import sys
+import threading
+
+# Workers
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "workers"))
+from autoscaler import Autoscaler, LoadSample  # noqa: E402
+from base import BaseAsyncProcess, BaseServer  # noqa: E402
+
+
+class AsyncServer(BaseAsyncProcess):
+    """
+    Process that awaits `target(*args)` (an `async` server function).
+
+    `stop()` cancels the coroutine, so servers give their work back in
+    `finally` (e.g. `BrokerWorker.drain()`), and the supervisor replaces
+    a process that crashes.
+    """
+
+    async def server(self):
+        await self.options.target(*self.options.args)
+
+    def on_event(self, event_type: str):
+        """Run Event"""
+        match event_type:
+            case "startup":
+                print(f"Starting {self.options.target.__name__}{self.options.args}")
+            case "shutdown":
+                print(f"Stopping {self.options.target.__name__}{self.options.args}")
+
+
+class Servers(BaseServer):
+    """Servers"""
+
+    @staticmethod
+    def on_event(event_type: str):
+        """Run Event"""
+        match event_type:
+            case "startup":
+                print("Starting Servers. . .")
+            case "shutdown":
+                print("Stopping Servers. . .")
+
+
+def serve(
+    target: Callable,
+    arguments: Iterable[tuple],
+    shutdown_event: Any,
+    supervise: bool = True,
+) -> None:
+    """
+    Run `target(*args)` in one supervised process per `args` in `arguments`.
+
+    Blocks until `shutdown_event` is set (or a keyboard interrupt), then
+    stops the servers, giving each `drain_timeout` seconds to finish.
+
+    Args:
+        target (Callable): `async` server function (module level, so it pickles).
+        arguments (Iterable): Arguments of every server process.
+        shutdown_event (Event): Set to stop the servers.
+        supervise (bool): Restart servers that exit unexpectedly.
+    """
+    # Own service per call (`BaseServer` state lives on the class)
+    service = type("Servers", (Servers,), {})
+    service.add(*(AsyncServer(target=target, args=tuple(args)) for args in arguments))
+    service.start(supervise=supervise, stop_event=shutdown_event)
+
+
+def autoscale(
+    target: Callable,
+    probe: Callable[[], Optional[LoadSample]],
+    shutdown_event: Any,
+    interval: float = 1.0,
+    **options: Any,
+) -> None:
+    """
+    Run `target(uid)` in supervised processes, as many as `probe()` calls for.
+
+    Starts `min_workers` servers, then an `Autoscaler` thread adds and
+    retires servers every `interval` seconds. Blocks until `shutdown_event`
+    is set (or a keyboard interrupt), then stops the servers.
+
+    Args:
+        target (Callable): `async` server function (module level, so it pickles).
+        probe (Callable): Returns the current `LoadSample` (or `None`).
+        shutdown_event (Event): Set to stop the servers.
+        interval (float): Seconds between scaling decisions.
+        options (Any): `Autoscaler` arguments (bounds, targets, cooldowns).
+    """
+    service = type("Servers", (Servers,), {})
+    uids = count()
+
+    def factory() -> AsyncServer:
+        return AsyncServer(target=target, args=(next(uids),))
+
+    scaler = Autoscaler(service, factory, probe, **options)
+    service.add(*(factory() for _ in range(scaler.min_workers)))
+    thread = threading.Thread(target=scaler.run, args=(interval, shutdown_event))
+    thread.start()
+    try:
+        service.start(supervise=True, stop_event=shutdown_event)
+    finally:
+        shutdown_event.set()
+        thread.join()
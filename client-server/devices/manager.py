@@ -1,11 +1,17 @@
 # Python
-from collections import namedtuple
+from collections import defaultdict, deque, namedtuple
 from contextlib import contextmanager
 from functools import partial
 from types import SimpleNamespace
-from typing import Literal, Any, Optional
+from typing import Callable, Literal, Any, Optional
 import dataclasses as dc
+import inspect
 import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
 
 # ZMQ
 import zmq
@@ -15,8 +21,23 @@ from zmq.devices import ThreadDevice as Device
 # https://pyzmq.readthedocs.io/en/latest/howto/ssh.html
 from zmq.ssh.tunnel import tunnel_connection
 
+# Package
+from cache import ResponseCache
+from metrics import Metrics
+from proxy import shard_for, shard_url
+from reliable import ReliableClient
+from serializers import SAFE_CODECS, dumps, loads
+from shm import SharedReader, SharedRing, is_local, tag, untag
+from zerocopy import nbytes, send_options
+
 Mesh = namedtuple("Mesh", ["device", "backend", "frontend"], module="ZeroMQ")
 
+# Where the device and its workers run, relative to each other
+Scope = Literal["thread", "process", "remote"]
+
+# Service names map to a frontend port in this range (backend: port + 1)
+SERVICE_PORTS = range(20000, 30000, 2)
+
 
 def tcp_string(port: int = 5555, host: str = "127.0.0.1"):
     """
@@ -32,64 +53,406 @@ def tcp_string(port: int = 5555, host: str = "127.0.0.1"):
     return f"tcp://{host}:{port}"
 
 
-def zmq_context(is_sync: bool = False):
+def ipc_string(name: str, directory: Optional[str] = None):
+    """
+    Generates an IPC Address.
+
+    Args:
+        name (str): The socket name.
+        directory (str): Where the socket file lives (the temp dir by default).
+
+    Returns:
+        str: The IPC address of a unix socket file.
+    """
+    return f"ipc://{os.path.join(directory or tempfile.gettempdir(), name)}.ipc"
+
+
+def service_port(service: str) -> int:
+    """
+    The default frontend port of a service (stable across processes and hosts).
+    """
+    return SERVICE_PORTS[zlib.crc32(service.encode("utf-8")) % len(SERVICE_PORTS)]
+
+
+def service_urls(
+    service: str,
+    scope: Optional[Scope] = None,
+    port: Optional[int] = None,
+    host: Optional[str] = None,
+):
+    """
+    Resolve a service name to its `frontend` and `backend` addresses.
+
+    Options:
+        - `thread`      `inproc://` (device and workers share one `Context`)
+        - `process`     `ipc://` on this host (`tcp` where `ipc` is unsupported)
+        - `remote`      `tcp://host:port` and `tcp://host:port + 1`
+
+    Without a `scope`, a service on this host (no `host`, or a loopback /
+    local host name) uses `process`, any other host `remote`. The `port`
+    defaults to `service_port(service)`. The resolved `scope` is returned too.
+
+    Raises:
+        ValueError: For an unknown `scope`.
+    """
+    if scope is None:
+        local = host is None or is_local(tcp_string(0, host))
+        scope = "process" if local else "remote"
+    if scope == "process" and not zmq.has("ipc"):
+        scope = "remote"
+    match scope:
+        case "thread":
+            return SimpleNamespace(
+                scope=scope,
+                frontend=f"inproc://{service}.clients",
+                backend=f"inproc://{service}.workers",
+            )
+        case "process":
+            return SimpleNamespace(
+                scope=scope,
+                frontend=ipc_string(f"zmq-{service}.clients"),
+                backend=ipc_string(f"zmq-{service}.workers"),
+            )
+        case "remote":
+            port = port or service_port(service)
+            return SimpleNamespace(
+                scope=scope,
+                frontend=tcp_string(port, host or "127.0.0.1"),
+                backend=tcp_string(port + 1, host or "127.0.0.1"),
+            )
+    raise ValueError(f"Unknown scope: {scope!r}")
+
+
+def body_start(frames: list[Any], socket: Any) -> int:
+    """
+    Index of the first frame after the envelope (`ROUTER` sockets).
+
+    Other sockets have no envelope in their frames: `REP` strips it, and an
+    empty frame on a `DEALER` is whatever the application put there.
+    """
+    if socket.type != zmq.ROUTER:
+        return 0
+    for index, frame in enumerate(frames):
+        if not nbytes(frame):
+            return index + 1
+    # No delimiter: only the routing identity
+    return 1
+
+
+def zmq_context(is_sync: bool = False, shared: bool = False):
     """
     Get ZMQ `Context`.
+
+    A `shared` async context wraps the global instance, so its `inproc://`
+    sockets reach the `ThreadDevice` and the `LoadBalancer`.
     """
     if is_sync:
         context = zmq.Context.instance()
+    elif shared:
+        context = zmq.asyncio.Context(zmq.Context.instance())
     else:
         context = zmq.asyncio.Context()  # type: ignore
     return context
 
 
-def network_types(type_name: str = "queue"):
+def network_types(type_name: str = "queue", shards: int = 1):
     """
     Get **ZMQ Types** for `Device` and `Socket`.
 
     Options:
         - `queue`       for (`Request` and `Response`)
-        - `forwarder`   for (`Publisher` and `Subscriber`)
+        - `steerable`   for (`Request` and `Response`) through a `SteerableProxy`
+                        that can be paused and inspected (`shards` in parallel)
+        - `balancer`    for (`Request` and `Response`) sent to free workers only
+        - `forwarder`   for (`Publisher` and `Subscriber`) through `XSUB` / `XPUB`
+                        with a subscription index (topics hashed over `shards`)
+        - `lvc`         for (`Publisher` and `Subscriber`) through a `forwarder` that
+                        sends the last message of each topic to new subscribers
         - `streamer`    for (`Clients` and `Workers`)
+        - `credit`      for (`Clients` and `CreditWorker`s) through a `streamer` that
+                        sends each worker as many tasks as it keeps up with
+        - `durable`     for (`Clients` and `DurableWorker`s) through a `streamer` that
+                        logs tasks to disk and resends unacknowledged ones
+
+    The `device` of the `Mesh` is a factory (`build_device`): clients and
+    workers never build a device or import its module.
+
+    Raises:
+        ValueError: For an unknown `type_name`.
     """
-    match type_name.lower():
+    type_name = type_name.lower()
+    device = partial(build_device, type_name, shards)
+    match type_name:
+        case "queue" | "steerable":
+            return Mesh(device=device, backend=zmq.REP, frontend=zmq.REQ)
+        case "balancer":
+            return Mesh(device=device, backend=zmq.DEALER, frontend=zmq.REQ)
+        case "forwarder" | "lvc":
+            return Mesh(device=device, backend=zmq.SUB, frontend=zmq.PUB)
+        case "streamer":
+            return Mesh(device=device, backend=zmq.PULL, frontend=zmq.PUSH)
+        case "credit" | "durable":
+            return Mesh(device=device, backend=zmq.DEALER, frontend=zmq.PUSH)
+    raise ValueError(f"Unknown network type: {type_name!r}")
+
+
+def build_device(type_name: str, shards: int = 1) -> Any:
+    """
+    Build the device of a network type (see `network_types`).
+
+    Its module is imported here, on first use.
+    """
+    match type_name:
         case "queue":
-            return Mesh(
-                device=Device(zmq.QUEUE, zmq.ROUTER, zmq.DEALER),
-                backend=zmq.REP,
-                frontend=zmq.REQ,
-            )
+            return Device(zmq.QUEUE, zmq.ROUTER, zmq.DEALER)
+        case "steerable":
+            from proxy import ProxyPool, SteerableProxy
+
+            return SteerableProxy() if shards == 1 else ProxyPool(shards)
+        case "balancer":
+            from broker import LoadBalancer
+
+            return LoadBalancer()
         case "forwarder":
-            return Mesh(
-                device=Device(zmq.FORWARDER, zmq.SUB, zmq.PUB),
-                backend=zmq.SUB,
-                frontend=zmq.PUB,
-            )
+            from pubsub import Forwarder, ForwarderPool
+
+            return Forwarder() if shards == 1 else ForwarderPool(shards)
+        case "lvc":
+            from pubsub import ForwarderPool, LastValueCache
+
+            if shards == 1:
+                return LastValueCache()
+            return ForwarderPool(shards, LastValueCache)
         case "streamer":
-            return Mesh(
-                device=Device(zmq.STREAMER, zmq.PULL, zmq.PUSH),
-                backend=zmq.PULL,
-                frontend=zmq.PUSH,
-            )
+            return Device(zmq.STREAMER, zmq.PULL, zmq.PUSH)
+        case "credit":
+            from flow import CreditStreamer
+
+            return CreditStreamer()
+        case "durable":
+            from durable import DurableStreamer
+
+            return DurableStreamer()
+    raise ValueError(f"Unknown network type: {type_name!r}")
+
+
+@dc.dataclass
+class PooledSocket:
+    socket: Any
+    key: tuple[str, int]
+    last_used: float = dc.field(default_factory=time.monotonic)
+
+
+class SocketPool:
+    """
+    Bounded pool of warm, already-connected sockets.
+
+    Sockets are keyed by `(endpoint, socket_type)` and share one `Context`,
+    which can be either the sync or the `zmq.asyncio` context.
+    """
+
+    def __init__(
+        self,
+        context: Any,
+        setup: Callable[[Any, str], None],
+        max_size: int = 8,
+        max_idle: float = 60.0,
+        health_check: Optional[Callable[[Any], bool]] = None,
+    ):
+        """
+        Initialize a SocketPool.
+
+        Args:
+            context (Any): The shared `Context` used to create sockets.
+            setup (Callable): Connects a new socket to an endpoint.
+            max_size (int): Max sockets (idle + checked out) per key.
+            max_idle (float): Seconds an idle socket stays reusable.
+            health_check (Callable): Extra check run on checkout.
+        """
+        self.context = context
+        self.setup = setup
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check = health_check
+        self.__idle: dict[tuple[str, int], deque] = defaultdict(deque)
+        self.__size: dict[tuple[str, int], int] = defaultdict(int)
+        self.__busy: dict[int, PooledSocket] = {}
+        self.__lock = threading.Lock()
+
+    def checkout(self, endpoint: str, socket_type: int) -> Any:
+        """
+        Get a healthy socket for `endpoint`, creating one if none is idle.
+
+        Raises:
+            zmq.Again: When `max_size` sockets are already checked out.
+        """
+        key = (endpoint, socket_type)
+        with self.__lock:
+            idle = self.__idle[key]
+            while idle:
+                entry = idle.pop()
+                if self.is_healthy(entry):
+                    self.__busy[id(entry.socket)] = entry
+                    return entry.socket
+                self.__discard(entry)
+            if self.__size[key] >= self.max_size:
+                logging.error(f"Socket pool exhausted for {endpoint}")
+                raise zmq.Again()
+            self.__size[key] += 1
+
+        try:
+            socket = self.context.socket(socket_type)
+            self.setup(socket, endpoint)
+        except BaseException:
+            with self.__lock:
+                self.__size[key] -= 1
+            raise
+
+        with self.__lock:
+            self.__busy[id(socket)] = PooledSocket(socket=socket, key=key)
+        return socket
+
+    def checkin(self, socket: Any) -> None:
+        """
+        Return a socket to the pool so it can be reused.
+        """
+        with self.__lock:
+            entry = self.__busy.pop(id(socket), None)
+            if entry is None:
+                return
+            if socket.closed:
+                self.__size[entry.key] -= 1
+                return
+            entry.last_used = time.monotonic()
+            self.__idle[entry.key].append(entry)
+
+    def evict(self, socket: Any) -> None:
+        """
+        Close and forget a socket (e.g. a `REQ` left waiting after a timeout).
+        """
+        with self.__lock:
+            entry = self.__busy.pop(id(socket), None)
+            if entry is not None:
+                self.__discard(entry)
+
+    def is_healthy(self, entry: PooledSocket) -> bool:
+        """
+        Check that an idle socket can take a new request.
+        """
+        socket = entry.socket
+        if socket.closed:
+            return False
+        if time.monotonic() - entry.last_used > self.max_idle:
+            return False
+        try:
+            events = socket.getsockopt(zmq.EVENTS)
+        except zmq.ZMQError:
+            return False
+        # Unread replies or a `REQ` still waiting on one are stale state
+        if events & zmq.POLLIN:
+            return False
+        if entry.key[1] == zmq.REQ and not events & zmq.POLLOUT:
+            return False
+        if self.health_check:
+            return self.health_check(socket)
+        return True
+
+    def close(self) -> None:
+        """
+        Close every idle socket in the pool.
+        """
+        with self.__lock:
+            for idle in self.__idle.values():
+                while idle:
+                    self.__discard(idle.pop())
+
+    def __discard(self, entry: PooledSocket) -> None:
+        """
+        Close a socket and release its slot. Caller must hold the lock.
+        """
+        self.__size[entry.key] -= 1
+        if not entry.socket.closed:
+            entry.socket.setsockopt(zmq.LINGER, 0)
+            entry.socket.close()
 
 
 class ZeroMQ:
     """ZeroMQ Manager"""
 
     tcp = tcp_string
+    ipc = ipc_string
 
     def __init__(
         self,
         mode: Literal["device", "backend", "frontend"] = "device",
-        backend: str = tcp_string(5556),  # inproc://workers
-        frontend: str = tcp_string(5555),  # inproc://clients
+        backend: Optional[str] = None,  # tcp://127.0.0.1:5556, inproc://workers
+        frontend: Optional[str] = None,  # tcp://127.0.0.1:5555, inproc://clients
         timeout: int = 5000,
         is_sync: bool = False,
         network_type: str = "queue",
         ssh: Optional["SSH"] = None,
+        pool_size: int = 0,
+        zero_copy: bool = False,
+        copy_threshold: int = zmq.COPY_THRESHOLD,
+        codec: str = "raw",
+        codecs: tuple[str, ...] = SAFE_CODECS,
+        metrics: Optional[Metrics] = None,
+        heartbeat_ivl: int = 0,
+        heartbeat_timeout: int = 0,
+        heartbeat_ttl: int = 0,
+        shm_threshold: int = 0,
+        shm_size: int = 64 << 20,
+        shm_lease: float = 5.0,
+        service: Optional[str] = None,
+        scope: Optional[Scope] = None,
+        service_host: Optional[str] = None,
+        service_port: Optional[int] = None,
+        shards: int = 1,
+        shard_key: Optional[bytes] = None,
     ) -> "ZeroMQ":
         """
         Initialize a ZeroMQ.
+
+        `heartbeat_*` are libzmq's ZMTP heartbeat options in milliseconds
+        (`ZMQ_HEARTBEAT_IVL`, `_TIMEOUT`, `_TTL`; 0 keeps the libzmq default).
+        A peer that misses its heartbeats is disconnected, so it drops out of
+        routing instead of silently holding requests until `timeout`.
+
+        `codec` encodes `send_obj()`; `recv_obj()` only decodes `codecs`.
+        Add `"pickle"` there only when every peer is trusted: unpickling runs
+        code chosen by the sender.
+
+        With `shm_threshold` (both peers must set it), every message carries a
+        tag frame ahead of its body (after the envelope on `ROUTER` sockets)
+        that lists its shared-memory descriptors. Frames of at least
+        `shm_threshold` bytes go through a shared-memory ring of `shm_size`
+        bytes, and only a descriptor goes over ZMQ, when every peer is known to
+        be on this host: the `frontend` and the `backend` address are both
+        given (the defaults say nothing about where the clients run) and are
+        `inproc://`, `ipc://` or loopback, or a `service` has the `thread` or
+        `process` scope; and there is no SSH tunnel. Otherwise, and when the
+        ring is full, frames are sent inline. Received payloads are checked
+        copies, or `shm.SharedFrame`s read in place with `zero_copy`; either
+        way a payload whose slot was reused after `shm_lease` seconds raises
+        `ValueError` instead of returning overwritten bytes.
+
+        With a `service` name, the addresses are derived from the name instead
+        of the given `backend` / `frontend`: `inproc://` for threads of one
+        process (`scope="thread"`), `ipc://` for processes on one host, and
+        `tcp://` on `service_host` and `service_port` (a port derived from the
+        name by default) for remote peers. Without a `scope`, a service whose
+        `service_host` is unset or this host is reached over `ipc://`, any
+        other over `tcp://` (see `service_urls`).
+
+        With `network_type="steerable"` and `shards`, the device runs that many
+        proxies on consecutive addresses (`proxy.shard_url`). Workers connect to
+        all of them and a client uses the shard of its `shard_key` (random by
+        default). With `forwarder` and `lvc` the `shard_key` of a publisher is
+        its topic, so it reaches the shard its subscribers get the topic from;
+        a publisher of several topics uses `pubsub.ShardedPublisher` instead.
+
+        Raises:
+            ValueError: For a sharded publisher without a `shard_key`.
         """
         # Mode
         self.mode = mode
@@ -97,15 +460,62 @@ class ZeroMQ:
         # Options
         self.timeout = timeout
         self.ssh = ssh
+        self.zero_copy = zero_copy
+        self.copy_threshold = copy_threshold
+        self.codec = codec
+        self.codecs = codecs
+        self.heartbeat_ivl = heartbeat_ivl
+        self.heartbeat_timeout = heartbeat_timeout
+        self.heartbeat_ttl = heartbeat_ttl
+        self.shm_threshold = shm_threshold
+        self.shm_size = shm_size
+        self.shm_lease = shm_lease
 
         # URL(s)
+        self.scope = scope or "remote"
+        self.shards = shards
+        # Where the peers run is only known from addresses given explicitly
+        local = is_local(frontend) and is_local(backend)
+        if service:
+            urls = service_urls(service, scope, service_port, service_host)
+            backend, frontend = urls.backend, urls.frontend
+            self.scope = urls.scope
+            local = self.scope in ("thread", "process")
+        backend = backend or tcp_string(5556)
+        frontend = frontend or tcp_string(5555)
+        if shards > 1 and mode == "frontend":
+            if shard_key is None and network_type.lower() in ("forwarder", "lvc"):
+                raise ValueError(
+                    "A sharded publisher needs its topic as `shard_key` "
+                    "(or use `pubsub.ShardedPublisher`)"
+                )
+            shard = shard_for(shard_key or os.urandom(8), shards)
+            frontend = shard_url(frontend, shard)
         self.url = self.__get_urls(backend, frontend)
 
+        # Metrics (`None` disables all bookkeeping)
+        self.metrics = metrics
+        self.stats = None
+        if metrics:
+            endpoint = self.url.frontend or self.url.backend
+            self.stats = metrics.socket(f"{mode}:{endpoint}")
+
         # ZMQ
         self.socket = None
-        self.mesh = network_types(network_type)
-        self.context = zmq_context(is_sync)
-        self.get_context = partial(zmq_context, is_sync)
+        self.mesh = network_types(network_type, shards)
+        self.context = zmq_context(is_sync, shared=self.scope == "thread")
+        self.get_context = partial(zmq_context, is_sync, self.scope == "thread")
+
+        # Shared memory (created on the first large send)
+        self.ring: Optional[SharedRing] = None
+        self.reader = SharedReader() if shm_threshold else None
+        self.__shared = bool(shm_threshold)
+        self.__shm_local = self.__shared and not ssh and local
+
+        # Pool (shares `self.context` across requests)
+        self.pool = None
+        if pool_size:
+            self.pool = SocketPool(self.context, self.__attach, max_size=pool_size)
 
     def __get_urls(self, backend, frontend):
         """
@@ -123,7 +533,13 @@ class ZeroMQ:
         """
         Start the ZMQ `Device`.
         """
-        proxy = self.mesh.device
+        proxy = self.mesh.device()
+        if self.metrics and hasattr(proxy, "stats"):
+            proxy.stats = self.metrics.device(f"device:{self.url.frontend}")
+        if hasattr(proxy, "setsockopt_in"):
+            for option, value in self.__heartbeat_options():
+                proxy.setsockopt_in(option, value)
+                proxy.setsockopt_out(option, value)
         proxy.bind_in(self.url.frontend)
         proxy.bind_out(self.url.backend)
         proxy.start()
@@ -134,8 +550,10 @@ class ZeroMQ:
         Start the ZMQ backend `Server`.
         """
         self.socket = self.context.socket(self.mesh.backend)
+        self.configure(self.socket)
         if with_device:
-            self.socket.connect(self.url.backend)
+            for shard in range(self.shards):
+                self.socket.connect(shard_url(self.url.backend, shard))
         else:
             self.socket.bind(self.url.backend)
 
@@ -144,6 +562,182 @@ class ZeroMQ:
         Start the ZMQ frontend `Client`.
         """
         self.socket = self.context.socket(self.mesh.frontend)
+        self.configure(self.socket)
+
+    def configure(self, socket: Any) -> Any:
+        """
+        Apply the copy threshold and ZMTP heartbeat options to a socket.
+        """
+        socket.copy_threshold = self.copy_threshold
+        for option, value in self.__heartbeat_options():
+            socket.setsockopt(option, value)
+        return socket
+
+    def __heartbeat_options(self) -> list[tuple[int, int]]:
+        """
+        The ZMTP heartbeat options that are set.
+        """
+        options = [
+            (zmq.HEARTBEAT_IVL, self.heartbeat_ivl),
+            (zmq.HEARTBEAT_TIMEOUT, self.heartbeat_timeout),
+            (zmq.HEARTBEAT_TTL, self.heartbeat_ttl),
+        ]
+        return [(option, value) for option, value in options if value]
+
+    def send(self, data: Any, socket: Any = None) -> Any:
+        """
+        Send one frame (zero-copy above `copy_threshold` when `zero_copy`).
+
+        Returns the socket's result (a `Future` with the `zmq.asyncio` context).
+        """
+        socket = socket or self.socket
+        if self.stats:
+            self.stats.sent(nbytes(data))
+        if self.__shared:
+            frames = self.__share([data], socket)
+            return socket.send_multipart(
+                frames, **send_options(frames, self.zero_copy, self.copy_threshold)
+            )
+        return socket.send(
+            data, **send_options([data], self.zero_copy, self.copy_threshold)
+        )
+
+    def send_multipart(self, frames: list[Any], socket: Any = None) -> Any:
+        """
+        Send a multipart message (zero-copy above `copy_threshold` when `zero_copy`).
+        """
+        socket = socket or self.socket
+        if self.stats:
+            self.stats.sent(sum(nbytes(frame) for frame in frames))
+        if self.__shared:
+            frames = self.__share(frames, socket)
+        return socket.send_multipart(
+            frames, **send_options(frames, self.zero_copy, self.copy_threshold)
+        )
+
+    def recv(self, socket: Any = None) -> Any:
+        """
+        Receive one frame, as a `zmq.Frame` when `zero_copy`.
+        """
+        socket = socket or self.socket
+        if self.__shared:
+            # The tag frame comes along
+            result = socket.recv_multipart(copy=not self.zero_copy)
+        else:
+            result = socket.recv(copy=not self.zero_copy)
+        return self.__received(result, socket, single=True)
+
+    def recv_multipart(self, socket: Any = None) -> Any:
+        """
+        Receive a multipart message, as `zmq.Frame`(s) when `zero_copy`.
+        """
+        socket = socket or self.socket
+        return self.__received(socket.recv_multipart(copy=not self.zero_copy), socket)
+
+    def __received(self, result: Any, socket: Any, single: bool = False) -> Any:
+        """
+        Count a received message (once it arrives with the `zmq.asyncio` context).
+        """
+        if self.stats:
+            if inspect.isawaitable(result):
+                result.add_done_callback(self.__on_received)
+            else:
+                self.__count_in(result)
+        if self.__shared:
+            if inspect.isawaitable(result):
+                return self.__resolved(result, socket, single)
+            return self.__resolve(result, socket, single)
+        return result
+
+    def __on_received(self, future: Any) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.__count_in(future.result())
+
+    def __count_in(self, message: Any) -> None:
+        frames = message if isinstance(message, list) else [message]
+        self.stats.received(sum(nbytes(frame) for frame in frames))
+
+    def __share(self, frames: list[Any], socket: Any) -> list[Any]:
+        """
+        Add the tag frame, replacing large frames with shared-memory
+        descriptors when the peers are local.
+        """
+        start = body_start(frames, socket)
+        body = list(frames[start:])
+        indices = []
+        if self.__shm_local:
+            # Fan-out: the ring only frees the slot when its lease ends
+            readers = 0 if socket.type in (zmq.PUB, zmq.XPUB) else 1
+            for index, frame in enumerate(body):
+                if nbytes(frame) < self.shm_threshold:
+                    continue
+                if self.ring is None:
+                    self.ring = SharedRing(self.shm_size, self.shm_lease)
+                descriptor = self.ring.put(frame, readers)
+                if descriptor:
+                    body[index] = descriptor
+                    indices.append(index)
+        return [*frames[:start], tag(indices), *body]
+
+    def __resolve(self, message: Any, socket: Any, single: bool) -> Any:
+        """
+        Drop the tag frame and replace the descriptors it lists with views
+        of their payloads.
+        """
+        start = body_start(message, socket)
+        body = message[start + 1 :]
+        for index in untag(message[start]):
+            frame = self.reader.resolve(body[index])
+            body[index] = frame if self.zero_copy else frame.bytes
+        frames = [*message[:start], *body]
+        return frames[0] if single else frames
+
+    async def __resolved(self, result: Any, socket: Any, single: bool) -> Any:
+        return self.__resolve(await result, socket, single)
+
+    def send_obj(self, obj: Any, socket: Any = None) -> Any:
+        """
+        Encode an object with `codec` and send it as `[tag, *frames]`.
+        """
+        return self.send_multipart(dumps(obj, self.codec), socket)
+
+    def recv_obj(self, socket: Any = None) -> Any:
+        """
+        Receive `[tag, *frames]` and decode it with the codec named by the tag.
+
+        Returns a coroutine with the `zmq.asyncio` context.
+        """
+        frames = self.recv_multipart(socket)
+        if inspect.isawaitable(frames):
+            return self.__loads(frames)
+        return loads(frames, self.codecs)
+
+    async def __loads(self, frames: Any) -> Any:
+        """
+        Decode frames once they arrive.
+        """
+        return loads(await frames, self.codecs)
+
+    async def serve(
+        self,
+        handler: Callable[[Any], Any],
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
+        """
+        Answer requests on the `backend()` socket with `handler` (`REP` loop).
+
+        With a `cache`, repeated requests are answered without the handler.
+        Requires the `zmq.asyncio` context; `handler` may be sync or async.
+        """
+
+        async def reply(request: Any) -> Any:
+            result = handler(request)
+            return await result if inspect.isawaitable(result) else result
+
+        respond = cache.wrap(reply) if cache is not None else reply
+        while True:
+            request = await self.recv()
+            await self.send(await respond(request))
 
     def __connect(
         self, socket: Any, send_timeout: bool | int, receive_timeout: bool | int
@@ -151,10 +745,18 @@ class ZeroMQ:
         """
         Connection to the ZMQ socket.
         """
+        self.__attach(socket, self.url.frontend)
+        self.__timeouts(socket, send_timeout, receive_timeout)
+
+    def __attach(self, socket: Any, endpoint: str):
+        """
+        Connect the socket to the endpoint (optionally through SSH).
+        """
+        self.configure(socket)
         if self.ssh:
             tunnel_connection(
                 socket,
-                self.url.frontend,  # "tcp://locahost:5555"
+                endpoint,  # "tcp://locahost:5555"
                 self.ssh.host,  # "myuser@remote-server-ip"
                 keyfile=self.ssh.keyfile,
                 password=self.ssh.password,
@@ -162,8 +764,14 @@ class ZeroMQ:
                 timeout=self.ssh.timeout,
             )
         else:
-            socket.connect(self.url.frontend)
-        # Timeouts
+            socket.connect(endpoint)
+
+    def __timeouts(
+        self, socket: Any, send_timeout: bool | int, receive_timeout: bool | int
+    ):
+        """
+        Set the send and receive timeouts.
+        """
         if send_timeout:
             socket.setsockopt(
                 zmq.SNDTIMEO,
@@ -181,7 +789,19 @@ class ZeroMQ:
     ):
         """
         Establishes a `connection` to the ZMQ socket.
+
+        With `metrics`, only timeouts and pool events are counted for the
+        yielded socket. Send and receive through `node.send(data, socket)`
+        and `node.recv(socket)` (and their multipart versions) to count
+        messages and bytes as well. Request latency is only recorded by
+        `AsyncRPCClient`, `ReliableClient` and `AsyncRouterServer`.
         """
+        # Pool
+        if self.pool:
+            with self.__pooled(send_timeout, receive_timeout) as socket:
+                yield socket
+            return
+
         # Context & Socket
         context: Any = self.get_context()
         c_socket: Any = context.socket(self.mesh.frontend)
@@ -191,11 +811,74 @@ class ZeroMQ:
             yield c_socket
         except zmq.Again as e:
             logging.error(e)
+            self.__timed_out()
             c_socket.setsockopt(zmq.LINGER, 0)
             c_socket.close()
         finally:
             c_socket.close()
-            context.term()
+            if self.scope != "thread":
+                context.term()
+
+    def reliable(self, **options: Any) -> ReliableClient:
+        """
+        A Lazy Pirate client on this (sync) frontend node.
+
+        Unlike `connect()`, a timed out request is retried on a fresh socket
+        (see `ReliableClient` for the `options`).
+        """
+        return ReliableClient(self, **options)
+
+    @contextmanager
+    def __pooled(self, send_timeout: bool | int, receive_timeout: bool | int):
+        """
+        Borrow a warm socket from the pool and give it back afterwards.
+        """
+        try:
+            c_socket: Any = self.pool.checkout(self.url.frontend, self.mesh.frontend)
+        except zmq.Again:
+            if self.stats:
+                self.stats.again += 1
+            raise
+        # Request
+        try:
+            self.__timeouts(c_socket, send_timeout, receive_timeout)
+            yield c_socket
+        except zmq.Again as e:
+            logging.error(e)
+            self.__timed_out()
+            self.__evict(c_socket)
+        except BaseException:
+            self.__evict(c_socket)
+            raise
+        else:
+            self.pool.checkin(c_socket)
+
+    def __evict(self, socket: Any):
+        """
+        Drop a pooled socket; the next checkout reconnects.
+        """
+        self.pool.evict(socket)
+        if self.stats:
+            self.stats.reconnects += 1
+
+    def __timed_out(self):
+        """
+        Count a send / receive timeout.
+        """
+        if self.stats:
+            self.stats.timeouts += 1
+
+    def close(self):
+        """
+        Close the pooled sockets and the shared memory.
+        """
+        if self.pool:
+            self.pool.close()
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+        if self.reader:
+            self.reader.close()
 
 
 @dc.dataclass
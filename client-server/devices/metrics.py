@@ -0,0 +1,270 @@
+# Python
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+import dataclasses as dc
+import threading
+import time
+
+# ZMQ
+import zmq
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class Histogram:
+    """
+    HDR-style log-linear histogram of integer values (e.g. microseconds).
+
+    Values keep their top `significant_bits` bits, so every bucket is within
+    `2 ** -(significant_bits - 1)` of the recorded value (about 3% for 6 bits)
+    while memory stays proportional to the number of distinct buckets.
+    """
+
+    def __init__(self, significant_bits: int = 6):
+        self.significant_bits = significant_bits
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        """Add one value."""
+        value = max(0, int(value))
+        shift = max(0, value.bit_length() - self.significant_bits)
+        bucket = (value >> shift) << shift
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> int:
+        """Lower bound of the bucket holding the `q` quantile."""
+        return self.percentiles((q,))[0]
+
+    def percentiles(self, quantiles: tuple[float, ...]) -> list[int]:
+        """
+        Several quantiles from one snapshot of the buckets.
+
+        Safe to call while another thread records: the buckets are copied
+        first (`dict(...)` copies without giving up the GIL).
+        """
+        counts = dict(self.counts)
+        count = sum(counts.values())
+        if not count:
+            return [0 for _ in quantiles]
+        buckets = sorted(counts)
+        values = []
+        for q in quantiles:
+            rank = q * count
+            seen = 0
+            value = buckets[-1]
+            for bucket in buckets:
+                seen += counts[bucket]
+                if seen >= rank:
+                    value = bucket
+                    break
+            values.append(value)
+        return values
+
+
+@dc.dataclass
+class SocketStats:
+    messages_in: int = 0
+    messages_out: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    timeouts: int = 0  # Send / receive timeouts
+    again: int = 0  # Pool exhausted (no socket to check out)
+    reconnects: int = 0
+    retries: int = 0
+    hedged: int = 0
+    latency_us: Histogram = dc.field(default_factory=Histogram)
+
+    def sent(self, size: int) -> None:
+        self.messages_out += 1
+        self.bytes_out += size
+
+    def received(self, size: int) -> None:
+        self.messages_in += 1
+        self.bytes_in += size
+
+
+@dc.dataclass
+class DeviceStats:
+    forwarded_in: int = 0
+    forwarded_out: int = 0
+    queue_depth: int = 0  # Requests waiting for a worker (brokers)
+    in_flight: int = 0  # Requests sent to workers and not yet answered (brokers)
+    started: float = dc.field(default_factory=time.monotonic)
+
+
+@dc.dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+
+class Metrics:
+    """
+    Registry of per-socket and per-device statistics.
+
+    Components take an optional `metrics` argument and skip all bookkeeping
+    when it is `None`, so disabled instrumentation costs one `if` per call.
+    """
+
+    def __init__(self):
+        self.sockets: dict[str, SocketStats] = {}
+        self.devices: dict[str, DeviceStats] = {}
+        self.caches: dict[str, CacheStats] = {}
+        self.__lock = threading.Lock()
+
+    def socket(self, name: str) -> SocketStats:
+        """Stats for a socket, created on first use."""
+        stats = self.sockets.get(name)
+        if stats is None:
+            with self.__lock:
+                stats = self.sockets.setdefault(name, SocketStats())
+        return stats
+
+    def device(self, name: str) -> DeviceStats:
+        """Stats for a device, created on first use."""
+        stats = self.devices.get(name)
+        if stats is None:
+            with self.__lock:
+                stats = self.devices.setdefault(name, DeviceStats())
+        return stats
+
+    def cache(self, name: str) -> CacheStats:
+        """Stats for a response cache, created on first use."""
+        stats = self.caches.get(name)
+        if stats is None:
+            with self.__lock:
+                stats = self.caches.setdefault(name, CacheStats())
+        return stats
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format.
+        """
+        lines = []
+        for name, stats in list(self.sockets.items()):
+            label = f'socket="{name}"'
+            for field in dc.fields(SocketStats):
+                value = getattr(stats, field.name)
+                if isinstance(value, int):
+                    lines.append(f"zmq_{field.name}_total{{{label}}} {value}")
+            histogram = stats.latency_us
+            for q, value in zip(QUANTILES, histogram.percentiles(QUANTILES)):
+                lines.append(f'zmq_latency_us{{{label},quantile="{q}"}} {value}')
+            lines.append(f"zmq_latency_us_count{{{label}}} {histogram.count}")
+            lines.append(f"zmq_latency_us_sum{{{label}}} {histogram.total}")
+        for name, stats in list(self.devices.items()):
+            label = f'device="{name}"'
+            uptime = max(time.monotonic() - stats.started, 1e-9)
+            lines.append(f"zmq_forwarded_in_total{{{label}}} {stats.forwarded_in}")
+            lines.append(f"zmq_forwarded_out_total{{{label}}} {stats.forwarded_out}")
+            lines.append(
+                f"zmq_forwarded_per_second{{{label}}} "
+                f"{(stats.forwarded_in + stats.forwarded_out) / uptime:.1f}"
+            )
+            lines.append(f"zmq_queue_depth{{{label}}} {stats.queue_depth}")
+            lines.append(f"zmq_in_flight{{{label}}} {stats.in_flight}")
+        for name, stats in list(self.caches.items()):
+            label = f'cache="{name}"'
+            for field in dc.fields(CacheStats):
+                value = getattr(stats, field.name)
+                lines.append(f"zmq_cache_{field.name}_total{{{label}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Scrape endpoint: any request on a `REP` socket is answered with `render()`.
+    """
+
+    def __init__(self, metrics: Metrics, endpoint: str = "tcp://127.0.0.1:9555"):
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.__stop_event = threading.Event()
+        self.__thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self) -> None:
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.__stop_event.set()
+        self.__thread.join()
+
+    def run(self) -> None:
+        socket = zmq.Context.instance().socket(zmq.REP)
+        socket.bind(self.endpoint)
+        try:
+            while not self.__stop_event.is_set():
+                if socket.poll(100):
+                    socket.recv()
+                    socket.send_string(self.metrics.render())
+        finally:
+            socket.close(linger=0)
+
+
+def scrape(endpoint: str, timeout: int = 1000) -> dict[str, float]:
+    """
+    Read a `MetricsServer` (e.g. from another process).
+
+    Returns every sample by series (`name{labels}`).
+
+    Raises:
+        zmq.Again: When the endpoint does not answer within `timeout` ms.
+    """
+    socket = zmq.Context.instance().socket(zmq.REQ)
+    socket.setsockopt(zmq.LINGER, 0)
+    socket.setsockopt(zmq.RCVTIMEO, timeout)
+    socket.connect(endpoint)
+    try:
+        socket.send(b"")
+        text = socket.recv_string()
+    finally:
+        socket.close()
+    samples = {}
+    for line in text.splitlines():
+        series, _, value = line.rpartition(" ")
+        if series:
+            samples[series] = float(value)
+    return samples
+
+
+def total(samples: dict[str, float], name: str) -> float:
+    """
+    Sum of the samples of one metric over every label set.
+    """
+    return sum(
+        value for series, value in samples.items() if series.split("{")[0] == name
+    )
+
+
+def serve_http(metrics: Metrics, port: int = 9100, host: str = "127.0.0.1") -> Any:
+    """
+    Serve `render()` over HTTP (`GET /metrics`) from a daemon thread.
+
+    Returns the `ThreadingHTTPServer`; call `shutdown()` to stop it.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
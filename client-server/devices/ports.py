@@ -0,0 +1,74 @@
+# Python
+from collections import Counter
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import logging
+
+# ZMQ
+import zmq
+import zmq.asyncio
+
+
+async def default_handler(message: bytes) -> bytes:
+    return b"World"
+
+
+async def multi_server(
+    ports: list[int],
+    handlers: Optional[dict[int, Callable[[bytes], Awaitable[bytes]]]] = None,
+    stats: Optional[dict[int, Counter]] = None,
+    setup: Optional[Callable[[Any], None]] = None,
+) -> None:
+    """
+    Serve several `REP` ports from one process, one context and one loop.
+
+    Every port is served by its own task, so a slow request only holds up
+    its own port (a `REP` socket answers one request at a time anyway).
+
+    Args:
+        ports (list): Ports to bind (`tcp://*:<port>`).
+        handlers (dict): Handler per port (`default_handler` otherwise).
+        stats (dict): Filled with a `requests`/`errors` `Counter` per port.
+        setup (Callable): Called with every socket before it binds
+            (e.g. to enable CURVE).
+    """
+    context = zmq.asyncio.Context()
+    handlers = handlers or {}
+    stats = stats if stats is not None else {}
+    sockets = []
+    for port in ports:
+        socket = context.socket(zmq.REP)
+        if setup:
+            setup(socket)
+        socket.bind(f"tcp://*:{port}")
+        sockets.append(socket)
+        stats.setdefault(port, Counter())
+
+    print(f"Server running on ports {list(ports)}")
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            for port, socket in zip(ports, sockets):
+                handler = handlers.get(port, default_handler)
+                group.create_task(serve_port(socket, handler, stats[port]))
+    finally:
+        for socket in sockets:
+            socket.close(linger=0)
+        context.term()
+
+
+async def serve_port(socket: Any, handler: Callable, stats: Counter) -> None:
+    """
+    Answer the requests of one `REP` socket.
+    """
+    while True:
+        message = await socket.recv()
+        stats["requests"] += 1
+        try:
+            reply = await handler(message)
+        except Exception as e:
+            # `REP` must answer before it can receive again
+            logging.exception(e)
+            stats["errors"] += 1
+            reply = b""
+        await socket.send(reply)
@@ -0,0 +1,341 @@
+# Python
+from multiprocessing.sharedctypes import RawValue
+from typing import Any, Literal, Optional
+from urllib.parse import urlsplit
+import ctypes
+import multiprocessing
+import os
+import struct
+import tempfile
+import threading
+import zlib
+
+# ZMQ
+import zmq
+
+# Control commands (`zmq.proxy_steerable`)
+PAUSE = b"PAUSE"
+RESUME = b"RESUME"
+TERMINATE = b"TERMINATE"
+STATISTICS = b"STATISTICS"
+
+# Counters returned by `STATISTICS` (frames, not whole messages)
+FIELDS = (
+    "frontend_messages_in",
+    "frontend_bytes_in",
+    "frontend_messages_out",
+    "frontend_bytes_out",
+    "backend_messages_in",
+    "backend_bytes_in",
+    "backend_messages_out",
+    "backend_bytes_out",
+)
+COUNTER = struct.Struct("=Q")
+
+# libzmq up to 4.3.5 acknowledges `PAUSE` but keeps forwarding
+NATIVE_PAUSE = zmq.zmq_version_info() > (4, 3, 5)
+
+
+def shard_url(url: str, index: int) -> str:
+    """
+    Address of one shard: the next ports for `tcp`, a suffix otherwise.
+
+    Shard 0 keeps the address itself.
+    """
+    if not index:
+        return url
+    parts = urlsplit(url)
+    if parts.scheme == "tcp":
+        return f"tcp://{parts.hostname}:{parts.port + index}"
+    return f"{url}-{index}"
+
+
+def shard_for(key: bytes, shards: int) -> int:
+    """
+    Shard index of a client identity (stable across processes).
+    """
+    return zlib.crc32(key) % shards
+
+
+class SteerableProxy:
+    """
+    `zmq.proxy_steerable` device that can be paused, resumed and inspected.
+
+    Mirrors the `ThreadDevice` API (`bind_in`, `bind_out`, `setsockopt_in`,
+    `setsockopt_out`, `start`, `join`). Commands go to a `REP` control socket;
+    `statistics()` returns libzmq's per-socket counters and updates `stats`.
+    With a `capture` address, every forwarded frame is also published there.
+
+    `pause()` sends `PAUSE` where libzmq honours it (`NATIVE_PAUSE`). Up to
+    libzmq 4.3.5 the proxy keeps forwarding after `PAUSE`, so `pause()` ends
+    the proxy loop with `TERMINATE` instead and keeps the sockets open; the
+    proxy thread then stays paused until `RESUME` (run again) or `TERMINATE`
+    (stop) arrives on the control socket. Either way messages wait in their queues
+    (up to the high-water marks) while paused. With the fallback, counters are
+    kept across pauses and `statistics()` returns the values from before the
+    pause while paused.
+    """
+
+    def __init__(
+        self,
+        frontend_type: int = zmq.ROUTER,
+        backend_type: int = zmq.DEALER,
+        capture: Optional[str] = None,
+        launcher: Literal["thread", "process"] = "thread",
+        timeout: int = 1000,
+    ):
+        """
+        Initialize a SteerableProxy.
+
+        Args:
+            frontend_type (int): Socket type facing the clients.
+            backend_type (int): Socket type facing the workers.
+            capture (str): Address of a `PUB` socket mirroring all traffic.
+            launcher (str): Run the proxy in a `thread` or a `process`.
+            timeout (int): Milliseconds to wait for a command reply.
+        """
+        self.frontend_type = frontend_type
+        self.backend_type = backend_type
+        self.capture = capture
+        self.launcher = launcher
+        self.timeout = timeout
+        self.stats: Any = None  # `metrics.DeviceStats`
+        self.paused = False
+        self.control = self.__control_url()
+        self.__counters = dict.fromkeys(FIELDS, 0)  # Before the last pause
+        self.__binds_in: list[str] = []
+        self.__binds_out: list[str] = []
+        self.__options_in: list[tuple[int, Any]] = []
+        self.__options_out: list[tuple[int, Any]] = []
+        self.__socket: Any = None
+        self.__lock = threading.Lock()
+        self.__runner: Any = None
+        # Fallback pauses requested (only ever incremented by the caller)
+        self.__pauses = RawValue(ctypes.c_uint64, 0)
+
+    def __getstate__(self) -> dict:
+        # The process launcher only needs the configuration
+        state = self.__dict__.copy()
+        for name in ("socket", "lock", "runner"):
+            state[f"_SteerableProxy__{name}"] = None
+        return state
+
+    def bind_in(self, addr: str) -> None:
+        """Bind the frontend (clients) socket."""
+        self.__binds_in.append(addr)
+
+    def bind_out(self, addr: str) -> None:
+        """Bind the backend (workers) socket."""
+        self.__binds_out.append(addr)
+
+    def setsockopt_in(self, option: int, value: Any) -> None:
+        self.__options_in.append((option, value))
+
+    def setsockopt_out(self, option: int, value: Any) -> None:
+        self.__options_out.append((option, value))
+
+    def start(self) -> None:
+        """Start the proxy thread (or process)."""
+        if self.launcher == "process":
+            self.__runner = multiprocessing.Process(target=self.run, daemon=True)
+        else:
+            self.__runner = threading.Thread(target=self.run, daemon=True)
+        self.__runner.start()
+
+    def join(self, timeout: float | None = None) -> None:
+        self.__runner.join(timeout)
+
+    def run(self) -> None:
+        """
+        Forward messages until `TERMINATE`.
+        """
+        if self.launcher == "process":
+            context = zmq.Context()
+        else:
+            context = zmq.Context.instance()
+        frontend = context.socket(self.frontend_type)
+        backend = context.socket(self.backend_type)
+        control = context.socket(zmq.REP)
+        capture = context.socket(zmq.PUB) if self.capture else None
+        sockets = [frontend, backend, control, capture]
+        try:
+            for option, value in self.__options_in:
+                frontend.setsockopt(option, value)
+            for option, value in self.__options_out:
+                backend.setsockopt(option, value)
+            for addr in self.__binds_in:
+                frontend.bind(addr)
+            for addr in self.__binds_out:
+                backend.bind(addr)
+            if capture:
+                capture.bind(self.capture)
+            control.bind(self.control)
+            paused = 0  # Fallback pauses handled
+            while True:
+                zmq.proxy_steerable(frontend, backend, capture, control)
+                if self.__pauses.value == paused:
+                    break
+                paused += 1
+                # Paused until `RESUME` (run again) or `TERMINATE` (stop)
+                while (command := control.recv()) not in (RESUME, TERMINATE):
+                    control.send(b"")
+                control.send(b"")
+                if command == TERMINATE:
+                    break
+        finally:
+            for socket in sockets:
+                if socket is not None:
+                    socket.close(linger=0)
+            if self.launcher == "process":
+                context.term()
+
+    def command(self, command: bytes) -> list[bytes]:
+        """
+        Send a control command and return the proxy's reply frames.
+
+        Raises:
+            zmq.Again: When the proxy does not answer within `timeout`.
+        """
+        with self.__lock:
+            if self.__socket is None:
+                self.__socket = zmq.Context.instance().socket(zmq.REQ)
+                self.__socket.setsockopt(zmq.LINGER, 0)
+                self.__socket.setsockopt(zmq.RCVTIMEO, self.timeout)
+                self.__socket.connect(self.control)
+            try:
+                self.__socket.send(command)
+                return self.__socket.recv_multipart()
+            except zmq.Again:
+                # A `REQ` socket cannot send again until it has a reply
+                self.__socket.close()
+                self.__socket = None
+                raise
+
+    def pause(self) -> None:
+        """Stop forwarding (messages queue up to the high-water marks)."""
+        if self.paused:
+            return
+        if NATIVE_PAUSE:
+            self.command(PAUSE)
+        else:
+            self.__counters = self.statistics()
+            self.__pauses.value += 1  # Before `TERMINATE`: the loop pauses
+            self.command(TERMINATE)
+        self.paused = True
+
+    def resume(self) -> None:
+        """Forward again after `pause()`."""
+        if self.paused:
+            self.command(RESUME)
+            self.paused = False
+
+    def statistics(self) -> dict[str, int]:
+        """
+        Frame and byte counters of both sockets (see `FIELDS`).
+        """
+        values = dict(self.__counters)
+        if NATIVE_PAUSE or not self.paused:
+            frames = self.command(STATISTICS)
+            for name, frame in zip(FIELDS, frames):
+                values[name] += COUNTER.unpack(frame)[0]
+        if self.stats:
+            self.stats.forwarded_in = values["frontend_messages_in"]
+            self.stats.forwarded_out = values["backend_messages_in"]
+        return values
+
+    def stop(self) -> None:
+        """Terminate the proxy and wait for it."""
+        try:
+            self.command(TERMINATE)
+        except zmq.Again:
+            pass
+        self.join()
+        with self.__lock:
+            if self.__socket is not None:
+                self.__socket.close()
+                self.__socket = None
+
+    def __control_url(self) -> str:
+        """
+        Control address: `inproc` for a thread, `ipc` for a process.
+        """
+        name = f"zmq-proxy-{os.getpid()}-{id(self)}"
+        if self.launcher == "thread":
+            return f"inproc://{name}"
+        return f"ipc://{os.path.join(tempfile.gettempdir(), name)}.ipc"
+
+
+class ProxyPool:
+    """
+    `SteerableProxy` shards running in parallel threads or processes.
+
+    Shard `i` binds `shard_url(addr, i)` for every address, so one forwarding
+    thread no longer carries every message. Clients pick their shard with
+    `shard_for(identity, shards)` and workers connect to every shard backend.
+    Process shards use one core each.
+    """
+
+    def __init__(self, shards: int = 2, **options: Any):
+        """
+        Initialize a ProxyPool.
+
+        Args:
+            shards (int): Number of proxies.
+            options (Any): `SteerableProxy` arguments shared by every shard.
+        """
+        capture = options.pop("capture", None)
+        self.shards = shards
+        self.stats: Any = None  # `metrics.DeviceStats` (sum of every shard)
+        self.proxies = [
+            SteerableProxy(capture=capture and shard_url(capture, i), **options)
+            for i in range(shards)
+        ]
+
+    def bind_in(self, addr: str) -> None:
+        for index, proxy in enumerate(self.proxies):
+            proxy.bind_in(shard_url(addr, index))
+
+    def bind_out(self, addr: str) -> None:
+        for index, proxy in enumerate(self.proxies):
+            proxy.bind_out(shard_url(addr, index))
+
+    def setsockopt_in(self, option: int, value: Any) -> None:
+        for proxy in self.proxies:
+            proxy.setsockopt_in(option, value)
+
+    def setsockopt_out(self, option: int, value: Any) -> None:
+        for proxy in self.proxies:
+            proxy.setsockopt_out(option, value)
+
+    def start(self) -> None:
+        for proxy in self.proxies:
+            proxy.start()
+
+    def join(self, timeout: float | None = None) -> None:
+        for proxy in self.proxies:
+            proxy.join(timeout)
+
+    def pause(self) -> None:
+        for proxy in self.proxies:
+            proxy.pause()
+
+    def resume(self) -> None:
+        for proxy in self.proxies:
+            proxy.resume()
+
+    def stop(self) -> None:
+        for proxy in self.proxies:
+            proxy.stop()
+
+    def statistics(self) -> dict[str, int]:
+        """
+        Counters summed over every shard (see `FIELDS`).
+        """
+        total = dict.fromkeys(FIELDS, 0)
+        for proxy in self.proxies:
+            for name, value in proxy.statistics().items():
+                total[name] += value
+        if self.stats:
+            self.stats.forwarded_in = total["frontend_messages_in"]
+            self.stats.forwarded_out = total["backend_messages_in"]
+        return total
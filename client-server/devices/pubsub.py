@@ -0,0 +1,408 @@
+# Python
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+import logging
+import threading
+
+# ZMQ
+import zmq
+
+# Package
+from proxy import shard_for, shard_url
+from serializers import dumps
+
+# XPUB subscription messages: [SUBSCRIBE | UNSUBSCRIBE, *prefix]
+SUBSCRIBE = 1
+UNSUBSCRIBE = 0
+
+
+def message_topic(frames: list[bytes]) -> Optional[bytes]:
+    """
+    Topic of a `[topic, *body]` message (`None` for a single frame).
+    """
+    return frames[0] if len(frames) > 1 else None
+
+
+class SubscriptionIndex:
+    """
+    Live subscription prefixes, fed by `XPUB` subscription messages.
+
+    `XPUB` reports the first subscription to a prefix and the last
+    unsubscription from it, so the index holds exactly the prefixes that
+    somebody downstream listens to.
+    """
+
+    def __init__(self):
+        self.prefixes: set[bytes] = set()
+        self.__lengths: dict[int, int] = {}  # Prefix length -> prefixes
+
+    def __len__(self) -> int:
+        return len(self.prefixes)
+
+    def update(self, message: bytes) -> bool:
+        """
+        Apply a subscription message. Returns `False` for other messages.
+        """
+        if not message or message[0] not in (SUBSCRIBE, UNSUBSCRIBE):
+            return False
+        prefix = bytes(message[1:])
+        size = len(prefix)
+        if message[0] == SUBSCRIBE:
+            if prefix not in self.prefixes:
+                self.prefixes.add(prefix)
+                self.__lengths[size] = self.__lengths.get(size, 0) + 1
+        elif prefix in self.prefixes:
+            self.prefixes.discard(prefix)
+            self.__lengths[size] -= 1
+            if not self.__lengths[size]:
+                del self.__lengths[size]
+        return True
+
+    def matches(self, topic: bytes) -> bool:
+        """
+        Whether any subscription is a prefix of `topic`.
+        """
+        return any(
+            topic[:size] in self.prefixes
+            for size in self.__lengths
+            if size <= len(topic)
+        )
+
+
+class Forwarder:
+    """
+    `XSUB` / `XPUB` forwarder that keeps a `SubscriptionIndex`.
+
+    Publishers connect to the `XSUB` side and subscribers to the `XPUB` side.
+    Subscriptions travel upstream to the publishers, so a `ShardedPublisher`
+    (or any `XPUB` publisher) can skip topics nobody listens to.
+
+    Mirrors the `ThreadDevice` API (`bind_in`, `bind_out`, `start`).
+    """
+
+    def __init__(self, poll_interval: int = 100):
+        """
+        Initialize a Forwarder.
+
+        Args:
+            poll_interval (int): Milliseconds between checks of the stop flag.
+        """
+        self.poll_interval = poll_interval
+        self.stats: Any = None  # `metrics.DeviceStats`
+        self.index = SubscriptionIndex()
+        self.__binds_in: list[str] = []
+        self.__binds_out: list[str] = []
+        self.__stop_event = threading.Event()
+        self.__thread = threading.Thread(target=self.run, daemon=True)
+
+    def bind_in(self, addr: str) -> None:
+        """Bind the `XSUB` (publishers) socket."""
+        self.__binds_in.append(addr)
+
+    def bind_out(self, addr: str) -> None:
+        """Bind the `XPUB` (subscribers) socket."""
+        self.__binds_out.append(addr)
+
+    def start(self) -> None:
+        """Start the forwarder thread."""
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stop the forwarder thread."""
+        self.__stop_event.set()
+        self.__thread.join()
+
+    def join(self, timeout: float | None = None) -> None:
+        self.__thread.join(timeout)
+
+    def run(self) -> None:
+        """
+        Forward messages downstream and subscriptions upstream.
+        """
+        context = zmq.Context.instance()
+        xsub = context.socket(zmq.XSUB)
+        xpub = context.socket(zmq.XPUB)
+        self.configure(xsub, xpub)
+        for addr in self.__binds_in:
+            xsub.bind(addr)
+        for addr in self.__binds_out:
+            xpub.bind(addr)
+
+        poller = zmq.Poller()
+        poller.register(xsub, zmq.POLLIN)
+        poller.register(xpub, zmq.POLLIN)
+        try:
+            while not self.__stop_event.is_set():
+                events = dict(poller.poll(self.poll_interval))
+                if xpub in events:
+                    message = xpub.recv()
+                    self.on_subscription(message, xpub)
+                    xsub.send(message)
+                if xsub in events:
+                    self.on_message(xsub.recv_multipart(), xpub)
+        finally:
+            xsub.close(linger=0)
+            xpub.close(linger=0)
+
+    def configure(self, xsub: Any, xpub: Any) -> None:
+        """
+        Set socket options before binding.
+        """
+
+    def on_subscription(self, message: bytes, xpub: Any) -> None:
+        """
+        Track a (un)subscription before it is passed upstream.
+        """
+        self.index.update(message)
+
+    def on_message(self, frames: list[bytes], xpub: Any) -> None:
+        """
+        Forward one published message.
+        """
+        xpub.send_multipart(frames)
+        if self.stats:
+            self.stats.forwarded_in += 1
+
+
+class LastValueCache(Forwarder):
+    """
+    `Forwarder` that replays the latest message of each topic to new subscribers.
+
+    Every subscription (`XPUB_VERBOSE` reports repeats too) is answered with
+    the cached messages whose topic matches it, before the live stream. Late
+    joiners get the current state without asking for it, and publishers no
+    longer need to wait for subscribers to connect. Other subscribers of the
+    same topics also receive the replayed messages. The cache subscribes to
+    every topic upstream, so publishers never skip topics behind it.
+
+    At most `max_topics` topics and `max_bytes` are kept, least recently
+    updated first out.
+
+    Publishers send `[topic, *body]` multipart messages, so the topic is the
+    first frame. Single-frame messages are forwarded but not cached (counted
+    in `uncached`): the whole frame would be its own topic, one per distinct
+    message. For other layouts pass `topic`, a callable returning the topic
+    of a message's frames (or `None` to skip it), e.g.
+    `lambda frames: frames[0].split(b" ", 1)[0]` for `b"status 5"`.
+    """
+
+    def __init__(
+        self,
+        max_topics: int = 10_000,
+        max_bytes: int = 64 << 20,
+        topic: Callable[[list[bytes]], Optional[bytes]] = message_topic,
+        **options: Any,
+    ):
+        """
+        Initialize a LastValueCache.
+
+        Args:
+            max_topics (int): Topics kept at most.
+            max_bytes (int): Message bytes kept at most.
+            topic (Callable): Topic of a message (`None`: do not cache it).
+            options (Any): `Forwarder` arguments.
+        """
+        super().__init__(**options)
+        self.max_topics = max_topics
+        self.max_bytes = max_bytes
+        self.topic = topic
+        self.nbytes = 0
+        self.replayed = 0
+        self.uncached = 0
+        self.values: OrderedDict[bytes, list[bytes]] = OrderedDict()
+
+    def configure(self, xsub: Any, xpub: Any) -> None:
+        # Cache every topic, not just the subscribed ones
+        xsub.send(bytes([SUBSCRIBE]))
+        xpub.setsockopt(zmq.XPUB_VERBOSE, 1)
+
+    def on_subscription(self, message: bytes, xpub: Any) -> None:
+        super().on_subscription(message, xpub)
+        if not message or message[0] != SUBSCRIBE:
+            return
+        prefix = message[1:]
+        for topic, frames in list(self.values.items()):
+            if topic.startswith(prefix):
+                xpub.send_multipart(frames)
+                self.replayed += 1
+
+    def on_message(self, frames: list[bytes], xpub: Any) -> None:
+        super().on_message(frames, xpub)
+        topic = self.topic(frames)
+        if topic is None:
+            self.uncached += 1
+            if self.uncached == 1:
+                logging.warning(
+                    "LastValueCache: message without a topic frame not cached"
+                )
+            return
+        size = sum(len(frame) for frame in frames)
+        previous = self.values.pop(topic, None)
+        if previous is not None:
+            self.nbytes -= sum(len(frame) for frame in previous)
+        if size > self.max_bytes:
+            return
+        self.values[topic] = frames
+        self.nbytes += size
+        while len(self.values) > self.max_topics or self.nbytes > self.max_bytes:
+            _, oldest = self.values.popitem(last=False)
+            self.nbytes -= sum(len(frame) for frame in oldest)
+
+
+class ForwarderPool:
+    """
+    `Forwarder` shards: shard `i` binds `shard_url(addr, i)` for every address.
+    """
+
+    def __init__(self, shards: int = 2, factory: type = Forwarder):
+        self.shards = shards
+        self.stats: Any = None  # `metrics.DeviceStats` (shared by every shard)
+        self.forwarders = [factory() for _ in range(shards)]
+
+    def bind_in(self, addr: str) -> None:
+        for index, forwarder in enumerate(self.forwarders):
+            forwarder.bind_in(shard_url(addr, index))
+
+    def bind_out(self, addr: str) -> None:
+        for index, forwarder in enumerate(self.forwarders):
+            forwarder.bind_out(shard_url(addr, index))
+
+    def start(self) -> None:
+        for forwarder in self.forwarders:
+            forwarder.stats = self.stats
+            forwarder.start()
+
+    def stop(self) -> None:
+        for forwarder in self.forwarders:
+            forwarder.stop()
+
+    def join(self, timeout: float | None = None) -> None:
+        for forwarder in self.forwarders:
+            forwarder.join(timeout)
+
+
+class ShardedPublisher:
+    """
+    Publish each topic to the forwarder shard its name hashes to.
+
+    Uses one `XPUB` socket per shard, which receives the subscriptions that
+    reach that shard. `publish()` drops topics without subscribers before
+    encoding them. For use with the sync context.
+    """
+
+    def __init__(self, context: Any, endpoint: str, shards: int = 1):
+        """
+        Initialize a ShardedPublisher.
+
+        Args:
+            context (Any): A sync `zmq.Context`.
+            endpoint (str): The forwarder `XSUB` address (shard 0).
+            shards (int): Number of forwarder shards.
+        """
+        self.shards = shards
+        self.sockets = []
+        self.indexes = [SubscriptionIndex() for _ in range(shards)]
+        self.skipped = 0
+        for index in range(shards):
+            socket = context.socket(zmq.XPUB)
+            socket.connect(shard_url(endpoint, index))
+            self.sockets.append(socket)
+
+    def has_subscribers(self, topic: bytes) -> bool:
+        """
+        Whether anybody listens to `topic` (after reading new subscriptions).
+        """
+        shard = shard_for(topic, self.shards)
+        self.__refresh(shard)
+        return self.indexes[shard].matches(topic)
+
+    def publish(self, topic: bytes, obj: Any, codec: str = "raw") -> bool:
+        """
+        Encode and send `[topic, tag, *frames]` if anybody listens.
+
+        Returns whether the message was sent.
+        """
+        shard = shard_for(topic, self.shards)
+        self.__refresh(shard)
+        if not self.indexes[shard].matches(topic):
+            self.skipped += 1
+            return False
+        self.sockets[shard].send_multipart([topic, *dumps(obj, codec)])
+        return True
+
+    def wait(self, topic: bytes, timeout: Optional[float] = None) -> bool:
+        """
+        Block until somebody subscribes to `topic` (or `timeout` seconds pass).
+        """
+        shard = shard_for(topic, self.shards)
+        socket, index = self.sockets[shard], self.indexes[shard]
+        poll = None if timeout is None else int(timeout * 1000)
+        while not index.matches(topic):
+            if not socket.poll(poll):
+                return False
+            index.update(socket.recv())
+        return True
+
+    def close(self) -> None:
+        for socket in self.sockets:
+            socket.close(linger=0)
+
+    def __refresh(self, shard: int) -> None:
+        """
+        Apply the subscription messages waiting on a shard socket.
+        """
+        socket, index = self.sockets[shard], self.indexes[shard]
+        while socket.poll(0):
+            index.update(socket.recv())
+
+
+class ShardedSubscriber:
+    """
+    `SUB` sockets for every forwarder shard.
+
+    `subscribe(topic)` only subscribes on the topic's shard; use
+    `subscribe_prefix()` for prefixes that span topics on several shards.
+    For use with the sync context.
+    """
+
+    def __init__(self, context: Any, endpoint: str, shards: int = 1):
+        """
+        Initialize a ShardedSubscriber.
+
+        Args:
+            context (Any): A sync `zmq.Context`.
+            endpoint (str): The forwarder `XPUB` address (shard 0).
+            shards (int): Number of forwarder shards.
+        """
+        self.shards = shards
+        self.sockets = []
+        self.poller = zmq.Poller()
+        for index in range(shards):
+            socket = context.socket(zmq.SUB)
+            socket.connect(shard_url(endpoint, index))
+            self.poller.register(socket, zmq.POLLIN)
+            self.sockets.append(socket)
+
+    def subscribe(self, topic: bytes) -> None:
+        """Subscribe to one topic on its shard."""
+        self.sockets[shard_for(topic, self.shards)].subscribe(topic)
+
+    def subscribe_prefix(self, prefix: bytes) -> None:
+        """Subscribe to a prefix on every shard."""
+        for socket in self.sockets:
+            socket.subscribe(prefix)
+
+    def unsubscribe(self, topic: bytes) -> None:
+        self.sockets[shard_for(topic, self.shards)].unsubscribe(topic)
+
+    def recv_multipart(self, timeout: Optional[int] = None) -> Optional[list[Any]]:
+        """
+        Next message from any shard (`None` after `timeout` milliseconds).
+        """
+        for socket, _ in self.poller.poll(timeout):
+            return socket.recv_multipart()
+        return None
+
+    def close(self) -> None:
+        for socket in self.sockets:
+            socket.close(linger=0)
@@ -0,0 +1,285 @@
+# Python
+from collections import OrderedDict
+from itertools import count
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import logging
+import os
+import random
+import struct
+import time
+
+# ZMQ
+import zmq
+
+# Package
+from metrics import Histogram
+from serializers import dumps, loads
+from zerocopy import nbytes, send_options, to_bytes
+
+# Idempotent request IDs: MARKER + client (8 random bytes) + counter
+MARKER = b"\xfe"
+COUNTER = struct.Struct(">Q")
+ID_SIZE = len(MARKER) + 8 + COUNTER.size
+
+# Reply body `[ERROR, message]` from a server whose handler raised. Ordinary
+# replies are one frame, or start with a codec tag, so it cannot be mistaken
+ERROR = b"\x05"
+
+
+def request_key(envelope: list[bytes]) -> Optional[bytes]:
+    """
+    The idempotent request ID of an envelope, if the client sent one.
+
+    Clients put the ID right before the empty delimiter, so it is found the
+    same way whether the request came directly or through a device.
+    """
+    if len(envelope) >= 2:
+        key = envelope[-2]
+        if len(key) == ID_SIZE and key[:1] == MARKER:
+            return key
+    return None
+
+
+def error_reply(error: BaseException) -> list[bytes]:
+    """
+    The reply body telling the client that its request failed.
+    """
+    return [ERROR, f"{type(error).__name__}: {error}".encode("utf-8")]
+
+
+def check_reply(reply: list[Any]) -> list[Any]:
+    """
+    Return the reply body, or raise the error the server sent instead.
+
+    Raises:
+        RuntimeError: When the server's handler raised.
+    """
+    if len(reply) == 2 and to_bytes(reply[0]) == ERROR:
+        raise RuntimeError(to_bytes(reply[1]).decode("utf-8", "replace"))
+    return reply
+
+
+class Deduplicator:
+    """
+    Remember the replies to the last `size` idempotent requests.
+
+    A retried or hedged request is answered with the stored reply instead of
+    running the handler again. A duplicate that arrives while the first copy
+    is still running waits for the same result.
+    """
+
+    def __init__(self, size: int = 10_000):
+        self.size = size
+        self.hits = 0
+        self.__replies: OrderedDict[bytes, asyncio.Future] = OrderedDict()
+
+    async def reply(
+        self, key: bytes, compute: Callable[[], Awaitable[list[Any]]]
+    ) -> list[Any]:
+        """
+        Return the reply for `key`, running `compute` only the first time.
+        """
+        future = self.__replies.get(key)
+        if future is not None:
+            self.__replies.move_to_end(key)
+            self.hits += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self.__replies[key] = future
+        while len(self.__replies) > self.size:
+            self.__replies.popitem(last=False)
+        try:
+            reply = await compute()
+        except BaseException as e:
+            # Failures are not remembered, the next retry runs again
+            if self.__replies.get(key) is future:
+                del self.__replies[key]
+            future.set_exception(e)
+            future.exception()  # Retrieved, even without duplicates
+            raise
+        future.set_result(reply)
+        return reply
+
+
+class ReliableClient:
+    """
+    Lazy Pirate client: retries on timeout and optionally hedges requests.
+
+    Each request is sent from a `DEALER` socket as `[request_id, b"", *body]`,
+    the same layout as `AsyncRPCClient`, so it works with `REP` servers, the
+    `queue` device and `AsyncRouterServer`. Request IDs are unique across
+    clients and stay the same for every retry and hedge, which lets servers
+    with `dedup` answer a replayed request without running it twice.
+
+    When no reply arrives within `timeout`, the socket is closed and
+    recreated (dropping anything queued on it) and the request is sent again
+    after a jittered exponential backoff, up to `retries` times.
+
+    With a `hedge` endpoint, a duplicate request is sent there once the first
+    has been pending for `hedge_delay` (default: the p95 of observed latency)
+    and whichever reply arrives first wins. Only use retries and hedging for
+    idempotent requests, or against servers that deduplicate.
+
+    For use with the sync context (`is_sync=True`).
+    """
+
+    def __init__(
+        self,
+        node: Any,
+        retries: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 2.0,
+        hedge: Optional[str] = None,
+        hedge_delay: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Initialize a ReliableClient.
+
+        Args:
+            node (ZeroMQ): A `frontend` node using the sync context.
+            retries (int): Attempts after the first before giving up.
+            backoff (float): Base delay in seconds before a retry.
+            max_backoff (float): Upper bound for the delay before a retry.
+            hedge (str): Second endpoint for hedged requests.
+            hedge_delay (float): Seconds before hedging (default: observed p95).
+            timeout (float): Seconds to wait for each attempt.
+        """
+        self.node = node
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout if timeout is not None else node.timeout / 1000
+        self.stats = node.metrics and node.metrics.socket(
+            f"reliable:{node.url.frontend}"
+        )
+        self.latency_us = self.stats.latency_us if self.stats else Histogram()
+        self.__client = MARKER + os.urandom(8)
+        self.__ids = count(1)
+        self.__sockets: dict[str, Any] = {}
+
+    def __enter__(self) -> "ReliableClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def request(self, payload: Any) -> Any:
+        """
+        Send a request and return its reply, retrying on timeout.
+
+        Raises:
+            zmq.Again: When every attempt timed out.
+            RuntimeError: When the server's handler raised.
+        """
+        reply = check_reply(self.__request([payload]))
+        return reply[0] if len(reply) == 1 else reply
+
+    def call(self, obj: Any, codec: Optional[str] = None) -> Any:
+        """
+        Encode `obj` with `codec` (default `node.codec`) and decode the reply.
+        """
+        reply = check_reply(self.__request(dumps(obj, codec or self.node.codec)))
+        return loads(reply, self.node.codecs)
+
+    def close(self) -> None:
+        """
+        Close the sockets.
+        """
+        for socket in self.__sockets.values():
+            socket.close(linger=0)
+        self.__sockets.clear()
+
+    def __request(self, body: list[Any]) -> list[Any]:
+        """
+        Send `[request_id, b"", *body]` until a matching reply arrives.
+        """
+        request_id = self.__client + COUNTER.pack(next(self.__ids))
+        frames = [request_id, b"", *body]
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.__delay(attempt))
+                if self.stats:
+                    self.stats.retries += 1
+            reply = self.__attempt(request_id, frames)
+            if reply is not None:
+                if self.stats:
+                    self.stats.sent(sum(nbytes(frame) for frame in body))
+                    self.stats.received(sum(nbytes(frame) for frame in reply))
+                return reply
+            # Lazy Pirate: a socket that timed out may hold a stuck request
+            self.close()
+            if self.stats:
+                self.stats.timeouts += 1
+                self.stats.reconnects += 1
+        logging.error(f"No reply after {self.retries + 1} attempts")
+        raise zmq.Again()
+
+    def __attempt(self, request_id: bytes, frames: list[Any]) -> Optional[list[Any]]:
+        """
+        Send once (plus a hedge) and wait for a reply until the timeout.
+
+        Records the latency of the copy that answered (from its own send), so
+        retries, backoff and the hedge delay do not inflate `latency_us`.
+        """
+        options = send_options(frames, self.node.zero_copy, self.node.copy_threshold)
+        poller = zmq.Poller()
+        primary = self.__socket(self.node.url.frontend)
+        primary.send_multipart(frames, **options)
+        poller.register(primary, zmq.POLLIN)
+        sent = {primary: time.perf_counter_ns()}
+
+        now = time.monotonic()
+        deadline = now + self.timeout
+        hedge_at = now + self.__hedge_delay() if self.hedge else deadline
+        while (now := time.monotonic()) < deadline:
+            if now >= hedge_at:
+                secondary = self.__socket(self.hedge)
+                secondary.send_multipart(frames, **options)
+                poller.register(secondary, zmq.POLLIN)
+                sent[secondary] = time.perf_counter_ns()
+                hedge_at = deadline
+                if self.stats:
+                    self.stats.hedged += 1
+            wait = min(deadline, hedge_at) - now
+            for socket, _ in poller.poll(max(wait, 0) * 1000):
+                reply = socket.recv_multipart(copy=not self.node.zero_copy)
+                # Replies to earlier attempts are dropped
+                if len(reply) >= 2 and to_bytes(reply[0]) == request_id:
+                    elapsed = time.perf_counter_ns() - sent[socket]
+                    self.latency_us.record(elapsed // 1000)
+                    return reply[2:]
+        return None
+
+    def __socket(self, endpoint: str) -> Any:
+        """
+        The `DEALER` socket for an endpoint, (re)created on demand.
+        """
+        socket = self.__sockets.get(endpoint)
+        if socket is None:
+            socket = self.node.context.socket(zmq.DEALER)
+            self.node.configure(socket)
+            socket.setsockopt(zmq.LINGER, 0)
+            socket.connect(endpoint)
+            self.__sockets[endpoint] = socket
+        return socket
+
+    def __delay(self, attempt: int) -> float:
+        """
+        Full-jitter exponential backoff.
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def __hedge_delay(self) -> float:
+        """
+        Seconds before hedging: `hedge_delay` or the observed p95.
+        """
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        if self.latency_us.count < 20:
+            return self.timeout / 2
+        return self.latency_us.percentile(0.95) / 1e6
@@ -0,0 +1,313 @@
+# Python
+from itertools import count
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import logging
+import struct
+import time
+
+# ZMQ
+import zmq
+import zmq.asyncio
+from zmq.utils.monitor import parse_monitor_message
+
+# Package
+from manager import ZeroMQ
+from reliable import Deduplicator, check_reply, request_key
+from serializers import SAFE_CODECS, dumps, loads, peek
+from zerocopy import nbytes, send_options, split_envelope, to_bytes, view
+
+REQUEST_ID = struct.Struct(">Q")
+
+
+class AsyncRPCClient:
+    """
+    Pipelined RPC client on a `DEALER` socket.
+
+    Each request is sent as `[request_id, b"", payload]`. The request ID sits in
+    the envelope, so `REP` servers (directly or behind the `queue` device) echo
+    it back untouched and replies can be matched to their `Future`.
+
+    With `node.zero_copy`, large payloads are sent without copying and replies
+    are returned as `memoryview`s.
+
+    With `node.heartbeat_ivl`, libzmq drops a server that stops answering
+    heartbeats and the pending requests fail at once with `zmq.Again` instead
+    of waiting out their timeout.
+    """
+
+    def __init__(self, node: ZeroMQ, timeout: Optional[float] = None):
+        """
+        Initialize an AsyncRPCClient.
+
+        Args:
+            node (ZeroMQ): A `frontend` node using the `zmq.asyncio` context.
+            timeout (float): Default per-request timeout in seconds.
+        """
+        self.node = node
+        self.timeout = timeout if timeout is not None else node.timeout / 1000
+        self.socket: Any = None
+        self.stats = node.metrics and node.metrics.socket(f"rpc:{node.url.frontend}")
+        self.__ids = count(1)
+        self.__pending: dict[bytes, asyncio.Future] = {}
+        self.__reader: Optional[asyncio.Task] = None
+        self.__monitor: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "AsyncRPCClient":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        """
+        Connect the `DEALER` socket and start reading replies.
+        """
+        self.socket = self.node.context.socket(zmq.DEALER)
+        self.node.configure(self.socket)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        if self.node.heartbeat_ivl:
+            monitor = self.socket.get_monitor_socket(zmq.EVENT_DISCONNECTED)
+            self.__monitor = asyncio.create_task(self.__watch(monitor))
+        self.socket.connect(self.node.url.frontend)
+        self.__reader = asyncio.create_task(self.__read())
+
+    async def close(self) -> None:
+        """
+        Stop reading, fail pending requests and close the socket.
+        """
+        for task in (self.__reader, self.__monitor):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.__reader = self.__monitor = None
+        for future in self.__pending.values():
+            if not future.done():
+                future.cancel()
+        self.__pending.clear()
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    async def request(self, payload: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Send a request and wait for its reply.
+
+        With `zero_copy`, `payload` must not be modified until the reply arrives.
+
+        Raises:
+            zmq.Again: When no reply arrives within the timeout.
+            RuntimeError: When the server's handler raised.
+        """
+        reply = check_reply(await self.__request([payload], timeout))
+        return reply[0] if len(reply) == 1 else reply
+
+    async def call(
+        self, obj: Any, codec: Optional[str] = None, timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Encode `obj` with `codec` (default `node.codec`) and decode the reply.
+        """
+        body = dumps(obj, codec or self.node.codec)
+        reply = check_reply(await self.__request(body, timeout))
+        return loads(reply, self.node.codecs)
+
+    async def __request(self, body: list[Any], timeout: Optional[float]) -> list[Any]:
+        """
+        Send `[request_id, b"", *body]` and wait for the matching reply body.
+        """
+        request_id = REQUEST_ID.pack(next(self.__ids))
+        future = asyncio.get_running_loop().create_future()
+        self.__pending[request_id] = future
+        started = time.perf_counter_ns()
+        try:
+            frames = [request_id, b"", *body]
+            await self.socket.send_multipart(
+                frames,
+                **send_options(frames, self.node.zero_copy, self.node.copy_threshold),
+            )
+            if self.stats:
+                self.stats.sent(sum(nbytes(frame) for frame in body))
+            reply = await asyncio.wait_for(
+                future, timeout if timeout is not None else self.timeout
+            )
+            if self.stats:
+                self.stats.received(sum(nbytes(frame) for frame in reply))
+                self.stats.latency_us.record((time.perf_counter_ns() - started) // 1000)
+            return reply
+        except asyncio.TimeoutError:
+            if self.stats:
+                self.stats.timeouts += 1
+            raise zmq.Again() from None
+        finally:
+            # Late replies for timed out or cancelled requests are dropped
+            self.__pending.pop(request_id, None)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.__pending)
+
+    async def __read(self) -> None:
+        """
+        Resolve pending futures as replies arrive.
+        """
+        while True:
+            frames = await self.socket.recv_multipart(copy=not self.node.zero_copy)
+            if len(frames) < 3 or len(frames[1]):
+                logging.warning(f"Dropping malformed RPC reply: {frames!r}")
+                continue
+            future = self.__pending.get(to_bytes(frames[0]))
+            if future is not None and not future.done():
+                future.set_result([view(frame) for frame in frames[2:]])
+
+    async def __watch(self, monitor: Any) -> None:
+        """
+        Fail pending requests when the server connection is dropped.
+        """
+        try:
+            while True:
+                event = parse_monitor_message(await monitor.recv_multipart())
+                if event["event"] != zmq.EVENT_DISCONNECTED or not self.__pending:
+                    continue
+                logging.warning(
+                    f"Lost {event['endpoint']!r}, failing {len(self.__pending)} requests"
+                )
+                if self.stats:
+                    self.stats.reconnects += 1
+                for future in self.__pending.values():
+                    if not future.done():
+                        future.set_exception(zmq.Again())
+        finally:
+            self.socket.disable_monitor()
+            monitor.close(linger=0)
+
+
+class AsyncRouterServer:
+    """
+    Concurrent server on a `ROUTER` socket.
+
+    Every request runs as its own task, so a handler waiting on I/O no longer
+    holds up other clients. Replies are routed back using the request envelope
+    (identities up to and including the empty delimiter frame).
+
+    With `node.zero_copy`, handlers receive `memoryview`s and large replies are
+    sent without copying. With `objects`, handlers receive and return decoded
+    objects, and each reply uses the codec of its request. With `dedup`,
+    retried or hedged requests from a `ReliableClient` reuse the first reply.
+    """
+
+    def __init__(
+        self,
+        node: ZeroMQ,
+        handler: Callable[[Any], Awaitable[Any]],
+        concurrency: int = 100,
+        objects: bool = False,
+        dedup: int = 0,
+        codecs: tuple[str, ...] = SAFE_CODECS,
+    ):
+        """
+        Initialize an AsyncRouterServer.
+
+        Args:
+            node (ZeroMQ): A `backend` node using the `zmq.asyncio` context.
+            handler (Callable): Coroutine turning a request into a reply.
+            concurrency (int): Max requests handled at the same time.
+            objects (bool): Decode requests and encode replies (`serializers`).
+                Requests are only decoded with `codecs`; never allow `pickle`
+                for untrusted clients, unpickling runs their code.
+            dedup (int): Replies remembered for duplicate requests (0 disables).
+            codecs (tuple): Codec names accepted with `objects`.
+        """
+        self.node = node
+        self.handler = handler
+        self.concurrency = concurrency
+        self.objects = objects
+        self.codecs = codecs
+        self.dedup = Deduplicator(dedup) if dedup else None
+        self.socket: Any = None
+        self.stats = node.metrics and node.metrics.socket(f"router:{node.url.backend}")
+        self.__limit = asyncio.Semaphore(concurrency)
+        self.__tasks: set[asyncio.Task] = set()
+
+    def start(self, with_device: bool = False) -> None:
+        """
+        Bind the `ROUTER` socket (or connect it to the `queue` device).
+        """
+        self.socket = self.node.context.socket(zmq.ROUTER)
+        self.node.configure(self.socket)
+        if with_device:
+            self.socket.connect(self.node.url.backend)
+        else:
+            self.socket.bind(self.node.url.backend)
+
+    async def serve(self) -> None:
+        """
+        Receive requests and dispatch each one to its own task.
+        """
+        while True:
+            # Stop reading while `concurrency` requests are in progress
+            await self.__limit.acquire()
+            try:
+                frames = await self.socket.recv_multipart(copy=not self.node.zero_copy)
+            except BaseException:
+                self.__limit.release()
+                raise
+            task = asyncio.create_task(self.__handle(frames))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    async def close(self) -> None:
+        """
+        Wait for in-flight requests, then close the socket.
+        """
+        if self.__tasks:
+            await asyncio.gather(*self.__tasks, return_exceptions=True)
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.__tasks)
+
+    async def __handle(self, frames: list[Any]) -> None:
+        """
+        Run the handler and route the reply back to the caller.
+        """
+        try:
+            envelope, body = split_envelope(frames)
+            if not body:
+                logging.warning(f"Dropping malformed request: {frames!r}")
+                return
+            body = [view(frame) for frame in body]
+            started = time.perf_counter_ns()
+            key = self.dedup and request_key(envelope)
+            if key:
+                reply = await self.dedup.reply(key, lambda: self.__reply(body))
+            else:
+                reply = await self.__reply(body)
+            await self.socket.send_multipart(
+                [*envelope, *reply],
+                **send_options(reply, self.node.zero_copy, self.node.copy_threshold),
+            )
+            if self.stats:
+                self.stats.received(sum(nbytes(frame) for frame in body))
+                self.stats.sent(sum(nbytes(frame) for frame in reply))
+                self.stats.latency_us.record((time.perf_counter_ns() - started) // 1000)
+        except Exception as e:
+            logging.exception(e)
+        finally:
+            self.__limit.release()
+
+    async def __reply(self, body: list[Any]) -> list[Any]:
+        """
+        Run the handler on a request body and return the reply frames.
+        """
+        if self.objects:
+            codec = peek(body, self.codecs)
+            return dumps(await self.handler(codec.decode(body[1:])), codec)
+        return [await self.handler(body[0] if len(body) == 1 else body)]
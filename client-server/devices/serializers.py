@@ -0,0 +1,176 @@
+# Python
+from abc import ABC, abstractmethod
+from typing import Any
+import pickle
+
+# Msgpack
+import msgpack
+
+
+class Codec(ABC):
+    """
+    Turns objects into frames and back.
+
+    Messages are sent as `[tag, *frames]` so the receiver can pick the same
+    codec (and reply with it) without prior agreement.
+    """
+
+    name: str
+    tag: bytes
+
+    @abstractmethod
+    def encode(self, obj: Any) -> list[Any]:
+        """Encode an object into one or more frames."""
+        pass
+
+    @abstractmethod
+    def decode(self, frames: list[Any]) -> Any:
+        """Decode frames produced by `encode`."""
+        pass
+
+
+class RawCodec(Codec):
+    """
+    Bytes as-is (any buffer, or a list of buffers as multiple frames).
+    """
+
+    name = "raw"
+    tag = b"r"
+
+    def encode(self, obj: Any) -> list[Any]:
+        return list(obj) if isinstance(obj, (list, tuple)) else [obj]
+
+    def decode(self, frames: list[Any]) -> Any:
+        return frames[0] if len(frames) == 1 else frames
+
+
+class MsgpackCodec(Codec):
+    """
+    Compact binary encoding.
+    """
+
+    name = "msgpack"
+    tag = b"m"
+
+    def encode(self, obj: Any) -> list[Any]:
+        return [msgpack.packb(obj, use_bin_type=True)]
+
+    def decode(self, frames: list[Any]) -> Any:
+        return msgpack.unpackb(frames[0], raw=False)
+
+
+class PickleCodec(Codec):
+    """
+    Pickle protocol 5 with out-of-band buffers.
+
+    Buffers of at least `min_buffer` bytes (e.g. NumPy arrays) are sent as extra
+    frames instead of being copied into the pickle. Only use with trusted peers.
+    """
+
+    name = "pickle"
+    tag = b"p"
+
+    def __init__(self, min_buffer: int = 1024):
+        self.min_buffer = min_buffer
+
+    def encode(self, obj: Any) -> list[Any]:
+        buffers: list[memoryview] = []
+
+        def out_of_band(buffer: pickle.PickleBuffer) -> bool:
+            # Returning `True` keeps the buffer in-band
+            try:
+                view = buffer.raw()
+            except BufferError:
+                return True
+            if view.nbytes < self.min_buffer:
+                return True
+            buffers.append(view)
+            return False
+
+        body = pickle.dumps(obj, protocol=5, buffer_callback=out_of_band)
+        return [body, *buffers]
+
+    def decode(self, frames: list[Any]) -> Any:
+        return pickle.loads(frames[0], buffers=frames[1:])
+
+
+CODECS: dict[bytes, Codec] = {}
+
+# Codecs decoded by default: `pickle` runs code chosen by the sender, so it
+# must be allowed explicitly, and only between trusted peers
+SAFE_CODECS = ("raw", "msgpack")
+
+
+def register(codec: Codec) -> Codec:
+    """
+    Make a codec available by `name` and wire `tag`.
+    """
+    CODECS[codec.tag] = codec
+    return codec
+
+
+def get_codec(codec: str | bytes | Codec) -> Codec:
+    """
+    Look up a codec by name, tag or instance.
+    """
+    if isinstance(codec, Codec):
+        return codec
+    for item in CODECS.values():
+        if codec in (item.name, item.tag):
+            return item
+    raise KeyError(f"Unknown codec: {codec!r}")
+
+
+def dumps(obj: Any, codec: str | bytes | Codec = "raw") -> list[Any]:
+    """
+    Encode an object as `[tag, *frames]`.
+    """
+    codec = get_codec(codec)
+    return [codec.tag, *codec.encode(obj)]
+
+
+def loads(frames: list[Any], codecs: tuple[str, ...] = SAFE_CODECS) -> Any:
+    """
+    Decode `[tag, *frames]` with the codec named by the tag.
+
+    Raises:
+        ValueError: When the tag is unknown or names a codec outside `codecs`.
+    """
+    return peek(frames, codecs).decode(frames[1:])
+
+
+def peek(frames: list[Any], codecs: tuple[str, ...] = SAFE_CODECS) -> Codec:
+    """
+    The codec a message was encoded with (one of the allowed `codecs`).
+
+    Raises:
+        ValueError: When the tag is unknown or names a codec outside `codecs`.
+    """
+    try:
+        codec = get_codec(bytes(frames[0]))
+    except KeyError:
+        raise ValueError(f"Unknown codec tag: {bytes(frames[0])!r}") from None
+    if codec.name not in codecs:
+        raise ValueError(f"Codec {codec.name!r} is not allowed (codecs={codecs})")
+    return codec
+
+
+def publish(socket: Any, topic: bytes, obj: Any, codec: str = "raw") -> Any:
+    """
+    Send `[topic, tag, *frames]` on a `PUB` socket.
+    """
+    return socket.send_multipart([topic, *dumps(obj, codec)])
+
+
+def unpack(
+    frames: list[Any], codecs: tuple[str, ...] = SAFE_CODECS
+) -> tuple[bytes, Any]:
+    """
+    Split a message sent with `publish` into `(topic, obj)`.
+    """
+    return bytes(frames[0]), loads(frames[1:], codecs)
+
+
+register(RawCodec())
+register(MsgpackCodec())
+register(PickleCodec())
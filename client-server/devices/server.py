@@ -1,12 +1,19 @@
-import asyncio
+from typing import Optional
 import multiprocessing
-import time
 import sys
-import os
 
+# ZMQ
+import zmq
 
 # Package
-from .manager import ZeroMQ
+from manager import ZeroMQ
+from broker import BrokerWorker
+from cache import ResponseCache
+from device import METRICS
+from durable import DurableWorker
+from launcher import LoadSample, autoscale, serve
+from metrics import scrape, total
+from rpc import AsyncRouterServer
 
 
 async def server(uid):
@@ -28,35 +35,110 @@ async def server(uid):
         await node.socket.send(reply.encode("utf-8"))
 
 
-def start_server(port):
-    # Loop Policy
-    if os.name == "nt":
-        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+async def router_server(uid, concurrency: int = 100):
+    # Server Node
+    node = ZeroMQ()
 
-    # Run Server
-    asyncio.run(server(port))
+    async def handler(message: bytes) -> bytes:
+        print(f"Server ID {uid} Received: {message.decode('utf-8')}")
+        return f"World from {uid}".encode("utf-8")
 
+    # Connect (requests are handled concurrently)
+    server = AsyncRouterServer(node, handler, concurrency=concurrency)
+    server.start(with_device=True)
 
-def main(shutdown_event):
-    total_count = 4
-    processes = []
+    # Server
+    print(f"Router Server running ID: {uid}")
+    await server.serve()
+
+
+async def balanced_server(uid, credit: int = 1):
+    # Server Node (the device must use `network_type="balancer"`)
+    node = ZeroMQ(network_type="balancer")
+
+    async def handler(message: bytes) -> bytes:
+        print(f"Server ID {uid} Received: {message.decode('utf-8')}")
+        return f"World from {uid}".encode("utf-8")
 
-    # Starting Servers. . .
-    for uid in range(total_count):
-        process = multiprocessing.Process(target=start_server, args=(uid,))
-        process.start()
-        processes.append(process)
+    # Connect (announces `credit` free slots to the broker)
+    worker = BrokerWorker(node.context, node.url.backend, credit=credit)
+    await worker.start()
 
+    # Server (unregisters from the broker before exiting)
+    print(f"Balanced Server running ID: {uid}")
     try:
-        while not shutdown_event.is_set():
-            time.sleep(1)
-    except KeyboardInterrupt:
-        shutdown_event.set()
-
-    # Stopping Servers. . .
-    for process in processes:
-        process.terminate()
-        process.join()
+        await worker.serve(handler)
+    finally:
+        await worker.drain()
+
+
+async def durable_server(uid, credit: int = 16):
+    # Server Node (the device must use `network_type="durable"`)
+    node = ZeroMQ(network_type="durable")
+
+    async def handler(message: bytes) -> None:
+        print(f"Server ID {uid} Received: {bytes(message).decode('utf-8')}")
+
+    # Connect (tasks are acknowledged once the handler returns)
+    worker = DurableWorker(node.context, node.url.backend, credit=credit)
+    await worker.start()
+
+    # Server
+    print(f"Durable Server running ID: {uid}")
+    await worker.serve(handler)
+
+
+async def cached_server(uid, ttl: float = 1.0):
+    # Server Node
+    node = ZeroMQ()
+
+    async def handler(message: bytes) -> bytes:
+        print(f"Server ID {uid} Received: {message.decode('utf-8')}")
+        return f"World from {uid}".encode("utf-8")
+
+    # Connect
+    node.backend(True)
+
+    # Server (repeated requests within `ttl` skip the handler)
+    print(f"Cached Server running ID: {uid}")
+    await node.serve(handler, cache=ResponseCache(ttl=ttl))
+
+
+def broker_load(endpoint: str = METRICS) -> Optional[LoadSample]:
+    """
+    Queue depth and in-flight requests of the `balancer` device.
+
+    Read from the device's metrics endpoint (`None` while it does not answer).
+    """
+    try:
+        samples = scrape(endpoint)
+    except zmq.Again:
+        return None
+    return LoadSample(
+        queue_depth=int(total(samples, "zmq_queue_depth")),
+        in_flight=int(total(samples, "zmq_in_flight")),
+    )
+
+
+def balanced_main(shutdown_event, min_count: int = 1, max_count: int = 8):
+    # Balanced servers, as many as the broker's load calls for
+    # (run `device.balancer` for the device)
+    autoscale(
+        balanced_server,
+        broker_load,
+        shutdown_event,
+        min_workers=min_count,
+        max_workers=max_count,
+    )
+
+    sys.exit(0)
+
+
+def main(shutdown_event):
+    total_count = 4
+
+    # Servers (supervised, drained on shutdown)
+    serve(server, [(uid,) for uid in range(total_count)], shutdown_event)
 
     sys.exit(0)
 
@@ -0,0 +1,300 @@
+# Python
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Optional
+from urllib.parse import urlsplit
+import ctypes
+import hashlib
+import socket
+import struct
+import threading
+import time
+import weakref
+
+# Package
+from zerocopy import nbytes, to_bytes
+
+# Tag frame ahead of every message body: version, then the index of each
+# descriptor frame in the body
+TAG = b"\x01"
+INDEX = struct.Struct(">H")
+
+# Descriptor frame: host + offset + length + generation + ring name
+DESCRIPTOR = struct.Struct(">8sQQI")
+
+# Slot header inside the ring: generation, readers expected, readers done,
+# reserved, slot size, lease deadline (`time.monotonic()`)
+HEADER = struct.Struct("<IIIIQd")
+GENERATION = struct.Struct("<I")
+DONE = struct.Struct("<I")
+DONE_OFFSET = 8
+ALIGN = 64
+
+HOST = hashlib.blake2b(socket.gethostname().encode("utf-8"), digest_size=8).digest()
+LOOPBACK = {"localhost", "127.0.0.1", "::1", socket.gethostname()}
+
+# Rings created by this process (the resource tracker unlinks them at exit)
+OWNED: set[bytes] = set()
+
+
+def is_local(endpoint: Optional[str]) -> bool:
+    """
+    Whether the peer at `endpoint` runs on this host (`inproc`, `ipc`, loopback).
+    """
+    if not endpoint:
+        return False
+    url = urlsplit(endpoint)
+    if url.scheme in ("inproc", "ipc"):
+        return True
+    host = url.hostname or ""
+    return host in LOOPBACK or host.startswith("127.")
+
+
+def tag(indices: list[int]) -> bytes:
+    """
+    The tag frame of a message body with descriptors at `indices`.
+    """
+    return TAG + b"".join(INDEX.pack(index) for index in indices)
+
+
+def untag(frame: Any) -> list[int]:
+    """
+    The descriptor indices of a tag frame.
+
+    Raises:
+        ValueError: When the frame is not a tag (the sender has no shared memory).
+    """
+    data = to_bytes(frame)
+    if data[:1] != TAG or (len(data) - 1) % INDEX.size:
+        raise ValueError("Message without a shared-memory tag frame")
+    return [index for (index,) in INDEX.iter_unpack(data[1:])]
+
+
+def release(buffer: Any, offset: int, generation: int) -> None:
+    """
+    Count one reader done with a slot, unless the slot was reused meanwhile.
+
+    Readers are not synchronized: a lost update undercounts, which only
+    keeps the slot until its lease ends.
+    """
+    try:
+        if GENERATION.unpack_from(buffer, offset)[0] != generation:
+            return
+        (done,) = DONE.unpack_from(buffer, offset + DONE_OFFSET)
+        DONE.pack_into(buffer, offset + DONE_OFFSET, done + 1)
+    except ValueError:
+        pass  # The ring is unmapped already (shutting down)
+
+
+class SharedRing:
+    """
+    Single-writer ring of payload slots in shared memory.
+
+    `put()` copies a payload into the next free slot and returns a small
+    descriptor frame to send instead. The writer reuses slots in order, once
+    all the `readers` given to `put()` are done with a slot or its `lease`
+    has run out, whichever comes first. The lease frees the slots of messages
+    that were never read (dropped, or queued for a peer that went away) and
+    the slots of fan-out messages (`readers=0`, the number of subscribers is
+    unknown). When the ring is full `put()` returns `None` and the payload
+    should be sent inline.
+    """
+
+    def __init__(self, size: int = 64 << 20, lease: float = 5.0):
+        """
+        Initialize a SharedRing.
+
+        Args:
+            size (int): Bytes of shared memory for payloads and slot headers.
+            lease (float): Seconds a slot stays valid for its readers.
+        """
+        self.size = size - size % ALIGN
+        self.lease = lease
+        self.shm = SharedMemory(create=True, size=self.size)
+        self.name = self.shm.name.encode("utf-8")
+        OWNED.add(self.name)
+        self.expired = 0  # Slots reclaimed by the lease before all readers were done
+        self.__head = 0  # Next slot to write
+        self.__tail = 0  # Oldest slot still in use
+        self.__used = 0
+        self.__generation = 0
+        self.__lock = threading.Lock()
+
+    def put(self, data: Any, readers: int = 1) -> Optional[bytes]:
+        """
+        Copy `data` into the ring and return its descriptor (`None` when full).
+
+        Args:
+            data (Any): The payload.
+            readers (int): Receivers of the descriptor (0 when unknown).
+        """
+        length = nbytes(data)
+        total = -(-(HEADER.size + length) // ALIGN) * ALIGN
+        with self.__lock:
+            self.__reclaim()
+            if self.size - self.__used < total:
+                return None
+            if self.__used and self.__head < self.__tail:
+                # Wrapped: the free space is between head and tail
+                if self.__tail - self.__head < total:
+                    return None
+            elif self.__head + total > self.size:
+                # Skip the end of the ring and continue at the start
+                if self.__tail < total:
+                    return None
+                gap = self.size - self.__head
+                HEADER.pack_into(self.shm.buf, self.__head, 0, 0, 0, 0, gap, 0.0)
+                self.__used += gap
+                self.__head = 0
+
+            offset = self.__head
+            self.__generation = self.__generation % 0xFFFFFFFF + 1
+            generation = self.__generation
+            expires = time.monotonic() + self.lease
+            HEADER.pack_into(
+                self.shm.buf, offset, generation, readers, 0, 0, total, expires
+            )
+            start = offset + HEADER.size
+            self.shm.buf[start : start + length] = memoryview(data).cast("B")
+            self.__head = (offset + total) % self.size
+            self.__used += total
+        return DESCRIPTOR.pack(HOST, offset, length, generation) + self.name
+
+    def close(self) -> None:
+        """
+        Release and remove the shared memory.
+        """
+        self.shm.close()
+        self.shm.unlink()
+
+    def __reclaim(self) -> None:
+        """
+        Advance the tail past slots that are released or past their lease.
+        """
+        now = time.monotonic()
+        while self.__used:
+            header = HEADER.unpack_from(self.shm.buf, self.__tail)
+            _, readers, done, _, total, expires = header
+            released = readers and done >= readers
+            if not released and now < expires:
+                break
+            if readers and not released:
+                self.expired += 1
+            self.__tail = (self.__tail + total) % self.size
+            self.__used -= total
+        if not self.__used:
+            self.__head = self.__tail = 0
+
+
+class SharedFrame:
+    """
+    A payload in a `SharedRing` slot, read in place.
+
+    Like a received `zmq.Frame`: `bytes` is a copy and `buffer` a
+    `memoryview` of the slot. Once the ring's `lease` runs out the writer may
+    reuse the slot, so both check the slot's generation and raise
+    `ValueError` when it was reused: `bytes` after copying (a good copy stays
+    good), `buffer` when it is taken. Check `valid` after reading through a
+    `buffer` that was kept around. The reader is done with the slot when the
+    frame and every `buffer` of it are garbage collected.
+    """
+
+    def __init__(self, shm: SharedMemory, offset: int, length: int, generation: int):
+        self.__ring = shm.buf
+        self.__offset = offset
+        self.__generation = generation
+        # The ctypes array owns the buffer export, views of it keep it alive
+        slot = (ctypes.c_char * length).from_buffer(shm.buf, offset + HEADER.size)
+        weakref.finalize(slot, release, shm.buf, offset, generation)
+        self.__view = memoryview(slot).cast("B")
+
+    def __len__(self) -> int:
+        return self.__view.nbytes
+
+    @property
+    def valid(self) -> bool:
+        """Whether the slot still holds this payload."""
+        try:
+            current = GENERATION.unpack_from(self.__ring, self.__offset)[0]
+        except ValueError:
+            return False  # The ring is unmapped already
+        return current == self.__generation
+
+    @property
+    def buffer(self) -> memoryview:
+        """
+        The payload without copying.
+
+        Raises:
+            ValueError: When the slot was reused (the lease ran out).
+        """
+        self.__check()
+        return self.__view
+
+    @property
+    def bytes(self) -> bytes:
+        """
+        A copy of the payload.
+
+        Raises:
+            ValueError: When the slot was reused (the lease ran out).
+        """
+        data = self.__view.tobytes()
+        # The writer stamps a new generation before it overwrites the payload
+        self.__check()
+        return data
+
+    def __check(self) -> None:
+        if not self.valid:
+            raise ValueError("Shared-memory slot was reused after its lease")
+
+
+class SharedReader:
+    """
+    Maps descriptor frames from `SharedRing`s to `SharedFrame`s.
+
+    Payloads are read in place; take `bytes` of whatever must outlive the
+    ring's `lease`.
+    """
+
+    def __init__(self):
+        self.__rings: dict[bytes, SharedMemory] = {}
+
+    def resolve(self, frame: Any) -> SharedFrame:
+        """
+        The payload a descriptor frame points to.
+
+        Raises:
+            ValueError: When the descriptor is from another host, or its slot
+                was reclaimed before it was read (the lease ran out).
+        """
+        descriptor = to_bytes(frame)
+        host, offset, length, generation = DESCRIPTOR.unpack_from(descriptor)
+        if host != HOST:
+            raise ValueError("Shared-memory descriptor from another host")
+        shm = self.__attach(descriptor[DESCRIPTOR.size :])
+        current, *_, expires = HEADER.unpack_from(shm.buf, offset)
+        if current != generation or time.monotonic() >= expires:
+            raise ValueError("Shared-memory slot expired before it was read")
+        return SharedFrame(shm, offset, length, generation)
+
+    def close(self) -> None:
+        """
+        Unmap every ring (views still in use keep their mapping).
+        """
+        for shm in self.__rings.values():
+            try:
+                shm.close()
+            except BufferError:
+                pass
+        self.__rings.clear()
+
+    def __attach(self, name: bytes) -> SharedMemory:
+        shm = self.__rings.get(name)
+        if shm is None:
+            shm = SharedMemory(name=name.decode("utf-8"))
+            if name not in OWNED:
+                # Only the writer may unlink the ring
+                resource_tracker.unregister(shm._name, "shared_memory")
+            self.__rings[name] = shm
+        return shm
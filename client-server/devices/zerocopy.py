@@ -0,0 +1,69 @@
+# Python
+from typing import Any, Iterable
+
+# ZMQ
+import zmq
+
+
+def nbytes(frame: Any) -> int:
+    """
+    Size of a frame (`bytes`, `zmq.Frame`, `shm.SharedFrame` or any buffer).
+    """
+    if isinstance(frame, bytes) or is_frame(frame):
+        return len(frame)
+    return memoryview(frame).nbytes
+
+
+def send_options(
+    frames: Iterable[Any], zero_copy: bool = True, threshold: int = zmq.COPY_THRESHOLD
+) -> dict[str, bool]:
+    """
+    Keyword arguments for `send` / `send_multipart`.
+
+    Messages with a frame of at least `threshold` bytes are sent with
+    `copy=False, track=True`; the caller must not modify those buffers until
+    the returned `MessageTracker` is done. Smaller messages are still copied,
+    which is cheaper than tracking them. Received `zmq.Frame`s cannot be
+    tracked, so messages containing one are sent untracked.
+    """
+    if not zero_copy:
+        return {}
+    frames = list(frames)
+    large = any(nbytes(frame) >= threshold for frame in frames)
+    track = large and not any(isinstance(frame, zmq.Frame) for frame in frames)
+    return {"copy": not large, "track": track}
+
+
+def is_frame(frame: Any) -> bool:
+    """
+    Whether `frame` is a received frame (`zmq.Frame` or `shm.SharedFrame`).
+    """
+    return isinstance(frame, zmq.Frame) or hasattr(frame, "buffer")
+
+
+def view(frame: Any) -> Any:
+    """
+    `memoryview` of a received frame (other frames are returned as-is).
+    """
+    return frame.buffer if is_frame(frame) else frame
+
+
+def to_bytes(frame: Any) -> bytes:
+    """
+    `bytes` of a received frame (copies a `zmq.Frame` or `shm.SharedFrame`).
+    """
+    return frame.bytes if is_frame(frame) else bytes(frame)
+
+
+def split_envelope(frames: list[Any]) -> tuple[list[bytes], list[Any]]:
+    """
+    Split a `ROUTER` message into `(envelope, body)`.
+
+    The envelope holds the identities up to and including the first empty
+    delimiter frame. A message without a delimiter has an empty body.
+    """
+    for index, frame in enumerate(frames):
+        if not len(frame):
+            envelope = [to_bytes(item) for item in frames[: index + 1]]
+            return envelope, frames[index + 1 :]
+    return [], []
@@ -1,15 +1,20 @@
-import time
+import logging
 import zmq
 
-
 # signal.signal(signal.SIGINT, signal.SIG_DFL)
 
 
-def main():
+def main(timeout: int = 5000):
     context = zmq.Context()
-    socket = context.socket(zmq.PUB)
+    socket = context.socket(zmq.XPUB)
     socket.bind("tcp://*:5555")
 
-    time.sleep(1)
-    socket.send(b"status 5")
-    socket.send(b"All is well")
+    # Wait for a subscription instead of sleeping (slow joiner)
+    if socket.poll(timeout):
+        socket.recv()  # b"\x01status"
+    else:
+        logging.warning(f"No subscriber after {timeout} ms, publishing anyway")
+
+    # Messages are `[topic, body]` (a `LastValueCache` keys on the topic)
+    socket.send_multipart([b"status", b"5"])
+    socket.send_multipart([b"notice", b"All is well"])
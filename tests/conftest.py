@@ -0,0 +1,7 @@
+from pathlib import Path
+import sys
+
+# The examples run as scripts from their own directories
+ROOT = Path(__file__).resolve().parent.parent
+for path in ("workers", "client-server", "client-server/devices"):
+    sys.path.insert(0, str(ROOT / path))
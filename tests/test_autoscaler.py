@@ -0,0 +1,147 @@
+from types import SimpleNamespace
+import threading
+import time
+
+import pytest
+import zmq
+
+import autoscaler
+from autoscaler import Autoscaler, LoadSample
+from base import BaseServer
+from broker import LoadBalancer
+from metrics import Metrics, MetricsServer
+from server import broker_load
+
+
+class FakeWorker:
+    """Just enough of a worker for `BaseServer` and `Autoscaler`."""
+
+    def __init__(self):
+        self.name = f"fake-{id(self)}"
+        self.stop_event = threading.Event()
+        self.started = self.released = False
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self, timeout=None):
+        pass
+
+    def is_alive(self):
+        return self.started and not self.stop_event.is_set()
+
+    def release(self):
+        self.released = True
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(autoscaler, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def scaler(clock):
+    service = type("Service", (BaseServer,), {"on_event": staticmethod(print)})
+    sample = LoadSample()
+    scaler = Autoscaler(
+        service,
+        FakeWorker,
+        lambda: sample,
+        min_workers=1,
+        max_workers=4,
+        target_in_flight=2,
+        scale_up_cooldown=10,
+        scale_down_cooldown=60,
+    )
+    service.add(FakeWorker())
+    return scaler, sample, clock
+
+
+def test_desired(scaler):
+    scaler, _, _ = scaler
+    assert scaler.desired(LoadSample(in_flight=5), 1) == 3
+    assert scaler.desired(LoadSample(queue_depth=100), 1) == 4  # `max_workers`
+    assert scaler.desired(LoadSample(), 3) == 2  # One at a time
+    assert scaler.desired(LoadSample(queue_depth=1), 3) == 3  # Not idle
+    assert scaler.desired(LoadSample(p99=1.0), 2) == 3
+    assert scaler.desired(LoadSample(), 1) == 1  # `min_workers`
+
+
+def test_scale_up_cooldown(scaler):
+    scaler, sample, clock = scaler
+    sample.in_flight = 4
+    assert scaler.step() == 1
+    assert len(scaler.server.workers) == 2
+    assert all(worker.started for worker in scaler.server.workers[1:])
+    sample.in_flight = 8
+    clock[0] += 9
+    assert scaler.step() == 0  # Cooling down
+    clock[0] += 1
+    assert scaler.step() == 2
+    assert len(scaler.server.workers) == 4
+
+
+def test_scale_down_cooldown(scaler):
+    scaler, sample, clock = scaler
+    sample.in_flight = 6
+    assert scaler.step() == 2
+    sample.in_flight = 0
+    clock[0] += 59
+    assert scaler.step() == 0  # Within `scale_down_cooldown` of the scale up
+    clock[0] += 1
+    newest = scaler.server.workers[-1]
+    assert scaler.step() == -1
+    assert newest not in scaler.server.workers
+    assert newest.stop_event.is_set()
+    clock[0] += 30
+    assert scaler.step() == 0  # Again only after `scale_down_cooldown`
+    assert newest.released  # Reaped once it exited
+    clock[0] += 30
+    assert scaler.step() == -1
+    clock[0] += 60
+    assert scaler.step() == 0  # `min_workers`
+    assert len(scaler.server.workers) == 1
+
+
+def test_no_sample(scaler):
+    scaler, _, _ = scaler
+    scaler.probe = lambda: None
+    assert scaler.step() == 0
+
+
+def test_broker_load_from_metrics():
+    metrics = Metrics()
+    broker = LoadBalancer(poll_interval=10)
+    broker.stats = metrics.device("device:test")
+    broker.bind_in("inproc://autoscaler-test-clients")
+    broker.bind_out("inproc://autoscaler-test-workers")
+    broker.start()
+    endpoint = MetricsServer(metrics, "inproc://autoscaler-test-metrics")
+    endpoint.start()
+    context = zmq.Context.instance()
+    worker = context.socket(zmq.DEALER)
+    worker.connect("inproc://autoscaler-test-workers")
+    clients = [context.socket(zmq.REQ) for _ in range(3)]
+    try:
+        assert broker_load("inproc://autoscaler-test-metrics") == LoadSample()
+        worker.send_multipart([b"\x01", b"1"])  # `READY` with one credit
+        for client in clients:
+            client.connect("inproc://autoscaler-test-clients")
+            client.send(b"work")
+        deadline = time.monotonic() + 2
+        while (load := broker_load("inproc://autoscaler-test-metrics")) != LoadSample(
+            queue_depth=2, in_flight=1
+        ):
+            assert time.monotonic() < deadline, load
+            time.sleep(0.02)
+    finally:
+        for socket in (worker, *clients):
+            socket.close(linger=0)
+        endpoint.stop()
+        broker.stop()
+    assert broker_load("tcp://127.0.0.1:1") is None
@@ -0,0 +1,76 @@
+import os
+import time
+
+from base import BaseProcess, BaseServer, BaseThread
+from control import ControlBlock, State
+
+
+class Quiet:
+    def on_event(self, event_type: str):
+        pass
+
+
+class Crasher(Quiet, BaseProcess):
+    interval = 0.01
+
+    def server(self):
+        os._exit(1)  # Dies without recording its exit
+
+
+class Idler(Quiet, BaseThread):
+    interval = 0.01
+
+    def server(self):
+        pass
+
+
+def service(**attributes):
+    attributes.setdefault("on_event", staticmethod(lambda event_type: None))
+    return type("Service", (BaseServer,), attributes)
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_supervisor_marks_and_restarts_crashed_process():
+    servers = service(check_interval=0.05, backoff_initial=0.1)
+    worker = Crasher()
+    servers.add(worker)
+    servers.launch(worker)
+    try:
+        assert wait_for(lambda: (servers.check(), servers.workers[0] is not worker)[1])
+        assert worker.control.snapshot()["state"] == State.CRASHED
+        assert worker._wakeup_fileno() == -1  # Released before the restart
+    finally:
+        servers.stop(timeout=1.0)
+
+
+def test_stop_releases_every_worker():
+    servers = service()
+    running, unstarted = Idler(), Idler()
+    servers.add(running, unstarted)
+    servers.launch(running)
+    assert wait_for(lambda: running.control.snapshot()["state"] == State.RUNNING)
+    servers.stop(timeout=1.0)
+    assert servers.status()[running.name]["state"] == State.STOPPED
+    assert running._wakeup_fileno() == -1
+    assert unstarted._wakeup_fileno() == -1
+
+
+def test_control_block_config_seqlock():
+    block = ControlBlock()
+    assert block.pull() is None
+    block.push({"batch": 8})
+    assert block.pull() == {"batch": 8}
+    assert block.pull() is None  # Only once per version
+
+    block.fields.version += 1  # A write in progress (odd version)
+    assert block.pull() is None
+    block.fields.version += 1
+    assert block.pull() == {"batch": 8}
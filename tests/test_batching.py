@@ -0,0 +1,75 @@
+from itertools import count
+
+import pytest
+import zmq
+
+from batching import BatchSender, unbatch
+
+PIPES = count()
+
+
+@pytest.fixture
+def pipe():
+    context = zmq.Context.instance()
+    url = f"inproc://batching-test-{next(PIPES)}"
+    pull = context.socket(zmq.PULL)
+    pull.bind(url)
+    push = context.socket(zmq.PUSH)
+    push.connect(url)
+    yield push, pull
+    push.close(linger=0)
+    pull.close(linger=0)
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_unbatch(pipe, packed):
+    push, pull = pipe
+    sender = BatchSender(push, max_count=3, packed=packed, timer=False)
+    for message in (b"a", b"bb", b"ccc"):
+        sender.add(message, topic=b"prices")
+    topic, messages = unbatch(pull.recv_multipart())
+    assert topic == b"prices"
+    assert [bytes(message) for message in messages] == [b"a", b"bb", b"ccc"]
+    assert sender.sent == 3
+    sender.close()
+
+
+def test_timer_sends_quiet_topic(pipe):
+    push, pull = pipe
+    sender = BatchSender(push, max_delay=0.01)
+    sender.add(b"only", topic=b"quiet")
+    assert pull.poll(1000)
+    assert unbatch(pull.recv_multipart()) == (b"quiet", [b"only"])
+    sender.close()
+
+
+def test_timeout_without_timer(pipe):
+    push, _ = pipe
+    sender = BatchSender(push, max_delay=10.0, timer=False)
+    assert sender.timeout() is None
+    sender.add(b"message")
+    assert 0 < sender.timeout() <= 10.0
+    sender.close()
+
+
+def test_block_keeps_batch_on_send_timeout():
+    context = zmq.Context.instance()
+    push = context.socket(zmq.PUSH)
+    push.setsockopt(zmq.SNDTIMEO, 10)
+    push.setsockopt(zmq.LINGER, 0)
+    url = f"inproc://batching-test-{next(PIPES)}"
+    push.bind(url)  # No peer yet: sends time out
+
+    sender = BatchSender(push, max_count=2, timer=False)
+    sender.add(b"a")
+    with pytest.raises(zmq.Again):
+        sender.add(b"b")
+    assert sender.sent == 0 and len(sender.spill) == 1
+
+    pull = context.socket(zmq.PULL)
+    pull.connect(url)
+    sender.close()
+    assert unbatch(pull.recv_multipart()) == (b"", [b"a", b"b"])
+    assert sender.sent == 2
+    push.close()
+    pull.close(linger=0)
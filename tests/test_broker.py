@@ -0,0 +1,138 @@
+from itertools import count
+import asyncio
+import threading
+import time
+
+import pytest
+import zmq
+import zmq.asyncio
+
+from broker import HEARTBEAT, READY, REPLY, BrokerWorker, LoadBalancer
+from reliable import check_reply
+from zerocopy import split_envelope
+
+BROKERS = count()
+
+
+@pytest.fixture
+def broker(request):
+    index = next(BROKERS)
+    options = getattr(request, "param", {})
+    frontend = f"inproc://broker-test-in-{index}"
+    backend = f"inproc://broker-test-out-{index}"
+    balancer = LoadBalancer(poll_interval=10, **options)
+    balancer.bind_in(frontend)
+    balancer.bind_out(backend)
+    balancer.start()
+    yield balancer, frontend, backend
+    balancer.stop()
+
+
+def client(url: str):
+    socket = zmq.Context.instance().socket(zmq.REQ)
+    socket.setsockopt(zmq.RCVTIMEO, 2000)
+    socket.setsockopt(zmq.LINGER, 0)
+    socket.connect(url)
+    return socket
+
+
+def run_worker(url: str, handler, stop: threading.Event, **options):
+    """Serve `handler` with a `BrokerWorker` in a thread until `stop` is set."""
+
+    async def main():
+        context = zmq.asyncio.Context(zmq.Context.instance())
+        worker = BrokerWorker(context, url, **options)
+        await worker.start()
+        task = asyncio.create_task(worker.serve(handler))
+        while not stop.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await worker.drain(timeout=1.0)
+
+    thread = threading.Thread(target=asyncio.run, args=(main(),))
+    thread.start()
+    return thread
+
+
+def test_handler_error_reaches_client(broker):
+    _, frontend, backend = broker
+
+    async def handler(message):
+        if bytes(message) == b"boom":
+            raise ValueError("boom")
+        return b""
+
+    stop = threading.Event()
+    thread = run_worker(backend, handler, stop)
+    socket = client(frontend)
+    try:
+        socket.send(b"boom")
+        with pytest.raises(RuntimeError, match="ValueError: boom"):
+            check_reply(socket.recv_multipart())
+        socket.send(b"empty")
+        assert check_reply(socket.recv_multipart()) == [b""]
+    finally:
+        socket.close()
+        stop.set()
+        thread.join()
+
+
+def test_burst_is_answered(broker):
+    _, frontend, backend = broker
+
+    async def handler(message):
+        return bytes(message)
+
+    stop = threading.Event()
+    thread = run_worker(backend, handler, stop, credit=8)
+    dealer = zmq.Context.instance().socket(zmq.DEALER)
+    dealer.setsockopt(zmq.RCVTIMEO, 2000)
+    dealer.connect(frontend)
+    try:
+        for i in range(200):
+            # Pipelined requests carry an ID in the envelope (as `AsyncRPCClient`)
+            dealer.send_multipart([str(i).encode(), b"", str(i).encode()])
+        replies = {dealer.recv_multipart()[2] for _ in range(200)}
+        assert replies == {str(i).encode() for i in range(200)}
+    finally:
+        dealer.close(linger=0)
+        stop.set()
+        thread.join()
+
+
+@pytest.mark.parametrize(
+    "broker", [{"heartbeat_interval": 0.05, "liveness": 2}], indirect=True
+)
+def test_silent_worker_is_evicted(broker):
+    balancer, frontend, backend = broker
+    silent = zmq.Context.instance().socket(zmq.DEALER)
+    silent.connect(backend)
+    silent.send_multipart([READY, b"1"])
+    time.sleep(0.05)
+
+    socket = client(frontend)
+    socket.send(b"request")
+    assert silent.poll(1000)
+    frames = silent.recv_multipart()
+    while frames == [HEARTBEAT]:
+        frames = silent.recv_multipart()  # Silent: heartbeats go unanswered
+    assert frames[-1] == b"request"
+
+    # Rerouted to the next worker once the silent one is evicted
+    alive = zmq.Context.instance().socket(zmq.DEALER)
+    alive.connect(backend)
+    alive.send_multipart([READY, b"1"])
+    deadline = time.monotonic() + 2.0
+    while time.monotonic() < deadline:
+        assert alive.poll(1000)
+        frames = alive.recv_multipart()
+        if frames == [HEARTBEAT]:
+            alive.send(HEARTBEAT)
+            continue
+        envelope, _ = split_envelope(frames)
+        alive.send_multipart([REPLY, *envelope, b"rerouted"])
+        break
+    assert socket.recv() == b"rerouted"
+    assert balancer.evicted == 1
+    for s in (silent, alive, socket):
+        s.close(linger=0)
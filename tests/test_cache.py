@@ -0,0 +1,66 @@
+import asyncio
+
+from cache import ResponseCache
+from metrics import CacheStats
+
+
+def test_concurrent_requests_are_coalesced():
+    cache = ResponseCache(ttl=10, stats=CacheStats())
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.01)
+        return request.upper()
+
+    async def main():
+        cached = cache.wrap(handler)
+        replies = await asyncio.gather(*(cached(b"hello") for _ in range(5)))
+        return replies + [await cached(b"hello")]
+
+    assert asyncio.run(main()) == [b"HELLO"] * 6
+    assert calls == [b"hello"]
+    assert (cache.stats.misses, cache.stats.coalesced, cache.stats.hits) == (1, 4, 1)
+
+
+def test_entries_expire():
+    cache = ResponseCache(ttl=0.01, stats=CacheStats())
+
+    async def handler(request):
+        return request
+
+    async def main():
+        await cache.get(b"a", handler)
+        await asyncio.sleep(0.02)
+        await cache.get(b"a", handler)
+
+    asyncio.run(main())
+    assert (cache.stats.misses, cache.stats.expired) == (2, 1)
+
+
+def test_lru_eviction_by_bytes():
+    cache = ResponseCache(ttl=None, max_bytes=10)
+    cache.put(b"a", b"x" * 6)
+    cache.put(b"b", b"y" * 6)
+    assert len(cache) == 1 and cache.nbytes == 6
+
+
+def test_failures_are_not_cached():
+    cache = ResponseCache()
+    attempts = []
+
+    async def handler(request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise ValueError("fails once")
+        return request
+
+    async def main():
+        try:
+            await cache.get(b"a", handler)
+        except ValueError:
+            pass
+        return await cache.get(b"a", handler)
+
+    assert asyncio.run(main()) == b"a"
+    assert len(attempts) == 2
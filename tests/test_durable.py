@@ -0,0 +1,94 @@
+from itertools import count
+import time
+
+import zmq
+
+from broker import READY
+from durable import DurableStreamer, SegmentLog, log_directory
+from flow import NACK
+
+STREAMERS = count()
+
+
+def test_recovery(tmp_path):
+    log = SegmentLog(str(tmp_path), segment_size=4096)
+    first = log.append([b"a", b"1"])
+    second = log.append([b"b"])
+    log.ack(first)
+    log.close()
+
+    log = SegmentLog(str(tmp_path), segment_size=4096)
+    assert sorted(log.tasks) == [second]
+    assert log.read(second) == [b"b"]
+    assert log.append([b"c"]) > second  # Sequence numbers keep growing
+    log.close()
+
+
+def test_torn_record_is_dropped(tmp_path):
+    log = SegmentLog(str(tmp_path), segment_size=4096)
+    kept = log.append([b"kept"])
+    torn = log.append([b"torn"])
+    segment, start, _ = log.tasks[torn]
+    segment.map[start] ^= 0xFF  # Corrupt the payload (bad crc)
+    log.close()
+
+    log = SegmentLog(str(tmp_path), segment_size=4096)
+    assert sorted(log.tasks) == [kept]
+    log.close()
+
+
+def test_compaction_deletes_acknowledged_segments(tmp_path):
+    log = SegmentLog(str(tmp_path), segment_size=256)
+    tasks = [log.append([b"x" * 100]) for _ in range(4)]
+    assert len(log.segments) > 1
+    for seq in tasks:
+        log.ack(seq)
+    assert len(log.segments) == 1
+    assert len(list(tmp_path.glob("*.log"))) == 1
+    log.close()
+
+
+def test_default_directory_per_address():
+    streamer = DurableStreamer()
+    streamer.bind_in("tcp://127.0.0.1:5555")
+    assert streamer.directory == log_directory("tcp://127.0.0.1:5555")
+    assert log_directory("ipc:///tmp/a") != log_directory("ipc:///tmp/b")
+
+
+def test_nacked_task_is_parked(tmp_path):
+    index = next(STREAMERS)
+    streamer = DurableStreamer(
+        str(tmp_path), sync_interval=0, max_deliveries=2, poll_interval=10
+    )
+    streamer.bind_in(f"inproc://durable-test-in-{index}")
+    streamer.bind_out(f"inproc://durable-test-out-{index}")
+    streamer.start()
+
+    context = zmq.Context.instance()
+    producer = context.socket(zmq.PUSH)
+    producer.connect(f"inproc://durable-test-in-{index}")
+    worker = context.socket(zmq.DEALER)
+    worker.connect(f"inproc://durable-test-out-{index}")
+    worker.send_multipart([READY, b"1"])
+    producer.send(b"poison")
+
+    deliveries = 0
+    while worker.poll(500):
+        seq, body = worker.recv_multipart()
+        assert body == b"poison"
+        deliveries += 1
+        worker.send_multipart([NACK, seq])
+
+    deadline = time.monotonic() + 1.0
+    while streamer.backlog and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert deliveries == 2
+    assert streamer.backlog == 0
+    assert len(streamer.parked_log) == 1
+    producer.close(linger=0)
+    worker.close(linger=0)
+    streamer.stop()
+
+    parked = SegmentLog(str(tmp_path / "parked"))
+    assert [parked.read(seq) for seq in parked.tasks] == [[b"poison"]]
+    parked.close()
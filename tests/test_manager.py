@@ -0,0 +1,33 @@
+import pytest
+
+from manager import ZeroMQ, network_types, service_urls
+from proxy import shard_for, shard_url
+
+
+def test_device_is_built_on_demand():
+    mesh = network_types("lvc")
+    assert callable(mesh.device)
+    assert mesh.device() is not mesh.device()  # A new device per call
+
+
+def test_unknown_network_type():
+    with pytest.raises(ValueError, match="network type"):
+        network_types("mesh")
+
+
+def test_service_urls():
+    urls = service_urls("prices", "thread")
+    assert urls.frontend == "inproc://prices.clients"
+    with pytest.raises(ValueError, match="scope"):
+        service_urls("prices", "galaxy")
+
+
+@pytest.mark.parametrize("network_type", ["forwarder", "lvc"])
+def test_sharded_publisher_uses_its_topic_shard(network_type):
+    frontend = ZeroMQ.tcp(5555)
+    options = dict(mode="frontend", frontend=frontend, network_type=network_type)
+    for topic in (b"status", b"notice", b"prices"):
+        node = ZeroMQ(shards=4, shard_key=topic, **options)
+        assert node.url.frontend == shard_url(frontend, shard_for(topic, 4))
+    with pytest.raises(ValueError, match="shard_key"):
+        ZeroMQ(shards=4, **options)
@@ -0,0 +1,114 @@
+from itertools import count
+import threading
+
+import pytest
+import zmq
+
+from proxy import ProxyPool, SteerableProxy, shard_for, shard_url
+
+PROXIES = count()
+
+
+@pytest.fixture
+def proxy():
+    index = next(PROXIES)
+    proxy = SteerableProxy()
+    proxy.bind_in(f"inproc://proxy-test-in-{index}")
+    proxy.bind_out(f"inproc://proxy-test-out-{index}")
+    proxy.start()
+    yield proxy, index
+    proxy.stop()
+
+
+def echo(url: str, stop: threading.Event) -> None:
+    socket = zmq.Context.instance().socket(zmq.REP)
+    socket.connect(url)
+    socket.RCVTIMEO = 100
+    while not stop.is_set():
+        try:
+            socket.send(socket.recv())
+        except zmq.Again:
+            pass
+    socket.close(linger=0)
+
+
+def test_pause_resume_stress(proxy):
+    proxy, index = proxy
+    stop = threading.Event()
+    worker = threading.Thread(
+        target=echo, args=(f"inproc://proxy-test-out-{index}", stop)
+    )
+    worker.start()
+    client = zmq.Context.instance().socket(zmq.REQ)
+    client.RCVTIMEO = 2000
+    client.connect(f"inproc://proxy-test-in-{index}")
+    try:
+        for i in range(200):
+            proxy.pause()
+            assert proxy.paused
+            proxy.resume()
+            assert not proxy.paused
+            client.send(b"%d" % i)
+            assert client.recv() == b"%d" % i
+        statistics = proxy.statistics()
+        # Frames (identity, delimiter and body), not messages
+        assert statistics["frontend_messages_in"] == 600
+        assert statistics["backend_messages_in"] == 600
+    finally:
+        client.close(linger=0)
+        stop.set()
+        worker.join()
+
+
+def test_paused_messages_wait(proxy):
+    proxy, index = proxy
+    stop = threading.Event()
+    client = zmq.Context.instance().socket(zmq.REQ)
+    client.RCVTIMEO = 200
+    client.connect(f"inproc://proxy-test-in-{index}")
+    worker = threading.Thread(
+        target=echo, args=(f"inproc://proxy-test-out-{index}", stop)
+    )
+    worker.start()
+    try:
+        proxy.pause()
+        client.send(b"queued")
+        with pytest.raises(zmq.Again):
+            client.recv()
+        proxy.resume()
+        client.RCVTIMEO = 2000
+        assert client.recv() == b"queued"
+    finally:
+        client.close(linger=0)
+        stop.set()
+        worker.join()
+
+
+def test_stop_while_paused(proxy):
+    proxy, _ = proxy
+    proxy.pause()
+    proxy.stop()
+    proxy.join(1)
+
+
+def test_shards():
+    assert shard_url("tcp://127.0.0.1:5000", 0) == "tcp://127.0.0.1:5000"
+    assert shard_url("tcp://127.0.0.1:5000", 2) == "tcp://127.0.0.1:5002"
+    assert shard_url("inproc://x", 1) == "inproc://x-1"
+    assert shard_for(b"client", 4) == shard_for(b"client", 4) < 4
+    pool = ProxyPool(shards=3)
+    assert len(pool.proxies) == 3
+
+
+def test_pause_resume_process(tmp_path):
+    proxy = SteerableProxy(launcher="process")
+    proxy.bind_in(f"ipc://{tmp_path}/in")
+    proxy.bind_out(f"ipc://{tmp_path}/out")
+    proxy.start()
+    try:
+        for _ in range(30):
+            proxy.pause()
+            proxy.resume()
+        assert proxy.statistics()["frontend_messages_in"] == 0
+    finally:
+        proxy.stop()
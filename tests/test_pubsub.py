@@ -0,0 +1,93 @@
+from itertools import count
+import time
+
+import pytest
+import zmq
+
+from pubsub import LastValueCache, SubscriptionIndex
+
+CACHES = count()
+
+
+@pytest.fixture
+def cache(request):
+    index = next(CACHES)
+    options = getattr(request, "param", {})
+    cache = LastValueCache(**options)
+    cache.bind_in(f"inproc://lvc-test-in-{index}")
+    cache.bind_out(f"inproc://lvc-test-out-{index}")
+    cache.start()
+    publisher = zmq.Context.instance().socket(zmq.PUB)
+    publisher.connect(f"inproc://lvc-test-in-{index}")
+    time.sleep(0.1)  # The cache's subscription reaches the publisher
+    yield cache, publisher, f"inproc://lvc-test-out-{index}"
+    publisher.close(linger=0)
+    cache.stop()
+
+
+def late_subscriber(url: str, topic: bytes) -> list[list[bytes]]:
+    """Subscribe after publishing and collect what is replayed."""
+    subscriber = zmq.Context.instance().socket(zmq.SUB)
+    subscriber.connect(url)
+    subscriber.subscribe(topic)
+    received = []
+    while subscriber.poll(300):
+        received.append(subscriber.recv_multipart())
+    subscriber.close(linger=0)
+    return received
+
+
+def wait_until(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_index():
+    index = SubscriptionIndex()
+    assert index.update(b"\x01sta")
+    assert index.matches(b"status") and not index.matches(b"st")
+    assert index.update(b"\x00sta")
+    assert not index.matches(b"status") and not len(index)
+    assert not index.update(b"")
+
+
+def test_last_value_per_topic(cache):
+    cache, publisher, url = cache
+    for i in range(5):
+        publisher.send_multipart([b"status", b"%d" % i])
+    publisher.send_multipart([b"other", b"x"])
+    wait_until(lambda: cache.values.get(b"status") == [b"status", b"4"])
+    assert late_subscriber(url, b"status") == [[b"status", b"4"]]
+    assert len(cache.values) == 2
+
+
+def test_single_frame_not_cached(cache):
+    cache, publisher, url = cache
+    for i in range(5):
+        publisher.send(b"status %d" % i)
+    wait_until(lambda: cache.uncached == 5)
+    assert not cache.values
+    assert late_subscriber(url, b"status") == []
+
+
+@pytest.mark.parametrize(
+    "cache", [{"topic": lambda frames: frames[0].split(b" ", 1)[0]}], indirect=True
+)
+def test_topic_callable(cache):
+    cache, publisher, url = cache
+    for i in range(5):
+        publisher.send(b"status %d" % i)
+    wait_until(lambda: cache.values.get(b"status") == [b"status 4"])
+    assert late_subscriber(url, b"status") == [[b"status 4"]]
+
+
+@pytest.mark.parametrize("cache", [{"max_topics": 2}], indirect=True)
+def test_bounded(cache):
+    cache, publisher, _ = cache
+    for topic in (b"a", b"b", b"c"):
+        publisher.send_multipart([topic, b"1"])
+    wait_until(lambda: b"c" in cache.values)
+    assert list(cache.values) == [b"b", b"c"]
+    assert cache.nbytes == 4
@@ -0,0 +1,85 @@
+from itertools import count
+from types import SimpleNamespace
+import asyncio
+import threading
+
+import pytest
+import zmq
+
+from reliable import Deduplicator, ReliableClient
+
+SERVERS = count()
+
+
+def node(url: str) -> SimpleNamespace:
+    """The parts of a sync `frontend` node a `ReliableClient` uses."""
+    return SimpleNamespace(
+        url=SimpleNamespace(frontend=url),
+        context=zmq.Context.instance(),
+        timeout=200,
+        metrics=None,
+        zero_copy=False,
+        copy_threshold=zmq.COPY_THRESHOLD,
+        configure=lambda socket: None,
+    )
+
+
+def test_latency_of_the_successful_attempt_only():
+    url = f"inproc://reliable-test-{next(SERVERS)}"
+    server = zmq.Context.instance().socket(zmq.ROUTER)
+    server.bind(url)
+
+    def serve():
+        server.recv_multipart()  # The first attempt times out
+        frames = server.recv_multipart()
+        server.send_multipart([*frames[:-1], b"reply"])
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    with ReliableClient(node(url), retries=1, backoff=0.1, timeout=0.2) as client:
+        assert client.request(b"request") == b"reply"
+        # Retry, backoff and the timed out attempt are not part of the sample
+        assert client.latency_us.count == 1
+        assert client.latency_us.max < 150_000
+    thread.join()
+    server.close(linger=0)
+
+
+def test_deduplicator_runs_a_request_once():
+    dedup = Deduplicator(size=2)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [b"reply"]
+
+    async def main():
+        # A hedge arriving while the first copy runs shares its result
+        first, second = await asyncio.gather(
+            dedup.reply(b"a", compute), dedup.reply(b"a", compute)
+        )
+        third = await dedup.reply(b"a", compute)  # A retry after the reply
+        return first, second, third
+
+    assert asyncio.run(main()) == ([b"reply"],) * 3
+    assert len(calls) == 1 and dedup.hits == 2
+
+
+def test_deduplicator_forgets_failures():
+    dedup = Deduplicator()
+    attempts = []
+
+    async def compute():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError("first attempt fails")
+        return [b"reply"]
+
+    async def main():
+        with pytest.raises(ValueError):
+            await dedup.reply(b"a", compute)
+        return await dedup.reply(b"a", compute)
+
+    assert asyncio.run(main()) == [b"reply"]
+    assert len(attempts) == 2
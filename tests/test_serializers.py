@@ -0,0 +1,31 @@
+import pytest
+
+from serializers import dumps, loads, peek, unpack
+
+
+@pytest.mark.parametrize(
+    "obj, codec",
+    [
+        (b"payload", "raw"),
+        ({"price": 1.5, "tags": ["a", "b"]}, "msgpack"),
+        ({"nested": (1, 2)}, "pickle"),
+    ],
+)
+def test_round_trip(obj, codec):
+    frames = dumps(obj, codec)
+    assert loads(frames, codecs=(codec,)) == obj
+
+
+def test_pickle_is_not_allowed_by_default():
+    with pytest.raises(ValueError, match="not allowed"):
+        loads(dumps({"a": 1}, "pickle"))
+
+
+def test_unknown_tag_raises_value_error():
+    with pytest.raises(ValueError, match="Unknown codec tag"):
+        peek([b"?", b"payload"])
+
+
+def test_unpack():
+    topic, obj = unpack([b"prices", *dumps([1, 2], "msgpack")])
+    assert (topic, obj) == (b"prices", [1, 2])
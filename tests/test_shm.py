@@ -0,0 +1,115 @@
+from itertools import count
+import gc
+import time
+
+import pytest
+import zmq
+
+from manager import ZeroMQ, body_start
+from shm import SharedReader, SharedRing, untag
+
+PAIRS = count()
+
+
+@pytest.fixture
+def ring():
+    ring = SharedRing(size=4096, lease=0.05)
+    reader = SharedReader()
+    yield ring, reader
+    reader.close()
+    ring.close()
+
+
+@pytest.fixture
+def pair():
+    context = zmq.Context.instance()
+    url = f"inproc://shm-test-{next(PAIRS)}"
+    receiver = context.socket(zmq.PAIR)
+    receiver.bind(url)
+    sender = context.socket(zmq.PAIR)
+    sender.connect(url)
+    yield sender, receiver
+    sender.close(linger=0)
+    receiver.close(linger=0)
+
+
+def test_put_resolve(ring):
+    ring, reader = ring
+    frame = reader.resolve(ring.put(b"x" * 1000))
+    assert len(frame) == 1000
+    assert frame.bytes == b"x" * 1000
+    assert frame.buffer[:3] == b"xxx"
+    assert frame.valid
+
+
+def test_reused_slot_detected(ring):
+    ring, reader = ring
+    frame = reader.resolve(ring.put(b"a" * 1500, readers=1))
+    view = frame.buffer
+    time.sleep(0.06)  # Lease over while the reader still holds the view
+    assert ring.put(b"b" * 1500) and ring.put(b"c" * 1500)  # Wraps onto slot 0
+    assert not frame.valid
+    with pytest.raises(ValueError):
+        frame.bytes
+    with pytest.raises(ValueError):
+        frame.buffer
+    del view, frame
+
+
+def test_expired_descriptor(ring):
+    ring, reader = ring
+    descriptor = ring.put(b"a" * 100)
+    time.sleep(0.06)
+    with pytest.raises(ValueError):
+        reader.resolve(descriptor)
+
+
+def test_released_slot_reused(ring):
+    ring, reader = ring
+    frame = reader.resolve(ring.put(b"a" * 3000))
+    assert ring.put(b"b" * 3000) is None  # Full until the reader is done
+    del frame
+    gc.collect()
+    assert ring.put(b"b" * 3000)
+    assert not ring.expired
+
+
+def test_explicit_local_addresses_share(pair):
+    sender, receiver = pair
+    node = ZeroMQ(
+        is_sync=True,
+        frontend="inproc://clients",
+        backend="inproc://workers",
+        shm_threshold=100,
+        shm_size=1 << 16,
+    )
+    node.send(b"x" * 1000, sender)
+    frames = receiver.recv_multipart()
+    assert untag(frames[0]) == [0]
+    node.send(b"y" * 1000, sender)
+    assert node.recv(receiver) == b"y" * 1000  # A checked copy
+    node.ring.close()
+
+
+def test_default_addresses_inline(pair):
+    sender, receiver = pair
+    node = ZeroMQ(mode="backend", is_sync=True, shm_threshold=100)
+    node.send(b"x" * 1000, sender)
+    tag, body = receiver.recv_multipart()
+    assert untag(tag) == [] and body == b"x" * 1000
+    assert node.ring is None
+
+
+def test_body_start():
+    context = zmq.Context.instance()
+    router, dealer, rep = (
+        context.socket(kind) for kind in (zmq.ROUTER, zmq.DEALER, zmq.REP)
+    )
+    try:
+        assert body_start([b"id", b"", b"body"], router) == 2
+        assert body_start([b"id"], router) == 1
+        assert body_start([b"", b"body"], dealer) == 0
+        assert body_start([b"body"], rep) == 0
+    finally:
+        for socket in (router, dealer, rep):
+            socket.close(linger=0)
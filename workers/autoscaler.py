@@ -0,0 +1,166 @@
+import dataclasses as dc
+import logging
+import math
+import time
+from typing import Any, Callable, Optional
+
+# Package
+try:
+    from .base import BaseServer
+except ImportError:  # Run from `workers/` or with it on `sys.path`
+    from base import BaseServer
+
+
+@dc.dataclass
+class LoadSample:
+    queue_depth: int = 0  # Requests waiting for a worker
+    in_flight: int = 0  # Requests being processed
+    p99: float = 0.0  # Seconds
+
+
+class Autoscaler:
+    """
+    Grow and shrink the workers of a `BaseServer` from observed load.
+
+    `probe()` returns a `LoadSample`, or `None` while no sample is available
+    (no decision is taken then). The `LoadBalancer` runs in the device
+    process, so its `queue_depth` and `in_flight` reach the parent through
+    the metrics endpoint. In `client-server/devices`, `server.broker_load()`
+    reads them and `launcher.autoscale()` runs a service with an `Autoscaler`.
+    Workers are added with `factory()` and the newest worker is removed first
+    (`BaseServer.retire()`), under the server's `lock`, so the supervisor may
+    run in another thread.
+
+    A removed worker is stopped and gets `drain_timeout` seconds to exit; a
+    process still running then is terminated. Stopping alone does not tell a
+    broker anything: with the `balancer` mesh the worker must call
+    `BrokerWorker.drain()` on its way out, so the `LoadBalancer` stops routing
+    to it and the worker exits once nothing is pending for it. A terminated
+    worker's requests are rerouted after the broker evicts it.
+    """
+
+    def __init__(
+        self,
+        server: type[BaseServer],
+        factory: Callable[[], Any],
+        probe: Callable[[], Optional[LoadSample]],
+        min_workers: int = 1,
+        max_workers: int = 8,
+        target_in_flight: float = 4.0,
+        target_p99: float = 0.1,
+        scale_up_cooldown: float = 10.0,
+        scale_down_cooldown: float = 60.0,
+        drain_timeout: float = 30.0,
+    ):
+        """
+        Initialize an Autoscaler.
+
+        Args:
+            server (BaseServer): The service whose `workers` are scaled.
+            factory (Callable): Creates a new (unstarted) worker.
+            probe (Callable): Returns the current `LoadSample` (or `None`).
+            min_workers (int): Lower bound.
+            max_workers (int): Upper bound.
+            target_in_flight (float): Busy + waiting requests per worker.
+            target_p99 (float): Latency (seconds) above which to scale up.
+            scale_up_cooldown (float): Seconds between scale ups.
+            scale_down_cooldown (float): Seconds after any change before a scale down.
+            drain_timeout (float): Seconds a removed worker may take to exit.
+        """
+        self.server = server
+        self.factory = factory
+        self.probe = probe
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.target_in_flight = target_in_flight
+        self.target_p99 = target_p99
+        self.scale_up_cooldown = scale_up_cooldown
+        self.scale_down_cooldown = scale_down_cooldown
+        self.drain_timeout = drain_timeout
+        self.draining: dict[Any, float] = {}
+        self.__last_change = float("-inf")
+
+    def desired(self, sample: LoadSample, current: int) -> int:
+        """
+        Number of workers for a load sample (within the bounds).
+        """
+        demand = sample.queue_depth + sample.in_flight
+        wanted = math.ceil(demand / self.target_in_flight) if demand else 0
+        if sample.p99 > self.target_p99:
+            wanted = max(wanted, current + 1)
+        if wanted < current:
+            # Shrink one worker at a time, and only when clearly idle
+            idle = not sample.queue_depth and sample.p99 < self.target_p99 / 2
+            wanted = current - 1 if idle else current
+        return max(self.min_workers, min(self.max_workers, wanted))
+
+    def step(self) -> int:
+        """
+        Take one scaling decision and reap drained workers.
+
+        Returns the change in worker count.
+        """
+        self.reap()
+        sample = self.probe()
+        if sample is None:
+            return 0
+        with self.server.lock:
+            current = len(self.server.workers)
+            target = self.desired(sample, current)
+            now = time.monotonic()
+            since = now - self.__last_change
+
+            if target > current and since >= self.scale_up_cooldown:
+                for _ in range(target - current):
+                    worker = self.factory()
+                    self.server.add(worker)
+                    self.server.launch(worker)
+                self.__last_change = now
+                logging.info(f"Scaled up to {target} workers")
+                return target - current
+
+            if target < current and since >= self.scale_down_cooldown:
+                worker = self.server.workers[-1]
+                self.server.retire(worker)
+                self.draining[worker] = now
+                self.__last_change = now
+                logging.info(f"Scaled down to {current - 1} workers")
+                return -1
+
+        return 0
+
+    def reap(self, wait: bool = False) -> None:
+        """
+        Join drained workers; terminate processes past `drain_timeout`.
+
+        With `wait`, give every draining worker the rest of its
+        `drain_timeout` first (e.g. on shutdown).
+        """
+        for worker, since in list(self.draining.items()):
+            now = time.monotonic()
+            left = since + self.drain_timeout - now if wait else 0
+            worker.join(max(0.0, left))
+            now = time.monotonic()
+            if worker.is_alive():
+                if now - since < self.drain_timeout:
+                    continue
+                if hasattr(worker, "terminate"):
+                    logging.warning(f"Worker {worker.name} did not drain, terminating")
+                    worker.terminate()
+                    worker.join()
+                else:
+                    continue
+            worker.release()
+            del self.draining[worker]
+
+    def run(self, interval: float = 1.0, stop_event: Optional[Any] = None) -> None:
+        """
+        Scale every `interval` seconds until `stop_event` is set.
+        """
+        while stop_event is None or not stop_event.is_set():
+            self.step()
+            if stop_event is None:
+                time.sleep(interval)
+            else:
+                stop_event.wait(interval)
+        self.reap(wait=True)
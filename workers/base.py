@@ -1,15 +1,70 @@
 from abc import ABC, abstractmethod
+import asyncio
+import dataclasses as dc
+import logging
 import multiprocessing
+import multiprocessing.connection
+import os
+import socket
 import time
-from typing import Any
+from typing import Any, Coroutine, Optional
 from types import SimpleNamespace
 import threading
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# ZMQ
+import zmq
+
+# Package
+try:
+    from .control import ControlBlock, State
+except ImportError:  # Run from `workers/` or with it on `sys.path`
+    from control import ControlBlock, State
+
+# Wakeup bytes: run `server()` once / reload the config only
+WAKE = b"\x00"
+RECONFIGURE = b"\x01"
+
 
 class AbstractWorker(ABC):
+    """
+    Worker that calls `server()` when there is something to do.
+
+    `server()` runs when a socket passed to `watch()` (on `startup`) is ready,
+    every `interval` seconds, and after `wake()`; `self.events` holds the
+    ready sockets of the current call. The worker sleeps in a `zmq.Poller`
+    in between, and `stop()` wakes it up at once. Without watched sockets or
+    an `interval`, `server()` is called again and again and must block itself.
+
+    `self.control` is a shared-memory `ControlBlock`: the worker keeps its
+    state, heartbeat (every `heartbeat_interval`), processed count and load
+    (busy fraction) there for the parent to read. `configure()` in the parent
+    replaces the worker's `options` without a restart (`on_event("config")`).
+
+    The wakeup socket pair is closed on both sides: the worker closes its end
+    when it exits, and the parent calls `release()` once it has joined the
+    worker (`BaseServer` does).
+    """
+
+    interval: Optional[float] = None
+    heartbeat_interval: float = 1.0
+
     def __init__(self, **kwargs: Any):
         self.options = SimpleNamespace(**kwargs)
+        self.events: dict[Any, int] = {}
+        self.control = ControlBlock()
         self.__stop_event = self._start_event()
+        self.__watched: list[tuple[Any, int]] = []
+        # Wakeup pair: `wake()` writes, the poller reads (works across `fork`)
+        self.__wakeup, self.__waker = socket.socketpair()
+        self.__wakeup.setblocking(False)
+        self.__waker.setblocking(False)
+        self.__busy = 0.0
+        self.__last_beat = time.monotonic()
 
     @abstractmethod
     def server(self):
@@ -24,14 +79,131 @@ class AbstractWorker(ABC):
     def run(self):
         """Run Worker"""
         self.on_event("startup")
+        self.control.beat(State.RUNNING)
+        try:
+            if self.__watched or self.interval is not None:
+                self.__poll()
+            else:
+                while not self.__stop_event.is_set():
+                    self.__serve()
+                    if self.__beat():
+                        # Nothing waits for wakeups here; keep the pair empty
+                        self.__drain()
+        finally:
+            self.events = {}
+            self._close_wakeup()
+            self.control.beat(State.STOPPED)
+
+    def __poll(self):
+        """
+        Sleep until a watched socket, the schedule, `wake()` or `stop()`.
+        """
+        poller = zmq.Poller()
+        poller.register(self.__wakeup, zmq.POLLIN)
+        for source, flags in self.__watched:
+            poller.register(source, flags)
+        next_run = time.monotonic()
         while not self.__stop_event.is_set():
-            self.server()
+            now = time.monotonic()
+            wakeup = self.__last_beat + self.heartbeat_interval
+            if self.interval is not None:
+                wakeup = min(wakeup, next_run)
+            events = dict(poller.poll(max(0.0, wakeup - now) * 1000))
+            if self.__stop_event.is_set():
+                break
+            woken = WAKE in self.__drain() if self.__wakeup in events else False
+            events.pop(self.__wakeup, None)
+            due = self.interval is not None and time.monotonic() >= next_run
+            if due:
+                # Skip missed runs instead of catching up
+                next_run = max(next_run + self.interval, time.monotonic())
+            if events or woken or due:
+                self.events = events
+                self.__serve()
+            self.__beat()
+
+    def __serve(self):
+        """
+        Call `server()` and count it.
+        """
+        started = time.monotonic()
+        self.server()
+        self.__busy += time.monotonic() - started
+        self.control.fields.processed += 1
+
+    def __beat(self):
+        """
+        Publish the heartbeat and load, and apply a pushed config.
+
+        Returns whether a heartbeat was due.
+        """
+        self._reconfigure()
+        now = time.monotonic()
+        elapsed = now - self.__last_beat
+        if elapsed < self.heartbeat_interval:
+            return False
+        self.control.fields.load = min(1.0, self.__busy / elapsed)
+        self.control.beat()
+        self.__busy = 0.0
+        self.__last_beat = now
+        return True
+
+    def _reconfigure(self):
+        """
+        Replace `options` with the config pushed by `configure()`, if any.
+        """
+        config = self.control.pull()
+        if config is not None:
+            self.options = SimpleNamespace(**config)
+            self.on_event("config")
+
+    def configure(self, **changes: Any):
+        """
+        Update the options of a running worker (from the parent).
+        """
+        self.options = SimpleNamespace(**{**vars(self.options), **changes})
+        self.control.push(vars(self.options))
+        self.__signal(RECONFIGURE)
+
+    def watch(self, source: Any, flags: int = zmq.POLLIN):
+        """Call `server()` when a socket (or file descriptor) is ready."""
+        self.__watched.append((source, flags))
+
+    def wake(self):
+        """Call `server()` once, now (from any thread or the parent process)."""
+        self.__signal(WAKE)
 
     def stop(self):
         """Stop Worker"""
+        self.control.fields.state = State.STOPPING
         self.__stop_event.set()
+        self.wake()
         self.on_event("shutdown")
 
+    def clone(self):
+        """Create a fresh (unstarted) worker with the same options."""
+        return type(self)(**vars(self.options))
+
+    def release(self):
+        """Close the wakeup sockets once the worker has exited (parent side)."""
+        self.__wakeup.close()
+        self.__waker.close()
+
+    def _wakeup_fileno(self) -> int:
+        """The reading end of the wakeup pair, for an event loop to watch."""
+        return self.__wakeup.fileno()
+
+    def _take_wakeups(self) -> bytes:
+        """The wakeup bytes received since the last call."""
+        return self.__drain()
+
+    def _close_wakeup(self):
+        """
+        Close the reading end of the wakeup pair: in the worker on exit, and
+        in the parent once a process has started (only the child reads it).
+        """
+        self.__wakeup.close()
+
     @property
     def stop_event(self):
         return self.__stop_event
@@ -41,12 +213,31 @@ class AbstractWorker(ABC):
         """Create a stop event. This method must be implemented by subclasses."""
         pass
 
+    def __signal(self, data: bytes):
+        try:
+            self.__waker.send(data)
+        except (BlockingIOError, OSError):
+            pass  # A wakeup is pending already, or the worker has exited
+
+    def __drain(self) -> bytes:
+        received = []
+        try:
+            while data := self.__wakeup.recv(4096):
+                received.append(data)
+        except (BlockingIOError, OSError):
+            pass
+        return b"".join(received)
+
 
 class BaseProcess(AbstractWorker, multiprocessing.Process):
     def __init__(self, **kwargs: Any):
         multiprocessing.Process.__init__(self)
         AbstractWorker.__init__(self, **kwargs)
 
+    def start(self):
+        multiprocessing.Process.start(self)
+        self._close_wakeup()
+
     def _start_event(self):
         return multiprocessing.Event()
 
@@ -60,6 +251,104 @@ class BaseThread(AbstractWorker, threading.Thread):
         return threading.Event()
 
 
+def run_async(main: Coroutine) -> Any:
+    """
+    Run a coroutine on a new event loop (`uvloop` when installed).
+    """
+    if uvloop is not None:
+        return uvloop.run(main)
+    if os.name == "nt":
+        # `zmq.asyncio` needs a selector loop on Windows
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    return asyncio.run(main)
+
+
+class BaseAsyncWorker(AbstractWorker):
+    """
+    Worker whose `server()` is a coroutine, awaited once on its own event loop.
+
+    `server()` runs until it returns or `stop()` is called, which cancels it
+    (clean up in `finally` or `except asyncio.CancelledError`). The event loop
+    watches the wakeup socket, so `stop()` and `configure()` take effect at
+    once without a helper thread or polling. Tasks that `server()` starts
+    with `self.group` are part of the same `asyncio.TaskGroup`: they are
+    cancelled with it, and an error in any of them stops the worker.
+
+    The heartbeat and config updates run in a task beside `server()`; count
+    work with `self.control.fields.processed` and set `load` as it suits.
+    """
+
+    group: Optional[asyncio.TaskGroup] = None
+
+    @abstractmethod
+    async def server(self):
+        """Serve until cancelled. This method must be implemented by subclasses."""
+        pass
+
+    def run(self):
+        """Run Worker"""
+        run_async(self.__main())
+
+    async def __main(self):
+        self.on_event("startup")
+        self.control.beat(State.RUNNING)
+        loop = asyncio.get_running_loop()
+        wakeup = self._wakeup_fileno()
+        loop.add_reader(wakeup, self.__on_wakeup, asyncio.current_task())
+        heartbeat = asyncio.create_task(self.__heartbeat())
+        try:
+            async with asyncio.TaskGroup() as group:
+                self.group = group
+                group.create_task(self.server())
+        except asyncio.CancelledError:
+            if not self.stop_event.is_set():
+                raise
+        finally:
+            loop.remove_reader(wakeup)
+            heartbeat.cancel()
+            self.group = None
+            self._close_wakeup()
+            self.control.beat(State.STOPPED)
+
+    async def __heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            self._reconfigure()
+            self.control.beat()
+
+    def __on_wakeup(self, task: asyncio.Task):
+        """
+        Apply a pushed config, and cancel `task` (and the tasks of its group)
+        once the stop event is set.
+        """
+        if RECONFIGURE in self._take_wakeups():
+            self._reconfigure()
+        if self.stop_event.is_set() and not task.cancelling():
+            task.cancel()
+
+
+class BaseAsyncProcess(BaseAsyncWorker, multiprocessing.Process):
+    def __init__(self, **kwargs: Any):
+        multiprocessing.Process.__init__(self)
+        AbstractWorker.__init__(self, **kwargs)
+
+    def start(self):
+        multiprocessing.Process.start(self)
+        self._close_wakeup()
+
+    def _start_event(self):
+        return multiprocessing.Event()
+
+
+class BaseAsyncThread(BaseAsyncWorker, threading.Thread):
+    def __init__(self, **kwargs: Any):
+        threading.Thread.__init__(self)
+        AbstractWorker.__init__(self, **kwargs)
+
+    def _start_event(self):
+        return threading.Event()
+
+
 # Example subclass
 class Shared:
     def on_event(self, event_type: str):
@@ -72,68 +361,283 @@ class Shared:
 
 
 class WorkerOne(Shared, BaseProcess):
+    interval = 1.0
+
     def server(self):
         print("Process Working...", self.options)
-        time.sleep(1)
 
 
 class WorkerTwo(Shared, BaseThread):
+    interval = 1.0
+
     def server(self):
         print("Thread Working...", self.options)
-        time.sleep(1)
+
+
+class WorkerThree(Shared, BaseAsyncProcess):
+    async def server(self):
+        while True:
+            print("Async Process Working...", self.options)
+            await asyncio.sleep(1)
+
+
+@dc.dataclass
+class WorkerState:
+    started: float
+    failures: int = 0
+    restart_at: Optional[float] = None
 
 
 class BaseServer(ABC):
     """
     Control multiple worker `Thread(s)` and/or `Process(es)`.
+
+    With `supervise`, workers that exit without being stopped are replaced
+    (`worker.clone()`) after an exponential backoff, so capacity stays constant.
+    With `heartbeat_timeout`, a process whose heartbeat is older than that is
+    terminated and replaced the same way (threads are only reported). The
+    supervisor marks a worker it finds dead `CRASHED` in its `ControlBlock`,
+    since a killed process never records its own exit.
+
+    Every subclass is its own service: it gets its own `workers` list and
+    supervisor state. Change `workers` (from any thread) while holding `lock`,
+    or through `add()`, `launch()` and `retire()`.
     """
 
     workers: list[Any] = []
     on_event: Any
 
+    # Supervisor
+    check_interval: float = 1.0
+    drain_timeout: float = 10.0
+    backoff_initial: float = 0.5
+    backoff_max: float = 30.0
+    stable_after: float = 60.0  # Uptime that resets the backoff
+    heartbeat_timeout: Optional[float] = None  # Seconds (`None` disables it)
+    lock = threading.RLock()
+    __states: dict[Any, WorkerState] = {}
+
+    def __init_subclass__(cls, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        if "workers" not in cls.__dict__:
+            cls.workers = []
+        cls.lock = threading.RLock()
+        cls.__states = {}
+
     @classmethod
     def add(cls, *workers: list[Any]) -> None:
         """
         Add worker instances to the service.
         """
-        cls.workers.extend(workers)
+        with cls.lock:
+            cls.workers.extend(workers)
 
     @classmethod
-    def start(cls, is_loop: bool = True) -> None:
+    def start(
+        cls,
+        is_loop: bool = True,
+        supervise: bool = False,
+        stop_event: Optional[Any] = None,
+    ) -> None:
         """
         Start all added workers and optionally keep the main thread running until interrupted.
+
+        With `stop_event`, the loop also ends (and the workers are stopped)
+        once the event is set.
         """
         # Startup
         cls.on_event("startup")
-        for worker in cls.workers:
-            worker.start()
+        with cls.lock:
+            for worker in cls.workers:
+                cls.launch(worker)
 
-        # Loop Until (Keyboard-Interrupt)
+        # Loop Until (Keyboard-Interrupt or `stop_event`)
         if is_loop:
             try:
-                while True:
-                    time.sleep(1)
+                while stop_event is None or not stop_event.is_set():
+                    if supervise:
+                        cls.check()
+                    elif stop_event is not None:
+                        stop_event.wait(1)
+                    else:
+                        time.sleep(1)
             except KeyboardInterrupt:
-                cls.stop()
+                pass
+            cls.stop()
 
         # Shutdown
         cls.on_event("shutdown")
 
     @classmethod
-    def stop(cls, cleanup: bool = False) -> None:
+    def launch(cls, worker: Any, failures: int = 0) -> None:
+        """
+        Start a worker and track it for the supervisor.
+        """
+        with cls.lock:
+            worker.start()
+            cls.__states[worker] = WorkerState(
+                started=time.monotonic(), failures=failures
+            )
+
+    @classmethod
+    def retire(cls, worker: Any) -> None:
+        """
+        Remove a worker from the service and ask it to stop (without waiting).
+
+        The worker is no longer supervised; join it (or terminate it after a
+        deadline, as the `Autoscaler` does). Stopping cancels an async worker,
+        which is where it gives its work back, e.g. `BrokerWorker.drain()`
+        waits until the `LoadBalancer` has nothing pending for it.
+        """
+        with cls.lock:
+            cls.workers.remove(worker)
+            cls.__states.pop(worker, None)
+        worker.stop()
+
+    @classmethod
+    def check(cls, timeout: Optional[float] = None) -> None:
+        """
+        Wait up to `timeout` for a worker to exit, then restart dead workers.
+
+        Processes are watched through their `sentinel`, so a crash wakes the
+        supervisor immediately; threads are checked every `check_interval`.
+        """
+        timeout = cls.check_interval if timeout is None else timeout
+        now = time.monotonic()
+        pending = [s.restart_at for s in cls.__states.values() if s.restart_at]
+        if pending:
+            timeout = max(0.0, min(timeout, min(pending) - now))
+        with cls.lock:
+            sentinels = [
+                worker.sentinel
+                for worker in cls.workers
+                if hasattr(worker, "sentinel") and worker.is_alive()
+            ]
+        if sentinels:
+            multiprocessing.connection.wait(sentinels, timeout)
+        else:
+            time.sleep(timeout)
+
+        with cls.lock:
+            for worker in list(cls.workers):
+                cls.__check_worker(worker)
+
+    @classmethod
+    def __check_worker(cls, worker: Any) -> None:
+        """
+        Restart a worker when due, or schedule the restart of a dead one.
+        """
+        now = time.monotonic()
+        state = cls.__states.get(worker)
+        if state is None:
+            return
+        # Restart due
+        if state.restart_at is not None:
+            if now >= state.restart_at:
+                worker.join()
+                worker.release()
+                replacement = worker.clone()
+                cls.workers[cls.workers.index(worker)] = replacement
+                del cls.__states[worker]
+                cls.launch(replacement, state.failures)
+            return
+        # Hung
+        if cls.heartbeat_timeout is not None and worker.is_alive():
+            cls.__check_heartbeat(worker, now)
+        # Running or stopped on purpose
+        if worker.is_alive() or worker.stop_event.is_set():
+            return
+        # Crashed
+        worker.control.fields.state = State.CRASHED
+        if now - state.started >= cls.stable_after:
+            state.failures = 0
+        delay = min(cls.backoff_max, cls.backoff_initial * 2**state.failures)
+        state.failures += 1
+        state.restart_at = now + delay
+        exitcode = getattr(worker, "exitcode", None)
+        logging.warning(
+            f"Worker {worker.name} exited (exitcode={exitcode}), "
+            f"restarting in {delay:.1f}s"
+        )
+
+    @classmethod
+    def __check_heartbeat(cls, worker: Any, now: float) -> None:
+        """
+        Terminate a running process that stopped beating (the restart follows).
+        """
+        fields = worker.control.fields
+        if fields.state != State.RUNNING or not fields.heartbeat:
+            return
+        age = now - fields.heartbeat
+        if age < cls.heartbeat_timeout:
+            return
+        if hasattr(worker, "terminate"):
+            logging.warning(f"Worker {worker.name} hung ({age:.1f}s), terminating")
+            worker.terminate()
+            worker.join()
+        else:
+            logging.warning(f"Worker {worker.name} hung ({age:.1f}s)")
+
+    @classmethod
+    def status(cls) -> dict[str, dict[str, Any]]:
+        """
+        State, heartbeat, processed count and load of every worker.
+
+        Read from shared memory, without asking the workers.
+        """
+        with cls.lock:
+            workers = list(cls.workers)
+        return {worker.name: worker.control.snapshot() for worker in workers}
+
+    @classmethod
+    def configure(cls, **changes: Any) -> None:
+        """
+        Update the options of every running worker, without restarts.
+        """
+        with cls.lock:
+            workers = list(cls.workers)
+        for worker in workers:
+            worker.configure(**changes)
+
+    @classmethod
+    def stop(cls, cleanup: bool = False, timeout: Optional[float] = None) -> None:
         """
         Stop all running workers and optionally remove workers.
+
+        Workers get `timeout` seconds (default `drain_timeout`) to finish their
+        current work before processes are terminated. Every worker that is no
+        longer running, or never started, is released.
         """
-        for worker in cls.workers:
+        with cls.lock:
+            workers = list(cls.workers)
+            cls.__states.clear()
+        for worker in workers:
             worker.stop()
-        # Process & Threads
-        for worker in cls.workers:
-            if hasattr(worker, "terminate"):
+        # Drain (Process & Threads)
+        deadline = time.monotonic() + (
+            cls.drain_timeout if timeout is None else timeout
+        )
+        for worker in workers:
+            if worker.ident is None:
+                worker.release()  # Never started
+                continue
+            worker.join(max(0.0, deadline - time.monotonic()))
+            if worker.is_alive():
+                if not hasattr(worker, "terminate"):
+                    logging.warning(f"Worker {worker.name} did not drain in time")
+                    continue
+                logging.warning(
+                    f"Worker {worker.name} did not drain in time, terminating"
+                )
                 worker.terminate()
-            worker.join()
+                worker.join()
+                # Killed before it could record its exit
+                worker.control.fields.state = State.STOPPED
+            worker.release()
         # Cleanup
         if cleanup:
-            cls.workers.clear()
+            with cls.lock:
+                cls.workers.clear()
 
 
 class Service(BaseServer):
@@ -0,0 +1,108 @@
+from multiprocessing.sharedctypes import RawArray, RawValue
+from typing import Any, Optional
+import ctypes
+import enum
+import os
+import pickle
+import time
+
+
+class State(enum.IntEnum):
+    CREATED = 0
+    RUNNING = 1
+    STOPPING = 2
+    STOPPED = 3
+    CRASHED = 4  # Set by the supervisor for a worker that exited on its own
+
+
+class Fields(ctypes.Structure):
+    _fields_ = [
+        ("state", ctypes.c_int32),
+        ("pid", ctypes.c_int32),
+        ("heartbeat", ctypes.c_double),  # `time.monotonic()` of the last beat
+        ("load", ctypes.c_double),  # Busy fraction (or a worker-defined value)
+        ("processed", ctypes.c_uint64),
+        ("version", ctypes.c_uint64),  # Config version (odd while written)
+        ("size", ctypes.c_uint32),  # Config bytes
+    ]
+
+
+class ControlBlock:
+    """
+    Per-worker state in shared memory, readable without IPC round trips.
+
+    The worker writes `fields` (`state`, `heartbeat`, `processed`, `load`);
+    the parent reads them directly (`snapshot()`). The parent writes the config with
+    `push()` and the worker picks it up with `pull()`. The config area is
+    guarded by a version counter (a seqlock): the parent is its only writer,
+    and a reader that sees the version change while copying tries again on
+    its next `pull()`.
+
+    Create it before the worker starts, so a process inherits the mapping.
+    """
+
+    def __init__(self, config_size: int = 64 << 10):
+        """
+        Initialize a ControlBlock.
+
+        Args:
+            config_size (int): Bytes reserved for the pickled config.
+        """
+        self.fields = RawValue(Fields)
+        self.config = RawArray(ctypes.c_char, config_size)
+        self.__seen = 0  # Last config version pulled (worker side)
+
+    def beat(self, state: Optional[State] = None) -> None:
+        """
+        Refresh the heartbeat (and optionally the state).
+        """
+        if state is not None:
+            self.fields.state = state
+            self.fields.pid = os.getpid()
+        self.fields.heartbeat = time.monotonic()
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Current values (parent side).
+        """
+        fields = self.fields
+        return {
+            "state": State(fields.state),
+            "pid": fields.pid,
+            "heartbeat": fields.heartbeat,
+            "age": time.monotonic() - fields.heartbeat if fields.heartbeat else None,
+            "processed": fields.processed,
+            "load": fields.load,
+        }
+
+    def push(self, config: dict[str, Any]) -> None:
+        """
+        Publish a new config (parent side).
+
+        Raises:
+            ValueError: When the pickled config does not fit.
+        """
+        data = pickle.dumps(config, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > len(self.config):
+            raise ValueError(
+                f"Config of {len(data)} bytes exceeds {len(self.config)} bytes"
+            )
+        fields = self.fields
+        fields.version += 1  # Odd: being written
+        ctypes.memmove(self.config, data, len(data))
+        fields.size = len(data)
+        fields.version += 1
+
+    def pull(self) -> Optional[dict[str, Any]]:
+        """
+        The config pushed since the last call, if any (worker side).
+        """
+        fields = self.fields
+        version = fields.version
+        if version == self.__seen or version % 2:
+            return None
+        data = ctypes.string_at(self.config, fields.size)
+        if fields.version != version:
+            return None  # Written meanwhile, read it next time
+        self.__seen = version
+        return pickle.loads(data)